@@ -0,0 +1,144 @@
+# ai/conversations.py
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .models import AIConversation, AIMessage
+
+DEFAULT_SETTINGS = {
+    # Prompt tokens spent on verbatim recent messages
+    'HISTORY_TOKEN_BUDGET': 1000,
+    # Size cap of the rolling summary of older messages
+    'SUMMARY_MAX_CHARS': 1500,
+    # Each folded message contributes at most this many characters
+    'SUMMARY_LINE_CHARS': 160,
+}
+
+
+def conversation_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'AI_CONVERSATION', {})}
+
+
+def estimate_tokens(text):
+    """Cheap tokenizer-free estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class ConversationMemory:
+    """
+    Persists assistant turns and provides the bounded history for prompts.
+
+    Only messages not yet folded into the rolling summary are loaded (one
+    query on the (conversation, id) index). After each turn the oldest
+    messages beyond HISTORY_TOKEN_BUDGET are folded into the summary, so
+    the window, the prompt and the load query stay bounded however long
+    the conversation gets.
+    """
+
+    def __init__(self, conversation, window):
+        self.conversation = conversation
+        self.window = window
+        self.config = conversation_settings()
+
+    @classmethod
+    def load(cls, user, conversation_id=None, new=False):
+        """
+        The requested conversation (must belong to the user and be active),
+        otherwise the user's most recent active one, otherwise a new one.
+        Raises AIConversation.DoesNotExist for an unknown conversation_id.
+        """
+        if new:
+            return cls(AIConversation.objects.create(user=user), [])
+
+        conversations = AIConversation.objects.filter(user=user, is_active=True)
+        if conversation_id:
+            conversation = conversations.get(pk=conversation_id)
+        else:
+            conversation = conversations.order_by('-updated_at').first()
+            if conversation is None:
+                return cls(AIConversation.objects.create(user=user), [])
+
+        window = list(
+            conversation.messages.filter(id__gt=conversation.summarized_up_to).order_by('id')
+        )
+        return cls(conversation, window)
+
+    def history(self):
+        """Prompt history: the rolling summary and the recent turns, oldest first."""
+        return {
+            'summary': self.conversation.summary,
+            'messages': [{'role': m.role, 'content': m.content} for m in self.window],
+        }
+
+    def record_turn(self, message, result, service):
+        """Persist the user message and the answer, then fold old messages into the summary."""
+        if result.get('type') == 'error':
+            # Transient failures would only pollute later prompts
+            return
+
+        suggestion = result.get('suggested_transaction')
+        answer = result.get('response', '')
+        new_messages = [
+            AIMessage(
+                conversation=self.conversation,
+                role='user',
+                content=message,
+                service_used=service,
+                token_count=estimate_tokens(message),
+            ),
+            AIMessage(
+                conversation=self.conversation,
+                role='assistant',
+                content=answer,
+                service_used=service,
+                action_type='add_transaction' if suggestion else None,
+                action_data=suggestion,
+                token_count=estimate_tokens(answer),
+            ),
+        ]
+
+        with db_transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                AIMessage.objects.bulk_create(new_messages)
+            else:
+                # MySQL doesn't return primary keys from bulk inserts
+                for m in new_messages:
+                    m.save()
+
+            self.window.extend(new_messages)
+            self._fold_overflow()
+
+            self.conversation.updated_at = timezone.now()
+            self.conversation.save(update_fields=['summary', 'summarized_up_to', 'updated_at'])
+
+    def _fold_overflow(self):
+        budget = self.config['HISTORY_TOKEN_BUDGET']
+        total = sum(m.token_count for m in self.window)
+
+        folded = []
+        # Always keep the latest exchange verbatim
+        while total > budget and len(self.window) > 2:
+            oldest = self.window.pop(0)
+            total -= oldest.token_count
+            folded.append(oldest)
+
+        if not folded:
+            return
+
+        line_chars = self.config['SUMMARY_LINE_CHARS']
+        lines = [self.conversation.summary] if self.conversation.summary else []
+        for m in folded:
+            text = ' '.join(m.content.split())
+            if len(text) > line_chars:
+                text = text[:line_chars - 1] + '…'
+            lines.append(f"{m.role.title()}: {text}")
+
+        # Keep the most recent part of the summary when it outgrows the cap
+        summary = '\n'.join(lines)
+        max_chars = self.config['SUMMARY_MAX_CHARS']
+        if len(summary) > max_chars:
+            summary = summary[-max_chars:].split('\n', 1)[-1]
+
+        self.conversation.summary = summary
+        self.conversation.summarized_up_to = folded[-1].id
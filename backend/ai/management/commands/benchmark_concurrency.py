@@ -0,0 +1,90 @@
+# ai/management/commands/benchmark_concurrency.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.services.http_client import CallStats, CircuitBreaker
+from ai.services.huggingface_service import HuggingFaceService
+from .benchmark_generators import MESSAGES, SAMPLE_CONTEXT, percentile, stub_handler
+
+
+class StubServer(ThreadingHTTPServer):
+    # Every request connects at once; the default backlog of 5 would refuse most of them
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync and async assistant paths under concurrent slow provider calls "
+        "(against a local stub): process() on a fixed pool of worker threads, as under "
+        "WSGI, vs aprocess() on one event loop, as under ASGI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=100, help="Requests in flight at once")
+        parser.add_argument('--workers', type=int, default=8,
+                            help="Worker threads on the sync side (e.g. gunicorn workers x threads)")
+        parser.add_argument('--stub-latency', type=float, default=0.5,
+                            help="Seconds the stub provider takes to answer")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['workers'] < 1:
+            raise CommandError("--concurrency and --workers must be positive")
+
+        server = StubServer(('127.0.0.1', 0), stub_handler(options['stub_latency'], 20))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        service = HuggingFaceService()
+        service.api_url = f"http://127.0.0.1:{server.server_port}/"
+        # Private breaker and stats so the benchmark doesn't touch the live ones
+        service.breaker = CircuitBreaker(failure_threshold=options['concurrency'] + 1, reset_timeout=1)
+        service.stats = CallStats()
+
+        count = options['concurrency']
+        try:
+            self._report(f"sync, {options['workers']} worker threads",
+                         *self._measure_sync(service, count, options['workers']))
+            self._report("async, one event loop", *asyncio.run(self._measure_async(service, count)))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _measure_sync(self, service, count, workers):
+        def call(message, queued):
+            result = service.process(message, SAMPLE_CONTEXT)
+            return time.perf_counter() - queued, result is not None and result.get('type') != 'error'
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Requests arrive together; a request waits for a free worker like it would behind WSGI
+            futures = [pool.submit(call, MESSAGES[i % len(MESSAGES)], started) for i in range(count)]
+            results = [future.result() for future in futures]
+        return time.perf_counter() - started, results
+
+    async def _measure_async(self, service, count):
+        async def call(message):
+            queued = time.perf_counter()
+            result = await service.aprocess(message, SAMPLE_CONTEXT)
+            return time.perf_counter() - queued, result is not None and result.get('type') != 'error'
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call(MESSAGES[i % len(MESSAGES)]) for i in range(count)))
+        return time.perf_counter() - started, results
+
+    def _report(self, name, elapsed, results):
+        latencies = [r[0] for r in results]
+        failures = sum(1 for r in results if not r[1])
+
+        self.stdout.write(f"🔀 {name}")
+        self.stdout.write(f"   ⏱️ Latency p50: {percentile(latencies, 50) * 1000:,.2f} ms, "
+                          f"p95: {percentile(latencies, 95) * 1000:,.2f} ms")
+        self.stdout.write(f"   ⚡ Throughput: {len(results) / elapsed:,.1f} requests/s "
+                          f"({len(results)} in {elapsed:,.2f} s)")
+        if failures:
+            self.stdout.write(self.style.WARNING(f"   ❌ Failed answers: {failures}/{len(results)}"))
@@ -0,0 +1,139 @@
+# ai/management/commands/benchmark_generators.py
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from ai.services.generators import TemplateGenerator
+from ai.services.http_client import CallStats, CircuitBreaker
+from ai.services.huggingface_service import HuggingFaceService
+
+MESSAGES = [
+    "How can I save more money?",
+    "Help me plan a budget",
+    "Should I invest in index funds?",
+    "How big should my emergency fund be?",
+    "What's the best way to pay off my credit card debt?",
+    "Tell me something about my finances",
+]
+
+SAMPLE_CONTEXT = {
+    'currency': 'USD',
+    'total_income': 5200.0,
+    'total_expense': 3870.5,
+    'total_balance': 1329.5,
+    'recent_transactions': [],
+    'reports': {'monthly_average': 1290.17, 'savings_rate': 25.6, 'biggest_category': 'Rent'},
+}
+
+
+def stub_handler(latency, tokens):
+    """Stands in for the inference API: streams `tokens` tokens spread over `latency` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            words = [f"word{i} " for i in range(tokens)]
+
+            if not payload.get('stream'):
+                time.sleep(latency)
+                body = json.dumps([{'generated_text': ''.join(words)}]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for word in words:
+                time.sleep(latency / tokens)
+                event = {'token': {'text': word, 'special': False}}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = "Compare latency and tokens/s of the text generator backends (HTTP backend against a local stub)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Streamed answers per backend")
+        parser.add_argument('--stub-latency', type=float, default=0.5,
+                            help="Seconds the stub provider takes to stream one answer")
+        parser.add_argument('--stub-tokens', type=int, default=50, help="Tokens in each stub answer")
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), stub_handler(options['stub_latency'], options['stub_tokens'])
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        http = HuggingFaceService()
+        http.api_url = f"http://127.0.0.1:{server.server_port}/"
+        # Private breaker and stats so the benchmark doesn't touch the live ones
+        http.breaker = CircuitBreaker(failure_threshold=options['requests'] + 1, reset_timeout=1)
+        http.stats = CallStats()
+
+        try:
+            backends = [TemplateGenerator(), http]
+            for backend in backends:
+                results = asyncio.run(self._measure(backend, options['requests']))
+                self._report(backend.name, results)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    async def _measure(self, backend, count):
+        results = []
+        for i in range(count):
+            message = MESSAGES[i % len(MESSAGES)]
+            started = time.perf_counter()
+            first_token = None
+            tokens = 0
+            final = None
+            async for event, data in backend.astream(message, SAMPLE_CONTEXT):
+                if event == 'token':
+                    tokens += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                else:
+                    final = event
+            elapsed = time.perf_counter() - started
+            results.append((elapsed, first_token or elapsed, tokens, final == 'done'))
+        return results
+
+    def _report(self, name, results):
+        latencies = [r[0] for r in results]
+        first_tokens = [r[1] for r in results]
+        tokens = sum(r[2] for r in results)
+        failures = sum(1 for r in results if not r[3])
+
+        self.stdout.write(f"🤖 {name}")
+        self.stdout.write(f"   ⏱️ Latency p50: {percentile(latencies, 50) * 1000:,.2f} ms, "
+                          f"p95: {percentile(latencies, 95) * 1000:,.2f} ms")
+        self.stdout.write(f"   ✏️ First token p95: {percentile(first_tokens, 95) * 1000:,.2f} ms")
+        self.stdout.write(f"   ⚡ Throughput: {tokens / sum(latencies):,.0f} tokens/s "
+                          f"(mean {statistics.mean(r[2] for r in results):.0f} tokens/answer)")
+        if failures:
+            self.stdout.write(self.style.WARNING(f"   ❌ Failed answers: {failures}/{len(results)}"))
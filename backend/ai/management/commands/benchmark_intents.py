@@ -0,0 +1,59 @@
+# ai/management/commands/benchmark_intents.py
+
+import csv
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from ai.services.intents import classify
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / 'data' / 'intent_corpus.csv'
+
+
+class Command(BaseCommand):
+    help = "Measure intent classifier accuracy and throughput on a labelled corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS),
+                            help="CSV with 'message' and 'intent' columns ('none' = remote model)")
+        parser.add_argument('--iterations', type=int, default=2000,
+                            help="Passes over the corpus for the throughput measurement")
+        parser.add_argument('--show-errors', action='store_true')
+
+    def handle(self, *args, **options):
+        with open(options['corpus'], newline='', encoding='utf-8') as f:
+            corpus = [(row['message'], row['intent']) for row in csv.DictReader(f)]
+
+        correct = 0
+        errors = []
+        confusion = Counter()
+        for message, expected in corpus:
+            predicted = classify(message).name or 'none'
+            if predicted == expected:
+                correct += 1
+            else:
+                errors.append((message, expected, predicted))
+                confusion[(expected, predicted)] += 1
+
+        local = sum(1 for message, _ in corpus if classify(message).name)
+        messages = [message for message, _ in corpus]
+
+        start = time.perf_counter()
+        for _ in range(options['iterations']):
+            for message in messages:
+                classify(message)
+        elapsed = time.perf_counter() - start
+
+        total = len(corpus)
+        self.stdout.write(f"📊 Messages: {total}")
+        self.stdout.write(f"✅ Accuracy: {correct}/{total} ({correct / total:.1%})")
+        self.stdout.write(f"🏠 Handled locally: {local}/{total} ({local / total:.1%})")
+        self.stdout.write(f"⚡ Throughput: {total * options['iterations'] / elapsed:,.0f} messages/s")
+
+        for (expected, predicted), count in confusion.most_common():
+            self.stdout.write(f"   {expected} → {predicted}: {count}")
+        if options['show_errors']:
+            for message, expected, predicted in errors:
+                self.stdout.write(f"   ❌ {message!r}: expected {expected}, got {predicted}")
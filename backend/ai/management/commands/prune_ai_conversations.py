@@ -0,0 +1,71 @@
+# ai/management/commands/prune_ai_conversations.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from ai.models import AIConversation, AIMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive idle AI conversations, prune messages already folded into a "
+        "conversation summary, and delete long-archived conversations. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-after', type=int, default=30,
+                            help="Archive active conversations idle for this many days")
+        parser.add_argument('--prune-after', type=int, default=30,
+                            help="Delete summarized messages older than this many days")
+        parser.add_argument('--delete-after', type=int, default=365,
+                            help="Delete archived conversations idle for this many days")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        dry_run = options['dry_run']
+
+        to_archive = AIConversation.objects.filter(
+            is_active=True,
+            updated_at__lt=now - timedelta(days=options['archive_after']),
+        )
+        # Only messages the rolling summary already covers; the prompt window is never touched
+        to_prune = AIMessage.objects.filter(
+            created_at__lt=now - timedelta(days=options['prune_after']),
+            id__lte=F('conversation__summarized_up_to'),
+        )
+        to_delete = AIConversation.objects.filter(
+            is_active=False,
+            updated_at__lt=now - timedelta(days=options['delete_after']),
+        )
+
+        if dry_run:
+            self.stdout.write(
+                f"Would archive {to_archive.count()} conversation(s), prune {to_prune.count()} "
+                f"message(s) and delete {to_delete.count()} conversation(s)"
+            )
+            return
+
+        deleted = self._delete_in_batches(to_delete, options['batch_size'])
+        pruned = self._delete_in_batches(to_prune, options['batch_size'])
+        archived = to_archive.update(is_active=False)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} conversation(s), pruned {pruned} message(s), "
+            f"deleted {deleted} conversation(s)"
+        ))
+
+    def _delete_in_batches(self, queryset, batch_size):
+        """Delete in primary-key batches so no single statement locks a large range."""
+        total = 0
+        model = queryset.model
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return total
+            model.objects.filter(pk__in=ids).delete()
+            total += len(ids)
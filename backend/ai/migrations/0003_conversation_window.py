@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_usage_log_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiconversation',
+            name='summarized_up_to',
+            field=models.BigIntegerField(default=0, help_text='ID of the last message folded into the summary'),
+        ),
+        migrations.AddField(
+            model_name='aiconversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='aimessage',
+            name='token_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='aiconversation',
+            index=models.Index(fields=['user', 'is_active', 'updated_at'], name='ai_conv_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aimessage',
+            index=models.Index(fields=['conversation', 'id'], name='ai_message_conv_id_idx'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.db import models
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class AIConversation(models.Model):
@@ -20,10 +21,20 @@ class AIConversation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Rolling summary of the messages that fell out of the prompt window
+    summary = models.TextField(blank=True, default='')
+    summarized_up_to = models.BigIntegerField(
+        default=0,
+        help_text='ID of the last message folded into the summary'
+    )
+
     class Meta:
         ordering = ['-updated_at']
         verbose_name = 'AI Conversation'
         verbose_name_plural = 'AI Conversations'
+        indexes = [
+            models.Index(fields=['user', 'is_active', 'updated_at'], name='ai_conv_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"Conversation {self.id} - {self.user.email}"
@@ -58,12 +69,18 @@ class AIMessage(models.Model):
         help_text='gemini or local'
     )
 
+    # Estimated prompt tokens, stored so the history window needs no re-count
+    token_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
         verbose_name = 'AI Message'
         verbose_name_plural = 'AI Messages'
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='ai_message_conv_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
@@ -90,7 +107,8 @@ class AIUsageLog(models.Model):
     success = models.BooleanField(default=True)
     error_message = models.TextField(blank=True, null=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the request happened; rows are written later in batches (ai/usage.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -108,7 +126,10 @@ class AIUsageLog(models.Model):
 
     @classmethod
     def get_user_usage_today(cls, user):
-        """Get how many requests user made today"""
+        """
+        Get how many requests user made today (analytics only; request
+        limits are enforced from the cache by ai.ratelimit)
+        """
         from django.utils import timezone
         from datetime import timedelta
 
@@ -0,0 +1,137 @@
+# ai/ratelimit.py
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_RATES = {
+    'local': ['60/min'],
+    'huggingface': ['10/min', '200/day'],
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class RateLimited(Exception):
+    def __init__(self, service, retry_after):
+        super().__init__(f"Rate limit exceeded for {service}")
+        self.service = service
+        self.retry_after = retry_after
+
+
+def parse_rate(rate):
+    """'20/min' -> (20, 60), same notation as DRF's throttle rates."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class SlidingWindowRateLimiter:
+    """
+    Per-user, per-service limits kept in the Django cache (local memory in
+    development, Redis in production).
+
+    Each limit uses a sliding-window counter: the current and previous fixed
+    windows are two cache keys, and the previous count is weighted by how
+    much of it still overlaps the sliding window. A check is one get_many
+    plus an add and an incr per limit, regardless of how much the user has
+    used. The decision is made on the value incr() returns, so concurrent
+    requests can't all pass on the same stale count; a rejected request is
+    decremented again.
+    """
+
+    KEY = 'ai-rate:{service}:{user_id}:{window}:{index}'
+
+    def __init__(self, rates=None):
+        self.rates = {
+            service: [parse_rate(rate) for rate in service_rates]
+            for service, service_rates in (rates or {}).items()
+        }
+
+    @classmethod
+    def from_settings(cls):
+        return cls({**DEFAULT_RATES, **getattr(settings, 'AI_RATE_LIMITS', {})})
+
+    def hit(self, service, user_id):
+        """Count one request, or raise RateLimited without counting it."""
+        windows = self._windows(service, user_id)
+        previous = cache.get_many([window[4] for window in windows])
+
+        counted = []
+        try:
+            for limit, window, offset, current_key, previous_key in windows:
+                # Two windows' lifetime: it is read again as the "previous" window
+                cache.add(current_key, 0, timeout=window * 2)
+                try:
+                    current = cache.incr(current_key)
+                except ValueError:
+                    # Expired between add() and incr()
+                    cache.set(current_key, 1, timeout=window * 2)
+                    current = 1
+                counted.append(current_key)
+                self._check(service, limit, window, offset, current, previous.get(previous_key, 0))
+        except RateLimited:
+            for key in counted:
+                try:
+                    cache.decr(key)
+                except ValueError:
+                    pass
+            raise
+
+    async def ahit(self, service, user_id):
+        """hit() for async callers, through the async cache API."""
+        windows = self._windows(service, user_id)
+        previous = await cache.aget_many([window[4] for window in windows])
+
+        counted = []
+        try:
+            for limit, window, offset, current_key, previous_key in windows:
+                await cache.aadd(current_key, 0, timeout=window * 2)
+                try:
+                    current = await cache.aincr(current_key)
+                except ValueError:
+                    await cache.aset(current_key, 1, timeout=window * 2)
+                    current = 1
+                counted.append(current_key)
+                self._check(service, limit, window, offset, current, previous.get(previous_key, 0))
+        except RateLimited:
+            for key in counted:
+                try:
+                    await cache.adecr(key)
+                except ValueError:
+                    pass
+            raise
+
+    def _windows(self, service, user_id):
+        """(limit, window, offset, current key, previous key) for each of the service's limits."""
+        now = time.time()
+        windows = []
+        for limit, window in self.rates.get(service, []):
+            index, offset = divmod(now, window)
+            windows.append((
+                limit,
+                window,
+                offset,
+                self.KEY.format(service=service, user_id=user_id, window=window, index=int(index)),
+                self.KEY.format(service=service, user_id=user_id, window=window, index=int(index) - 1),
+            ))
+        return windows
+
+    def _check(self, service, limit, window, offset, current, previous):
+        """Raise RateLimited if this request, counted in `current`, goes over `limit`."""
+        before = current - 1
+        overlap = 1 - offset / window
+        if previous * overlap + before >= limit:
+            raise RateLimited(service, self._retry_after(limit, window, offset, before, previous))
+
+    @staticmethod
+    def _retry_after(limit, window, offset, current, previous):
+        if current >= limit or not previous:
+            return max(1, math.ceil(window - offset))
+        # Seconds until the weighted previous window has decayed enough
+        needed_overlap = (limit - current) / previous
+        return max(1, math.ceil((1 - needed_overlap) * window - offset))
+
+
+rate_limiter = SlidingWindowRateLimiter.from_settings()
@@ -2,4 +2,7 @@
 
 from .ai_manager import AIManager
 from .huggingface_service import HuggingFaceService
-from .local_service import LocalService
\ No newline at end of file
+from .local_service import LocalService
+from .context_builder import ContextBuilder
+from .response_cache import ResponseCache
+from .registry import get_ai_manager
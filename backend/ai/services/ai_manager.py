@@ -1,31 +1,236 @@
 # ai/services/ai_manager.py
 
-from .huggingface_service import HuggingFaceService
+import time
+
+from ai.ratelimit import rate_limiter
+from ai.usage import usage_recorder
+from .generators import get_generator
+from .intents import is_follow_up
 from .local_service import LocalService
+from .response_cache import response_cache
 
 class AIManager:
     def __init__(self, user=None):
         self.user = user
         self.local = LocalService()
-        self.ai = HuggingFaceService()
-        print("🤖 AI Manager Initialized: [Local + HuggingFace]")
+        # Remote model by default; see settings.AI_GENERATOR_BACKEND
+        self.ai = get_generator()
+        self.cache = response_cache
+        self.usage = usage_recorder
+        self.rate_limiter = rate_limiter
+        print(f"🤖 AI Manager Initialized: [Local + {type(self.ai).__name__}]")
 
-    def process(self, message: str, context: dict) -> dict:
+    def process(self, message: str, context: dict, user=None, history=None) -> dict:
         """
         Smart Routing:
         1. Local Service (Precise actions, Math, Database)
         2. Hugging Face (General knowledge, Advice, Chit-chat)
+
+        `history` (ai.conversations.ConversationMemory.history()) gives the
+        remote model the earlier turns of the conversation.
+
+        Answers are cached per user and data version when `user` is given,
+        and every answer is recorded in the (buffered) usage log.
+        Raises ai.ratelimit.RateLimited when the user is over a service's limit
+        (cached answers and the fallback are not counted).
+
+        The result carries '_service': local, cache, fallback or the generator's name
+        (huggingface by default).
         """
+        user = user or self.user
+        started = time.monotonic()
+        service, result = self._route(message, context, user, history)
+        self._record_usage(user, service, message, result, started)
+        return dict(result, _service=service)
+
+    def _route(self, message, context, user, history):
+        """Returns (service that answered, result)."""
 
         # 1. Try Local Service First
         # If the user wants to ADD or VIEW specific data, Local is best.
-        local_result = self.local.process(message, context)
+        local_result = self._process_local(message, context, user)
 
         if local_result is not None:
             print("✅ Handled by Local Service")
-            return local_result
+            self._check_rate_limit('local', user)
+            return 'local', local_result
 
-        # 2. Fallback to AI (Hugging Face)
+        # 2. Same question, same data: reuse the previous AI answer
+        cache_key, cached = self._lookup(self.ai.name, user, message, history)
+        if cached is not None:
+            print("♻️ Served from AI response cache")
+            return 'cache', cached
+
+        # 3. Fallback to AI (Hugging Face)
         # If local didn't catch it, it's likely a conversational query
-        print("🤖 Routing to Hugging Face AI...")
-        return self.ai.process(message, context)
\ No newline at end of file
+        if self.ai.is_available():
+            self._check_rate_limit(self.ai.name, user)
+            print("🤖 Routing to Hugging Face AI...")
+            ai_result = self.ai.process(message, context, history)
+            if ai_result is not None:
+                self._store(cache_key, ai_result)
+                return self.ai.name, ai_result
+
+        # 4. Provider is failing (circuit open): answer locally instead of waiting on it
+        print("⚡ Hugging Face unavailable, using Local fallback")
+        return 'fallback', self.local.fallback(message, context)
+
+    async def aprocess(self, message: str, context: dict, user=None, history=None) -> dict:
+        """Async variant of process(); the Hugging Face call doesn't block a thread."""
+        user = user or self.user
+        started = time.monotonic()
+        service, result = await self._aroute(message, context, user, history)
+        self._record_usage(user, service, message, result, started)
+        return dict(result, _service=service)
+
+    async def _aroute(self, message, context, user, history):
+        local_result = await self._aprocess_local(message, context, user)
+        if local_result is not None:
+            await self._acheck_rate_limit('local', user)
+            return 'local', local_result
+
+        cache_key, cached = await self._alookup(self.ai.name, user, message, history)
+        if cached is not None:
+            return 'cache', cached
+
+        if self.ai.is_available():
+            await self._acheck_rate_limit(self.ai.name, user)
+            ai_result = await self.ai.aprocess(message, context, history)
+            if ai_result is not None:
+                self._store(cache_key, ai_result)
+                return self.ai.name, ai_result
+
+        return 'fallback', self.local.fallback(message, context)
+
+    async def astream(self, message: str, context: dict, user=None, history=None):
+        """
+        Streaming variant of process(), yielding (event, data) pairs.
+        Final payloads carry '_service' like process() results.
+        Local answers, cached answers and the fallback are sent whole as one
+        'message' event; Hugging Face answers arrive as 'token' events
+        followed by 'done'.
+        """
+        user = user or self.user
+        started = time.monotonic()
+
+        local_result = await self._aprocess_local(message, context, user)
+        if local_result is not None:
+            await self._acheck_rate_limit('local', user)
+            self._record_usage(user, 'local', message, local_result, started)
+            yield 'message', dict(local_result, _service='local')
+            return
+
+        cache_key, cached = await self._alookup(self.ai.name, user, message, history)
+        if cached is not None:
+            self._record_usage(user, 'cache', message, cached, started)
+            yield 'message', dict(cached, _service='cache')
+            return
+
+        if self.ai.is_available():
+            await self._acheck_rate_limit(self.ai.name, user)
+            streamed = False
+            async for event, data in self.ai.astream(message, context, history):
+                streamed = True
+                if event == 'done':
+                    self._store(cache_key, data)
+                if event in ('done', 'error'):
+                    self._record_usage(user, self.ai.name, message, data, started)
+                    data = dict(data, _service=self.ai.name)
+                yield event, data
+            if streamed:
+                return
+
+        result = self.local.fallback(message, context)
+        self._record_usage(user, 'fallback', message, result, started)
+        yield 'message', dict(result, _service='fallback')
+
+    def get_status(self) -> dict:
+        """Health of the routing services, reported by AIStatusView."""
+        generator = self.ai.get_status()
+        return {
+            'status': 'degraded' if generator.get('circuit') == 'open' else 'ok',
+            'services': {
+                'local': {'status': 'ok'},
+                self.ai.name: generator,
+            },
+            'response_cache': self.cache.stats(),
+        }
+
+    # === RATE LIMITS ===
+
+    def _check_rate_limit(self, service, user):
+        """Raises ai.ratelimit.RateLimited when the user is over the service's limit."""
+        if user is not None:
+            self.rate_limiter.hit(service, user.pk)
+
+    async def _acheck_rate_limit(self, service, user):
+        if user is not None:
+            await self.rate_limiter.ahit(service, user.pk)
+
+    # === USAGE LOG ===
+
+    def _record_usage(self, user, service, message, result, started):
+        if user is None:
+            return
+        failed = result.get('type') == 'error'
+        self.usage.record(
+            user_id=user.pk,
+            service=service,
+            request_message=message,
+            response=result.get('response', ''),
+            response_time_ms=int((time.monotonic() - started) * 1000),
+            success=not failed,
+            error_message=result.get('response') if failed else None,
+        )
+
+    # === RESPONSE CACHE ===
+
+    def _process_local(self, message, context, user):
+        cache_key, cached = self._lookup('local', user, message)
+        if cached is not None:
+            return cached
+
+        result = self.local.process(message, context)
+        if result is not None:
+            self._store(cache_key, result)
+        return result
+
+    async def _aprocess_local(self, message, context, user):
+        cache_key, cached = await self._alookup('local', user, message)
+        if cached is not None:
+            return cached
+
+        result = self.local.process(message, context)
+        if result is not None:
+            self._store(cache_key, result)
+        return result
+
+    def _lookup(self, service, user, message, history=None):
+        """(key, cached answer or None); key is None when caching doesn't apply."""
+        if user is None or not self.cache.enabled_for(service):
+            return None, None
+        key = self.cache.key(service, user, message, self._cache_history(message, history))
+        return key, self.cache.get(key)
+
+    async def _alookup(self, service, user, message, history=None):
+        # The entries are in process memory; only the data version is read from the shared cache
+        if user is None or not self.cache.enabled_for(service):
+            return None, None
+        key = await self.cache.akey(service, user, message, self._cache_history(message, history))
+        return key, self.cache.get(key)
+
+    def _cache_history(self, message, history):
+        """
+        The history an answer is cached under. A standalone question gets the
+        same answer whatever was said before, so it shares one entry across
+        the conversation; only follow-ups ("why is that?") are keyed on the
+        history, and not at all for generators that never read it.
+        """
+        if not self.ai.uses_history or not is_follow_up(message):
+            return None
+        return history
+
+    def _store(self, key, result):
+        # Errors are transient; never replay them
+        if key is not None and result.get('type') != 'error':
+            self.cache.set(key, result)
@@ -0,0 +1,100 @@
+# ai/services/context_builder.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q, Sum
+from django.utils import timezone
+
+from categories.models import Category
+from reports.models import MonthlyRollup
+from settings_app.models import UserSetting
+from transactions.models import Transaction
+from transactions.versioning import get_data_version
+
+
+class ContextBuilder:
+    """
+    Builds the financial context the assistant prompts consume
+    (ai.prompts.build_system_prompt, HuggingFaceService._build_system_prompt,
+    LocalService) from the database instead of trusting the client.
+
+    Uses a fixed number of queries regardless of history size (totals come
+    from the monthly rollups) and caches the result per user, keyed on the
+    user's data version so any write invalidates it. Without a shared cache
+    (settings.SHARED_CACHE) another process's version bump would go unseen,
+    so the context is always built.
+    """
+
+    CACHE_KEY = 'ai:context:{user_id}:{version}'
+    CACHE_TIMEOUT = 60 * 60
+    RECENT_TRANSACTIONS = 10
+
+    def get(self, user):
+        if not getattr(settings, 'SHARED_CACHE', False):
+            context = self.build(user)
+        else:
+            key = self.CACHE_KEY.format(user_id=user.pk, version=get_data_version(user.pk))
+            context = cache.get(key)
+            if context is None:
+                context = self.build(user)
+                cache.set(key, context, self.CACHE_TIMEOUT)
+
+        # Copy so callers can add request-specific keys safely
+        return dict(context, user_name=user.first_name or user.username)
+
+    def build(self, user):
+        currency = UserSetting.objects.filter(user=user).values_list('currency', flat=True).first() or 'USD'
+
+        # Totals are labelled with one currency, so only that currency counts
+        rollups = MonthlyRollup.objects.filter(user=user, currency=currency)
+        totals = rollups.aggregate(
+            income=Sum('total', filter=Q(type='income')),
+            expense=Sum('total', filter=Q(type='expense')),
+        )
+        total_income = float(totals['income'] or 0)
+        total_expense = float(totals['expense'] or 0)
+
+        biggest = rollups.filter(type='expense', count__gt=0).values(
+            'category__name'
+        ).annotate(total=Sum('total')).order_by('-total').first()
+
+        first_date = Transaction.objects.for_user(user).filter(
+            currency=currency
+        ).aggregate(first=Min('date'))['first']
+
+        categories = list(Category.objects.filter(user=user).values('id', 'name', 'type'))
+
+        recent = Transaction.objects.for_user(user).with_category().order_by(
+            '-date', '-created_at', '-id'
+        )[:self.RECENT_TRANSACTIONS]
+
+        return {
+            'currency': currency,
+            'total_balance': total_income - total_expense,
+            'total_income': total_income,
+            'total_expense': total_expense,
+            'categories': categories,
+            'recent_transactions': [
+                {
+                    'id': t.id,
+                    'date': t.date.isoformat(),
+                    'type': t.type,
+                    'amount': float(t.amount),
+                    'currency': t.currency,
+                    'category': t.category.name,
+                    'description': t.description,
+                }
+                for t in recent
+            ],
+            'reports': self._averages(total_income, total_expense, first_date, biggest),
+        }
+
+    def _averages(self, total_income, total_expense, first_date, biggest):
+        days = max((timezone.localdate() - first_date).days + 1, 1) if first_date else 1
+        return {
+            'monthly_average': total_expense / max(days / 30.44, 1),
+            'weekly_average': total_expense / max(days / 7, 1),
+            'daily_average': total_expense / days,
+            'savings_rate': (total_income - total_expense) / total_income * 100 if total_income else 0,
+            'biggest_category': biggest['category__name'] if biggest else 'N/A',
+        }
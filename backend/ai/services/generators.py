@@ -0,0 +1,171 @@
+# ai/services/generators.py
+
+import re
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .http_client import CallStats
+
+DEFAULT_GENERATOR_BACKEND = 'ai.services.huggingface_service.HuggingFaceService'
+
+
+class TextGenerator:
+    """
+    Interface AIManager uses for questions LocalService doesn't handle.
+    Select the implementation with settings.AI_GENERATOR_BACKEND (dotted path).
+
+    process()/aprocess() return {'response', 'type'} or None when the backend
+    refuses the call (e.g. circuit open); astream() yields ('token', {'text'})
+    events followed by one 'done' or 'error' event.
+    """
+
+    # Service name used for caching, rate limits and the usage log
+    name = 'generator'
+    # Whether answers depend on the conversation history (and so must be cached per history)
+    uses_history = True
+
+    def is_available(self):
+        return True
+
+    def process(self, message, context, history=None):
+        raise NotImplementedError
+
+    async def aprocess(self, message, context, history=None):
+        return self.process(message, context, history)
+
+    async def astream(self, message, context, history=None):
+        result = await self.aprocess(message, context, history)
+        if result is None:
+            return
+        yield ('error' if result['type'] == 'error' else 'done'), result
+
+    def get_status(self):
+        return {'backend': self.name}
+
+
+def get_generator():
+    path = getattr(settings, 'AI_GENERATOR_BACKEND', DEFAULT_GENERATOR_BACKEND)
+    return import_string(path)()
+
+
+class TemplateGenerator(TextGenerator):
+    """
+    Offline, CPU-only backend: deterministic answers assembled from templates
+    and the user's financial context. No network, no model weights, so it
+    answers in microseconds and never goes down; the trade-off is that it
+    only knows a fixed set of topics.
+    """
+
+    name = 'template'
+    uses_history = False
+
+    TOPICS = [
+        ('greeting', r'\b(hi|hello|hey|good (morning|afternoon|evening))\b'),
+        ('thanks', r'\b(thanks|thank you|cheers)\b'),
+        ('emergency', r'\b(emergency|rainy day|safety net)\b'),
+        ('debt', r'\b(debt|loan|credit card|owe|interest)\b'),
+        ('invest', r'\b(invest\w*|stocks?|funds?|etf|retirement)\b'),
+        ('budget', r'\b(budget\w*|plan\w*|50/30/20)\b'),
+        ('save', r'\b(sav(e|es|ing|ings)|cut (back|costs?)|spend less)\b'),
+    ]
+    PATTERN = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOPICS))
+
+    def __init__(self):
+        self.stats = CallStats()
+
+    def process(self, message, context, history=None):
+        started = time.monotonic()
+        match = self.PATTERN.search(message.lower())
+        topic = match.lastgroup if match else 'default'
+        response = getattr(self, f'_{topic}')(context)
+        self.stats.record(time.monotonic() - started, ok=True)
+        return {'response': response, 'type': 'ai_chat'}
+
+    async def astream(self, message, context, history=None):
+        result = self.process(message, context, history)
+        for word in re.findall(r'\S+\s*', result['response']):
+            yield 'token', {'text': word}
+        yield 'done', result
+
+    def get_status(self):
+        return {'backend': self.name, 'configured': True, 'circuit': 'closed', **self.stats.snapshot()}
+
+    # === TEMPLATES ===
+
+    @staticmethod
+    def _numbers(context):
+        reports = context.get('reports', {})
+        return {
+            'curr': context.get('currency', 'USD'),
+            'income': context.get('total_income', 0),
+            'expense': context.get('total_expense', 0),
+            'balance': context.get('total_balance', 0),
+            'monthly': reports.get('monthly_average', 0),
+            'rate': reports.get('savings_rate', 0),
+            'biggest': reports.get('biggest_category', 'N/A'),
+        }
+
+    def _greeting(self, context):
+        n = self._numbers(context)
+        return f"👋 Hi! Your balance is {n['curr']} {n['balance']:,.2f}. Ask me about saving, budgeting or your spending."
+
+    def _thanks(self, context):
+        return "😊 You're welcome! Anything else about your finances?"
+
+    def _save(self, context):
+        n = self._numbers(context)
+        tip = (
+            f"Your biggest expense category is **{n['biggest']}**; trimming it by 10% "
+            f"frees about {n['curr']} {n['monthly'] * 0.1:,.2f} a month."
+            if n['biggest'] != 'N/A' else
+            "Track a few weeks of spending first so we can see where the money goes."
+        )
+        return (
+            f"💡 Your savings rate is **{n['rate']:.1f}%**. A common target is 20%.\n\n"
+            f"{tip}\n\nTip: automate a transfer to savings on payday. 🏦"
+        )
+
+    def _budget(self, context):
+        n = self._numbers(context)
+        # Same number of months the expense average was computed over
+        months = n['expense'] / n['monthly'] if n['monthly'] else 1
+        monthly_income = n['income'] / max(months, 1)
+        return (
+            "📋 Try the **50/30/20** rule:\n"
+            f"• Needs (50%): {n['curr']} {monthly_income * 0.5:,.2f}\n"
+            f"• Wants (30%): {n['curr']} {monthly_income * 0.3:,.2f}\n"
+            f"• Savings (20%): {n['curr']} {monthly_income * 0.2:,.2f}\n\n"
+            f"You currently spend about {n['curr']} {n['monthly']:,.2f} a month."
+        )
+
+    def _emergency(self, context):
+        n = self._numbers(context)
+        return (
+            "🛟 Aim for 3–6 months of expenses in an emergency fund: "
+            f"{n['curr']} {n['monthly'] * 3:,.2f} – {n['curr']} {n['monthly'] * 6:,.2f} "
+            "based on your average spending."
+        )
+
+    def _debt(self, context):
+        return (
+            "💳 Pay the minimum on every debt, then put anything extra on the highest-interest one "
+            "first (the avalanche method). Avoid new card balances while you pay down."
+        )
+
+    def _invest(self, context):
+        n = self._numbers(context)
+        return (
+            "📈 Build your emergency fund and clear high-interest debt first. After that, "
+            "low-cost diversified index funds are a common starting point. "
+            f"With a {n['rate']:.1f}% savings rate, invest only money you won't need for 5+ years."
+        )
+
+    def _default(self, context):
+        n = self._numbers(context)
+        return (
+            f"🤖 Here's where you stand: income {n['curr']} {n['income']:,.2f}, "
+            f"expenses {n['curr']} {n['expense']:,.2f}, balance {n['curr']} {n['balance']:,.2f}.\n\n"
+            "I can help with saving, budgeting, debt, emergency funds or investing."
+        )
@@ -0,0 +1,161 @@
+# ai/services/http_client.py
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Process-wide requests.Session with a connection pool, so chat turns
+    reuse keep-alive connections instead of paying a TLS handshake each time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=getattr(settings, 'AI_HTTP_POOL_SIZE', 20),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    Pooled httpx.AsyncClient for the running event loop (an AsyncClient
+    can't be shared across loops), used by the streaming/async views.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        connect, read = get_timeout()
+        pool_size = getattr(settings, 'AI_HTTP_POOL_SIZE', 20)
+        client = _async_clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            # Like requests' pool_maxsize: bounds idle keep-alive connections, not concurrency
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size),
+        )
+    return client
+
+
+def get_timeout():
+    """(connect, read) timeout in seconds for provider calls."""
+    return (
+        getattr(settings, 'AI_HTTP_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'AI_HTTP_READ_TIMEOUT', 30),
+    )
+
+
+def backoff_delay(attempt, base=0.5, cap=4.0):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider for a while.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open it
+    open      -> calls are refused until `reset_timeout` seconds have passed
+    half_open -> one trial call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: only one trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial that ended without an outcome (e.g. client disconnected)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class CallStats:
+    """Latency and outcome of the last `window` provider calls, for health reporting."""
+
+    def __init__(self, window=100):
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self.last_latency = None
+        self.total_calls = 0
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._outcomes.append(ok)
+            self.last_latency = latency
+            self.total_calls += 1
+
+    def snapshot(self):
+        with self._lock:
+            window = len(self._outcomes)
+            failures = window - sum(self._outcomes)
+            return {
+                'total_calls': self.total_calls,
+                'last_latency_ms': round(self.last_latency * 1000) if self.last_latency is not None else None,
+                'error_rate': round(failures / window, 4) if window else 0.0,
+                'window': window,
+            }
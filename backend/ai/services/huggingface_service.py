@@ -1,23 +1,281 @@
 # ai/services/huggingface_service.py
 
-import requests
+import asyncio
+import json
+import time
 import logging
+
+import httpx
+import requests
 from django.conf import settings
 
+from .generators import TextGenerator
+from .http_client import CallStats, CircuitBreaker, backoff_delay, get_async_client, get_session, get_timeout
+
 logger = logging.getLogger(__name__)
 
-class HuggingFaceService:
+# Shared by every HuggingFaceService instance in the process
+breaker = CircuitBreaker(
+    failure_threshold=getattr(settings, 'AI_CIRCUIT_FAILURE_THRESHOLD', 5),
+    reset_timeout=getattr(settings, 'AI_CIRCUIT_RESET_SECONDS', 30),
+)
+stats = CallStats()
+
+
+class ModelLoading(Exception):
+    pass
+
+
+class HuggingFaceService(TextGenerator):
+    name = 'huggingface'
+
     def __init__(self):
         self.api_url = f"https://api-inference.huggingface.co/models/{settings.HUGGINGFACE_MODEL}"
         self.headers = {"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"}
+        self.breaker = breaker
+        self.stats = stats
+        self.max_retries = getattr(settings, 'AI_HTTP_MAX_RETRIES', 2)
+
+    def is_available(self):
+        """False while the circuit is open, so callers can skip the network entirely."""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def process(self, message, context, history=None):
+        """
+        Generate a response using Hugging Face.
+        Returns None when the circuit breaker refuses the call.
+        """
+
+        payload = self._build_payload(message, context, history)
+
+        if not self.breaker.allow_request():
+            return None
+
+        started = time.monotonic()
+        try:
+            result = self._post(payload)
+        except ModelLoading:
+            self._failed(started)
+            return {
+                'response': "🧠 I'm waking up... Ask me again in 20 seconds!",
+                'type': 'error'
+            }
+        except requests.Timeout:
+            self._failed(started)
+            logger.error("Hugging Face request timed out")
+            return {'response': "⏱️ The AI took too long to answer. Please try again.", 'type': 'error'}
+        except requests.HTTPError as e:
+            self._failed(started, provider_fault=self._is_provider_fault(e.response.status_code))
+            return {'response': f"Connection Error: {e.response.status_code}", 'type': 'error'}
+        except requests.RequestException as e:
+            self._failed(started, provider_fault=isinstance(e, requests.ConnectionError))
+            logger.error(f"Request Error: {str(e)}")
+            return {'response': "Network error connecting to AI.", 'type': 'error'}
+        else:
+            return self._result_response(result, started)
+        finally:
+            # After the outcome is recorded: frees a half-open trial that
+            # ended without one (a 4xx, or something unexpected was raised)
+            self.breaker.release()
+
+    async def aprocess(self, message, context, history=None):
+        """Async variant of process() over the pooled httpx client."""
+
+        payload = self._build_payload(message, context, history)
+
+        if not self.breaker.allow_request():
+            return None
+
+        started = time.monotonic()
+        try:
+            result = await self._apost(payload)
+        except ModelLoading:
+            self._failed(started)
+            return {
+                'response': "🧠 I'm waking up... Ask me again in 20 seconds!",
+                'type': 'error'
+            }
+        except httpx.TimeoutException:
+            self._failed(started)
+            logger.error("Hugging Face request timed out")
+            return {'response': "⏱️ The AI took too long to answer. Please try again.", 'type': 'error'}
+        except httpx.HTTPStatusError as e:
+            self._failed(started, provider_fault=self._is_provider_fault(e.response.status_code))
+            return {'response': f"Connection Error: {e.response.status_code}", 'type': 'error'}
+        except httpx.HTTPError as e:
+            self._failed(started, provider_fault=isinstance(e, httpx.TransportError))
+            logger.error(f"Request Error: {str(e)}")
+            return {'response': "Network error connecting to AI.", 'type': 'error'}
+        else:
+            return self._result_response(result, started)
+        finally:
+            # After the outcome is recorded; also frees a half-open trial if
+            # the request was cancelled (client went away)
+            self.breaker.release()
+
+    def _succeeded(self, started):
+        self.breaker.record_success()
+        self.stats.record(time.monotonic() - started, ok=True)
+
+    def _failed(self, started, provider_fault=True):
+        """
+        Count a failed call. Only the provider's faults (5xx, timeouts,
+        unreachable) count towards opening the circuit; a 4xx means our
+        request or credentials are wrong, which waiting won't fix.
+        """
+        if provider_fault:
+            self.breaker.record_failure()
+        self.stats.record(time.monotonic() - started, ok=False)
+
+    @staticmethod
+    def _is_provider_fault(status_code):
+        return status_code >= 500
+
+    def get_status(self):
+        return {
+            'backend': self.name,
+            'configured': bool(settings.HUGGINGFACE_API_KEY),
+            'model': settings.HUGGINGFACE_MODEL,
+            'circuit': self.breaker.state,
+            **self.stats.snapshot(),
+        }
+
+    def _result_response(self, result, started):
+        if isinstance(result, list) and len(result) > 0:
+            self._succeeded(started)
+            return {
+                'response': result[0].get('generated_text', '').strip(),
+                'type': 'ai_chat'
+            }
+
+        self._failed(started)
+        if isinstance(result, dict) and 'error' in result:
+            return {'response': f"AI Error: {result['error']}", 'type': 'error'}
+        return {'response': "AI Error: unexpected response", 'type': 'error'}
+
+    @staticmethod
+    def _is_loading(status_code, result):
+        return (
+            status_code == 503
+            and isinstance(result, dict)
+            and 'loading' in str(result.get('error', ''))
+        )
+
+    def _post(self, payload):
+        """
+        POST through the pooled session with connect/read timeouts, retrying
+        "model is loading" answers with jittered backoff.
+        Raises ModelLoading when the model is still loading after the retries.
+        """
+        session = get_session()
+        for attempt in range(self.max_retries + 1):
+            response = session.post(self.api_url, headers=self.headers, json=payload, timeout=get_timeout())
+
+            try:
+                result = response.json()
+            except ValueError:
+                result = None
+
+            if not self._is_loading(response.status_code, result):
+                if response.status_code != 200:
+                    logger.error(f"Hugging Face Error: {response.status_code} - {response.text}")
+                    response.raise_for_status()
+                return result
+
+            if attempt < self.max_retries:
+                time.sleep(backoff_delay(attempt))
+
+        raise ModelLoading()
+
+    async def _apost(self, payload):
+        """Async _post(): same retries, sleeping on the event loop instead of the thread."""
+        client = get_async_client()
+        for attempt in range(self.max_retries + 1):
+            response = await client.post(self.api_url, headers=self.headers, json=payload)
+
+            try:
+                result = response.json()
+            except ValueError:
+                result = None
+
+            if not self._is_loading(response.status_code, result):
+                if response.status_code != 200:
+                    logger.error(f"Hugging Face Error: {response.status_code} - {response.text}")
+                    response.raise_for_status()
+                return result
 
-    def process(self, message, context):
-        """Generate a response using Hugging Face"""
+            if attempt < self.max_retries:
+                await asyncio.sleep(backoff_delay(attempt))
 
+        raise ModelLoading()
+
+    async def astream(self, message, context, history=None):
+        """
+        Stream the generation as (event, data) pairs: 'token' events while
+        text arrives, then 'done' with the full answer, or a single 'error'.
+        Yields nothing when the circuit breaker refuses the call.
+        """
+        if not self.breaker.allow_request():
+            return
+
+        payload = self._build_payload(message, context, history, stream=True)
+        try:
+            async for event in self._astream(payload):
+                yield event
+        finally:
+            self.breaker.release()
+
+    async def _astream(self, payload):
+        parts = []
+        started = time.monotonic()
+        try:
+            async with get_async_client().stream(
+                'POST', self.api_url, headers=self.headers, json=payload
+            ) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode(errors='replace')
+                    self._failed(started, provider_fault=self._is_provider_fault(response.status_code))
+                    logger.error(f"Hugging Face Error: {response.status_code} - {body}")
+                    if response.status_code == 503 and 'loading' in body:
+                        yield 'error', {'response': "🧠 I'm waking up... Ask me again in 20 seconds!", 'type': 'error'}
+                    else:
+                        yield 'error', {'response': f"Connection Error: {response.status_code}", 'type': 'error'}
+                    return
+
+                # Text-generation streams are SSE lines: data: {"token": {"text": ...}, ...}
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    token = json.loads(line[5:]).get('token') or {}
+                    if token.get('special') or not token.get('text'):
+                        continue
+                    parts.append(token['text'])
+                    yield 'token', {'text': token['text']}
+        except httpx.TimeoutException:
+            self._failed(started)
+            logger.error("Hugging Face stream timed out")
+            yield 'error', {'response': "⏱️ The AI took too long to answer. Please try again.", 'type': 'error'}
+            return
+        except (httpx.HTTPError, ValueError) as e:
+            self._failed(started, provider_fault=isinstance(e, httpx.TransportError))
+            logger.error(f"Stream Error: {str(e)}")
+            yield 'error', {'response': "Network error connecting to AI.", 'type': 'error'}
+            return
+
+        self._succeeded(started)
+        yield 'done', {'response': ''.join(parts).strip(), 'type': 'ai_chat'}
+
+    def _build_payload(self, message, context, history=None, stream=False):
+        history = history or {}
         system_prompt = self._build_system_prompt(context)
+        if history.get('summary'):
+            system_prompt += f"\nEARLIER IN THIS CONVERSATION:\n{history['summary']}\n"
 
         # Format for Zephyr/Mistral: <|system|>...<|user|>...<|assistant|>
-        full_prompt = f"<|system|>\n{system_prompt}</s>\n<|user|>\n{message}</s>\n<|assistant|>\n"
+        turns = ''.join(
+            f"<|{m['role']}|>\n{m['content']}</s>\n" for m in history.get('messages', [])
+        )
+        full_prompt = f"<|system|>\n{system_prompt}</s>\n{turns}<|user|>\n{message}</s>\n<|assistant|>\n"
 
         payload = {
             "inputs": full_prompt,
@@ -27,32 +285,9 @@ class HuggingFaceService:
                 "return_full_text": False
             }
         }
-
-        try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-
-            if response.status_code == 200:
-                result = response.json()
-
-                if isinstance(result, list) and len(result) > 0:
-                    return {
-                        'response': result[0].get('generated_text', '').strip(),
-                        'type': 'ai_chat'
-                    }
-                elif isinstance(result, dict) and 'error' in result:
-                    if 'loading' in str(result['error']):
-                        return {
-                            'response': "🧠 I'm waking up... Ask me again in 20 seconds!",
-                            'type': 'error'
-                        }
-                    return {'response': f"AI Error: {result['error']}", 'type': 'error'}
-
-            logger.error(f"Hugging Face Error: {response.status_code} - {response.text}")
-            return {'response': f"Connection Error: {response.status_code}", 'type': 'error'}
-
-        except Exception as e:
-            logger.error(f"Request Error: {str(e)}")
-            return {'response': "Network error connecting to AI.", 'type': 'error'}
+        if stream:
+            payload["stream"] = True
+        return payload
 
     def _build_system_prompt(self, context):
         curr = context.get('currency', 'USD')
@@ -0,0 +1,105 @@
+# ai/services/intents.py
+
+import re
+from collections import namedtuple
+
+Intent = namedtuple('Intent', 'name confidence')
+
+NO_INTENT = Intent(None, 0.0)
+
+# Intents in tie-break order
+ADD_TRANSACTION = 'add_transaction'
+BALANCE = 'balance'
+INCOME = 'income'
+EXPENSE = 'expense'
+REPORT = 'report'
+RECENT_TRANSACTIONS = 'recent_transactions'
+
+INTENT_ORDER = [ADD_TRANSACTION, BALANCE, INCOME, EXPENSE, REPORT, RECENT_TRANSACTIONS]
+
+# keyword -> {intent: weight}. Keywords match whole words only, so
+# "address" no longer triggers "add".
+KEYWORDS = {
+    'add': {ADD_TRANSACTION: 1.0},
+    'added': {ADD_TRANSACTION: 1.0},
+    'paid': {ADD_TRANSACTION: 0.8},
+    'bought': {ADD_TRANSACTION: 0.8},
+    'spent': {ADD_TRANSACTION: 0.4, EXPENSE: 0.6},
+
+    'balance': {BALANCE: 1.0},
+
+    'income': {INCOME: 1.0},
+    'incomes': {INCOME: 1.0},
+    'earned': {INCOME: 0.8},
+    'earnings': {INCOME: 0.8},
+
+    'expense': {EXPENSE: 1.0},
+    'expenses': {EXPENSE: 1.0},
+    'spending': {EXPENSE: 1.0},
+    'spend': {EXPENSE: 0.8},
+
+    'report': {REPORT: 1.0},
+    'summary': {REPORT: 1.0},
+    'overview': {REPORT: 0.8},
+
+    'transaction': {RECENT_TRANSACTIONS: 1.0},
+    'transactions': {RECENT_TRANSACTIONS: 1.0},
+    'recent': {RECENT_TRANSACTIONS: 0.6},
+    'history': {RECENT_TRANSACTIONS: 0.6},
+}
+
+# A message that mentions an amount is much more likely to be a new transaction
+AMOUNT_BONUS = 1.0
+
+MIN_CONFIDENCE = 0.5
+
+# One alternation, longest keywords first so "expenses" wins over "expense"
+KEYWORD_PATTERN = re.compile(
+    r'\b(' + '|'.join(sorted(map(re.escape, KEYWORDS), key=len, reverse=True)) + r')\b'
+)
+AMOUNT_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def classify(message):
+    """
+    Score every intent in one regex pass over the message.
+
+    Returns Intent(name, confidence) where confidence is the winning
+    intent's share of the total score, or NO_INTENT when nothing matched
+    or the winner is below MIN_CONFIDENCE.
+    """
+    scores = dict.fromkeys(INTENT_ORDER, 0.0)
+    for keyword in KEYWORD_PATTERN.findall(message.lower()):
+        for intent, weight in KEYWORDS[keyword].items():
+            scores[intent] += weight
+
+    if scores[ADD_TRANSACTION] and AMOUNT_PATTERN.search(message):
+        scores[ADD_TRANSACTION] += AMOUNT_BONUS
+
+    # "income vs expenses" is a comparison: the summary shows both
+    if scores[INCOME] and scores[EXPENSE] and not scores[ADD_TRANSACTION]:
+        scores[REPORT] += scores[INCOME] + scores[EXPENSE]
+
+    total = sum(scores.values())
+    if not total:
+        return NO_INTENT
+
+    name = max(INTENT_ORDER, key=lambda intent: scores[intent])
+    confidence = scores[name] / total
+    if confidence < MIN_CONFIDENCE:
+        return NO_INTENT
+    return Intent(name, round(confidence, 2))
+
+
+# Words that refer back to earlier turns ("why is that?", "what about last
+# month?", "and for food?"). Without one, a question stands on its own.
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|that|this|these|those|they|them|then|else|also|again|"
+    r"instead|same|previous|earlier|above|you said|what about|how about)\b"
+    r"|^\s*(and|but|so|or|why)\b"
+)
+
+
+def is_follow_up(message):
+    """True when the message may only make sense with the earlier turns."""
+    return bool(FOLLOW_UP_PATTERN.search(message.lower()))
@@ -4,36 +4,53 @@ import re
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from .intents import (
+    ADD_TRANSACTION, BALANCE, EXPENSE, INCOME, RECENT_TRANSACTIONS, REPORT, classify,
+)
+
 class LocalService:
     """Enhanced local processing for precise actions"""
 
     def process(self, message: str, context: dict) -> dict:
         msg = message.lower().strip()
 
+        # Precompiled single-pass intent match (see ai/services/intents.py)
+        intent = classify(msg)
+
         # === 1. ACTION: ADD TRANSACTION ===
-        # Priority: Check this first so "add" is always caught locally
-        if any(word in msg for word in ['add', 'spent', 'paid', 'bought']):
+        if intent.name == ADD_TRANSACTION:
             return self._add_transaction(msg, context)
 
         # === 2. ACTION: GET SPECIFIC INFO ===
-        # Keywords that imply a database lookup
-        if any(word in msg for word in ['balance', 'income', 'expense', 'spending', 'transactions', 'report', 'summary']):
-
-            if 'balance' in msg:
-                return self._balance_query(context)
-            elif 'income' in msg:
-                return self._income_query(context)
-            elif 'expense' in msg or 'spending' in msg:
-                return self._expense_query(msg, context)
-            elif any(word in msg for word in ['report', 'summary']):
-                return self._financial_report(context)
-            elif any(word in msg for word in ['transaction', 'list', 'recent']):
-                return self._get_recent_transactions(context)
+        if intent.name == BALANCE:
+            return self._balance_query(context)
+        elif intent.name == INCOME:
+            return self._income_query(context)
+        elif intent.name == EXPENSE:
+            return self._expense_query(msg, context)
+        elif intent.name == REPORT:
+            return self._financial_report(context)
+        elif intent.name == RECENT_TRANSACTIONS:
+            return self._get_recent_transactions(context)
 
         # === 3. FALLBACK ===
         # If no specific local action is detected, return None so AI Manager uses Hugging Face
         return None
 
+    def fallback(self, message: str, context: dict) -> dict:
+        """Generic answer used when the AI provider is unavailable"""
+        curr = context.get('currency', 'USD')
+        bal = context.get('total_balance', 0)
+        return {
+            'response': (
+                "🤖 My smart assistant is taking a short break, but I can still help!\n\n"
+                f"💰 Your balance is **{curr} {bal:,.2f}**.\n"
+                "Try asking about your *balance*, *income*, *expenses* or a *summary*, "
+                "or say 'Add 50 for lunch'."
+            ),
+            'type': 'informational'
+        }
+
     # === CORE METHODS ===
 
     def _add_transaction(self, message: str, context: dict) -> dict:
@@ -0,0 +1,29 @@
+# ai/services/registry.py
+
+import threading
+
+from .ai_manager import AIManager
+
+_manager = None
+_lock = threading.Lock()
+
+
+def get_ai_manager():
+    """
+    The process-wide AIManager, built on first use. Its services, pooled
+    HTTP connections, compiled intent patterns and response cache are reused
+    by every request instead of being rebuilt per view instance.
+    """
+    global _manager
+    if _manager is None:
+        with _lock:
+            if _manager is None:
+                _manager = AIManager()
+    return _manager
+
+
+def reset_ai_manager():
+    """Drop the shared instance (e.g. after changing AI settings in a shell)."""
+    global _manager
+    with _lock:
+        _manager = None
@@ -0,0 +1,114 @@
+# ai/services/response_cache.py
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from transactions.versioning import aget_data_version, get_data_version
+
+DEFAULT_SETTINGS = {
+    'MAX_ENTRIES': 1000,
+    'TTL': 300,
+    # Local answers are cheap to recompute, so only provider answers are cached by default
+    'SERVICES': {'local': False, 'huggingface': True},
+}
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+
+def normalize_message(message):
+    """'  What's my BALANCE?? ' and "whats my balance" share a cache entry."""
+    return ' '.join(_PUNCTUATION.sub('', message.lower()).split())
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with a TTL for assistant answers.
+
+    Keys include the user's data version (transactions.versioning), so an
+    answer is never served after the data it was based on has changed.
+    Off without a shared cache (settings.SHARED_CACHE): the version would be
+    per process, and a write handled by another worker would go unseen.
+    """
+
+    def __init__(self, max_entries=1000, ttl=300, services=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.services = services or {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULT_SETTINGS, **getattr(settings, 'AI_RESPONSE_CACHE', {})}
+        return cls(
+            max_entries=config['MAX_ENTRIES'],
+            ttl=config['TTL'],
+            services={**DEFAULT_SETTINGS['SERVICES'], **config['SERVICES']},
+        )
+
+    def enabled_for(self, service):
+        return (
+            self.max_entries > 0
+            and self.services.get(service, False)
+            and getattr(settings, 'SHARED_CACHE', False)
+        )
+
+    def key(self, service, user, message, history=None, version=None):
+        # History the answer depends on (AIManager passes none for standalone questions)
+        if history and (history.get('summary') or history.get('messages')):
+            history_digest = hashlib.sha1(json.dumps(history, sort_keys=True).encode()).hexdigest()
+        else:
+            history_digest = ''
+        if version is None:
+            version = get_data_version(user.pk)
+        return (service, user.pk, version, normalize_message(message), history_digest)
+
+    async def akey(self, service, user, message, history=None):
+        """key() for async callers: the data version is read with the async cache API."""
+        return self.key(service, user, message, history, version=await aget_data_version(user.pk))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Shared by every AIManager in the process
+response_cache = ResponseCache.from_settings()
@@ -1,3 +1,777 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import decimal
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.db import DatabaseError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from categories.models import Category
+from settings_app.models import UserSetting
+from transactions.models import Transaction
+from .ratelimit import RateLimited, SlidingWindowRateLimiter
+from .services.ai_manager import AIManager
+from .services.context_builder import ContextBuilder
+from .services.generators import DEFAULT_GENERATOR_BACKEND, TemplateGenerator, get_generator
+from .services.http_client import CallStats, CircuitBreaker
+from .services.intents import classify
+from .services.registry import get_ai_manager, reset_ai_manager
+from .services.huggingface_service import HuggingFaceService
+from .services.response_cache import ResponseCache
+from .usage import UsageRecorder
+
+User = get_user_model()
+
+
+class ContextBuilderTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='context@example.com', username='context', password='x')
+        UserSetting.objects.create(user=self.user, currency='EUR')
+        self.salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        self.rent = Category.objects.create(user=self.user, name='Rent', type='expense')
+        self.travel = Category.objects.create(user=self.user, name='Travel', type='expense')
+
+    def add(self, category, amount, currency):
+        Transaction.objects.create(
+            user=self.user,
+            category=category,
+            type=category.type,
+            amount=decimal.Decimal(amount),
+            date=datetime.date(2025, 1, 1),
+            currency=currency,
+        )
+
+    def test_totals_only_count_the_settings_currency(self):
+        self.add(self.salary, '3000', 'EUR')
+        self.add(self.rent, '1000', 'EUR')
+        self.add(self.salary, '500000', 'JPY')
+        self.add(self.travel, '90000', 'JPY')
+
+        context = ContextBuilder().build(self.user)
+
+        self.assertEqual(context['currency'], 'EUR')
+        self.assertEqual(context['total_income'], 3000)
+        self.assertEqual(context['total_expense'], 1000)
+        self.assertEqual(context['total_balance'], 2000)
+        self.assertEqual(context['reports']['biggest_category'], 'Rent')
+
+    def test_cached_per_data_version_with_a_shared_cache(self):
+        cache.clear()
+        self.add(self.salary, '100', 'EUR')
+        builder = ContextBuilder()
+
+        with override_settings(SHARED_CACHE=True), mock.patch.object(builder, 'build', wraps=builder.build) as build:
+            self.assertEqual(builder.get(self.user)['total_income'], 100)
+            self.assertEqual(builder.get(self.user)['total_income'], 100)
+            self.assertEqual(build.call_count, 1)
+            self.add(self.salary, '50', 'EUR')
+            self.assertEqual(builder.get(self.user)['total_income'], 150)
+            self.assertEqual(build.call_count, 2)
+
+    @override_settings(SHARED_CACHE=False)
+    @mock.patch('ai.services.context_builder.cache')
+    def test_built_every_time_without_a_shared_cache(self, context_cache):
+        builder = ContextBuilder()
+
+        with mock.patch.object(builder, 'build', wraps=builder.build) as build:
+            builder.get(self.user)
+            builder.get(self.user)
+
+        self.assertEqual(build.call_count, 2)
+        self.assertEqual(context_cache.mock_calls, [])
+
+
+class AIManagerRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        reset_ai_manager()
+        self.addCleanup(reset_ai_manager)
+
+    def test_one_manager_per_process(self):
+        manager = get_ai_manager()
+
+        self.assertIs(get_ai_manager(), manager)
+        reset_ai_manager()
+        self.assertIsNot(get_ai_manager(), manager)
+
+    def test_concurrent_first_use_builds_one_manager(self):
+        def slow_manager():
+            time.sleep(0.05)
+            return object()
+
+        with mock.patch('ai.services.registry.AIManager', side_effect=slow_manager) as build:
+            managers = []
+            threads = [threading.Thread(target=lambda: managers.append(get_ai_manager())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(len({id(manager) for manager in managers}), 1)
+
+
+class GeneratorSelectionTests(SimpleTestCase):
+
+    @override_settings(AI_GENERATOR_BACKEND='ai.services.generators.TemplateGenerator')
+    def test_backend_from_settings(self):
+        self.assertIsInstance(get_generator(), TemplateGenerator)
+        self.assertIsInstance(AIManager().ai, TemplateGenerator)
+
+    @override_settings()
+    def test_hugging_face_by_default(self):
+        del settings.AI_GENERATOR_BACKEND
+        self.assertEqual(DEFAULT_GENERATOR_BACKEND, 'ai.services.huggingface_service.HuggingFaceService')
+        self.assertIsInstance(get_generator(), HuggingFaceService)
+
+    @override_settings(AI_GENERATOR_BACKEND='ai.services.generators.MissingGenerator')
+    def test_unknown_backend_fails_loudly(self):
+        with self.assertRaises(ImportError):
+            get_generator()
+
+
+class TemplateGeneratorTests(SimpleTestCase):
+
+    CONTEXT = {
+        'currency': 'EUR',
+        'total_income': 4000.0,
+        'total_expense': 2500.0,
+        'total_balance': 1500.0,
+        'reports': {'monthly_average': 1250.0, 'savings_rate': 37.5, 'biggest_category': 'Rent'},
+    }
+    # One message per topic, plus one no topic matches
+    MESSAGES = [
+        "Hello!", "Thanks a lot", "How big should my emergency fund be?", "How do I pay off my loan?",
+        "Should I invest in an ETF?", "Help me budget", "How can I save more?", "What's the weather?",
+    ]
+
+    def setUp(self):
+        self.generator = TemplateGenerator()
+
+    def test_process_contract(self):
+        answers = set()
+        for message in self.MESSAGES:
+            with self.subTest(message=message):
+                result = self.generator.process(message, self.CONTEXT)
+                self.assertEqual(set(result), {'response', 'type'})
+                self.assertEqual(result['type'], 'ai_chat')
+                self.assertTrue(result['response'].strip())
+                answers.add(result['response'])
+
+        self.assertEqual(len(answers), len(self.MESSAGES))
+        # No context at all (a brand-new user) still gets an answer
+        self.assertEqual(self.generator.process("How can I save more?", {})['type'], 'ai_chat')
+
+    def test_astream_yields_tokens_then_done(self):
+        async def collect():
+            return [event async for event in self.generator.astream("Help me budget", self.CONTEXT)]
+
+        events = asyncio.run(collect())
+
+        self.assertEqual([event for event, _ in events[:-1]], ['token'] * (len(events) - 1))
+        self.assertGreater(len(events), 2)
+        self.assertEqual(events[-1], ('done', self.generator.process("Help me budget", self.CONTEXT)))
+        self.assertEqual(''.join(data['text'] for _, data in events[:-1]), events[-1][1]['response'])
+
+    def test_answers_do_not_depend_on_history(self):
+        self.assertFalse(self.generator.uses_history)
+        self.assertTrue(self.generator.is_available())
+        history = {'summary': 'We talked about rent.', 'messages': [{'role': 'user', 'content': 'Hi'}]}
+        self.assertEqual(
+            self.generator.process("How can I save more?", self.CONTEXT, history),
+            self.generator.process("How can I save more?", self.CONTEXT),
+        )
+
+
+class IntentClassifierTests(SimpleTestCase):
+
+    # (message, expected intent); None means LocalService leaves it to the generator
+    CASES = [
+        ("Add 50 for lunch", 'add_transaction'),
+        ("I paid 12.50 for parking", 'add_transaction'),
+        ("Added a coffee", 'add_transaction'),
+        ("Spent 20 on coffee", 'add_transaction'),
+        ("Where have I spent on coffee?", 'expense'),
+        ("What is my balance?", 'balance'),
+        ("How much income did I get?", 'income'),
+        ("What are my earnings this year", 'income'),
+        ("How much did I spend on food?", 'expense'),
+        ("Show my EXPENSES", 'expense'),
+        ("Income vs expenses", 'report'),
+        ("Give me a summary", 'report'),
+        ("Show recent transactions", 'recent_transactions'),
+        ("Transaction history", 'recent_transactions'),
+        # Whole words only
+        ("Change my address", None),
+        ("Hello there", None),
+        # No intent gets half the score
+        ("Balance, income and expenses", None),
+    ]
+
+    def test_labeled_messages(self):
+        for message, expected in self.CASES:
+            with self.subTest(message=message):
+                intent = classify(message)
+                self.assertEqual(intent.name, expected)
+                if expected is None:
+                    self.assertEqual(intent.confidence, 0.0)
+                else:
+                    self.assertGreaterEqual(intent.confidence, 0.5)
+
+
+@override_settings(AI_GENERATOR_BACKEND='ai.services.generators.TemplateGenerator', SHARED_CACHE=True)
+class AIManagerAsyncTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()  # Rate limit windows
+        self.user = User(pk=1)
+        self.manager = AIManager()
+        self.manager.cache = ResponseCache(services={'template': True})
+        self.manager.rate_limiter = SlidingWindowRateLimiter({'template': ['1/min'], 'local': ['5/min']})
+        self.manager.usage = mock.Mock()
+
+    @mock.patch('ai.services.response_cache.get_data_version', side_effect=AssertionError("sync cache read"))
+    @mock.patch.object(SlidingWindowRateLimiter, 'hit', side_effect=AssertionError("sync cache read"))
+    def test_async_routing_uses_the_async_cache_api(self, *_):
+        async def run():
+            local = await self.manager.aprocess("What's my balance?", {'total_balance': 10}, user=self.user)
+            answered = await self.manager.aprocess("Hello there", {}, user=self.user)
+            cached = await self.manager.aprocess("hello there!", {}, user=self.user)
+            with self.assertRaises(RateLimited):
+                await self.manager.aprocess("Any tips on debt?", {}, user=self.user)
+            streamed = [event async for event in self.manager.astream("Hello there", {}, user=self.user)]
+            return local, answered, cached, streamed
+
+        local, answered, cached, streamed = asyncio.run(run())
+        self.assertEqual(local['_service'], 'local')
+        self.assertEqual(answered['_service'], 'template')
+        self.assertEqual(cached['_service'], 'cache')
+        self.assertEqual(streamed, [('message', dict(answered, _service='cache'))])
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    # Start of a fixed one-minute window
+    START = 60 * 1_000_000
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowRateLimiter({'template': ['3/min']})
+
+    def clock(self, seconds):
+        """The limiter's clock set `seconds` after START (the cache keeps real time)."""
+        return mock.patch('ai.ratelimit.time', mock.Mock(time=mock.Mock(return_value=self.START + seconds)))
+
+    def hit_at(self, seconds, count=1):
+        """Hits `seconds` after START; returns how many were allowed."""
+        allowed = 0
+        with self.clock(seconds):
+            for _ in range(count):
+                try:
+                    self.limiter.hit('template', 1)
+                    allowed += 1
+                except RateLimited as e:
+                    self.retry_after = e.retry_after
+        return allowed
+
+    def test_limit_within_a_window(self):
+        self.assertEqual(self.hit_at(10, 5), 3)
+        self.assertEqual(self.retry_after, 50)
+        # Rejected requests aren't counted
+        self.assertEqual(cache.get(f'ai-rate:template:1:60:{self.START // 60}'), 3)
+        # Other users and services have their own counters
+        self.limiter.hit('template', 2)
+        self.limiter.hit('local', 1)
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        self.hit_at(50, 3)
+
+        # Half of the previous window still overlaps: 3 * 0.5 + 2 >= 3
+        self.assertEqual(self.hit_at(90, 5), 2)
+        retry_after = self.retry_after
+        self.assertEqual(self.hit_at(90 + retry_after - 1), 0)
+        self.assertEqual(self.hit_at(90 + retry_after), 1)
+        # Once the previous window no longer overlaps, only the current one counts
+        self.assertEqual(self.hit_at(185, 5), 3)
+
+    def test_concurrent_hits_never_exceed_the_limit(self):
+        threads = 12
+        # Every request reads the counters before any of them counts itself
+        barrier = threading.Barrier(threads, timeout=5)
+
+        class ReadTogether:
+            def get_many(self, keys):
+                values = cache.get_many(keys)
+                barrier.wait()
+                return values
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+        allowed = []
+
+        def request():
+            try:
+                self.limiter.hit('template', 1)
+                allowed.append(True)
+            except RateLimited:
+                pass
+
+        with mock.patch('ai.ratelimit.cache', ReadTogether()):
+            workers = [threading.Thread(target=request) for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(len(allowed), 3)
+
+    def test_async_hits_share_the_counters(self):
+        async def hits():
+            allowed = 0
+            for _ in range(2):
+                try:
+                    await self.limiter.ahit('template', 1)
+                    allowed += 1
+                except RateLimited:
+                    pass
+            return allowed
+
+        with self.clock(10):
+            self.assertEqual(asyncio.run(hits()), 2)
+        self.assertEqual(self.hit_at(10, 3), 1)
+
+
+class RateLimitedEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='limits@example.com', username='limits', password='x')
+        self.manager = AIManager()
+        self.manager.ai = TemplateGenerator()
+        self.manager.cache = ResponseCache()
+        self.manager.rate_limiter = SlidingWindowRateLimiter({'template': ['1/min']})
+        self.manager.usage = mock.Mock()
+        patcher = mock.patch('ai.views.get_ai_manager', return_value=self.manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_over_the_limit_is_a_429(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        first = client.post(reverse('ai-assist'), {'message': 'How can I save more?'}, format='json')
+        second = client.post(reverse('ai-assist'), {'message': 'How can I save more?'}, format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second.data['service'], 'template')
+        self.assertGreaterEqual(int(second['Retry-After']), 1)
+        self.assertEqual(second['Retry-After'], str(second.data['retry_after']))
+
+    async def test_over_the_limit_is_a_429_on_the_async_views(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+        for name, expected in [('ai-assist-async', 200), ('ai-assist-async', 429), ('ai-assist-stream', 429)]:
+            response = await self.async_client.post(
+                reverse(name), {'message': 'How can I save more?'},
+                content_type='application/json', headers=headers,
+            )
+            self.assertEqual(response.status_code, expected, name)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(SHARED_CACHE=True)
+class ResponseCacheHistoryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.user = User(pk=1)
+        self.manager = AIManager()
+        # A generator that reads the history, like the Hugging Face one
+        self.manager.ai = TemplateGenerator()
+        self.manager.ai.uses_history = True
+        self.manager.cache = ResponseCache(services={'template': True})
+        self.manager.rate_limiter = SlidingWindowRateLimiter({})
+        self.manager.usage = mock.Mock()
+
+    def ask(self, message, turns):
+        history = {'summary': '', 'messages': [{'role': 'user', 'content': f"Turn {i}"} for i in range(turns)]}
+        with mock.patch('ai.services.response_cache.get_data_version', return_value=1):
+            return self.manager.process(message, {}, user=self.user, history=history)['_service']
+
+    def test_standalone_questions_hit_as_the_conversation_grows(self):
+        self.assertEqual(self.ask("How can I save more money?", 1), 'template')
+        self.assertEqual(self.ask("how can I save more money", 3), 'cache')
+
+    def test_follow_ups_are_cached_per_history(self):
+        self.assertEqual(self.ask("Why is that?", 1), 'template')
+        self.assertEqual(self.ask("Why is that?", 3), 'template')
+        self.assertEqual(self.ask("Why is that?", 3), 'cache')
+
+    def test_generators_that_ignore_history_share_entries(self):
+        self.manager.ai.uses_history = False
+        self.assertEqual(self.ask("Why is that?", 1), 'template')
+        self.assertEqual(self.ask("Why is that?", 3), 'cache')
+
+
+class ResponseCacheInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()  # Data versions
+        self.user = User.objects.create_user(email='answers@example.com', username='answers', password='x')
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.manager = AIManager()
+        self.manager.ai = TemplateGenerator()
+        self.manager.cache = ResponseCache(services={'template': True})
+        self.manager.rate_limiter = SlidingWindowRateLimiter({})
+        self.manager.usage = mock.Mock()
+
+    def ask(self):
+        return self.manager.process("How can I save more money?", {}, user=self.user)['_service']
+
+    @override_settings(SHARED_CACHE=True)
+    def test_a_write_invalidates_the_cached_answer(self):
+        self.assertEqual(self.ask(), 'template')
+        self.assertEqual(self.ask(), 'cache')
+
+        Transaction.objects.create(
+            user=self.user,
+            category=self.category,
+            type='expense',
+            amount=decimal.Decimal('12.00'),
+            date=datetime.date(2025, 1, 1),
+        )
+
+        self.assertEqual(self.ask(), 'template')
+        self.assertEqual(self.ask(), 'cache')
+
+    @override_settings(SHARED_CACHE=False)
+    def test_off_without_a_shared_cache(self):
+        self.assertEqual(self.ask(), 'template')
+        self.assertEqual(self.ask(), 'template')
+        self.assertEqual(self.manager.cache.stats()['entries'], 0)
+
+
+class UsageRecorderTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('ai.models.AIUsageLog.objects.bulk_create')
+        self.bulk_create = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recorder(self, **options):
+        recorder = UsageRecorder(**{'flush_interval': 60, **options})
+        # Runs before the patch is undone
+        self.addCleanup(recorder.shutdown)
+        return recorder
+
+    def record(self, recorder, count):
+        for i in range(count):
+            recorder.record(1, 'template', f"Question {i}", response="Answer")
+
+    def written(self):
+        """Entries passed to bulk_create(), one list per call."""
+        return [len(entries) for (entries, *_), _ in self.bulk_create.call_args_list]
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the usage recorder")
+            time.sleep(0.01)
+
+    def test_flushes_when_a_batch_is_full(self):
+        recorder = self.recorder(batch_size=3)
+
+        self.record(recorder, 3)
+        self.wait_for(lambda: self.written() == [3])
+        self.record(recorder, 2)
+        time.sleep(0.1)
+
+        # The flush interval hasn't passed: a partial batch waits
+        self.assertEqual(self.written(), [3])
+        self.assertEqual(recorder.pending(), 2)
+
+    def test_flushes_what_is_left_at_shutdown(self):
+        recorder = self.recorder(batch_size=100)
+        self.record(recorder, 2)
+
+        recorder.shutdown()
+
+        self.assertEqual(self.written(), [2])
+        self.assertEqual(recorder.pending(), 0)
+        self.assertFalse(recorder._thread.is_alive())
+
+    def test_database_error_keeps_entries_and_the_thread(self):
+        self.bulk_create.side_effect = [DatabaseError("database is down"), None]
+        recorder = self.recorder(batch_size=2)
+
+        with self.assertLogs('ai.usage', 'ERROR'):
+            self.record(recorder, 2)
+            self.wait_for(lambda: self.bulk_create.call_count == 1)
+            self.wait_for(lambda: recorder.pending() == 2)
+
+        self.assertTrue(recorder._thread.is_alive())
+        self.record(recorder, 2)
+        self.wait_for(lambda: self.bulk_create.call_count == 2)
+        self.assertEqual(self.written(), [2, 4])
+        self.assertEqual(recorder.pending(), 0)
+
+    def test_buffer_is_bounded_while_the_database_is_down(self):
+        self.bulk_create.side_effect = DatabaseError("database is down")
+        recorder = self.recorder(batch_size=1000, max_buffer=5)
+        self.record(recorder, 8)
+
+        with self.assertLogs('ai.usage', 'ERROR'):
+            recorder.flush()
+
+        self.assertEqual(recorder.pending(), 5)
+        self.assertEqual(recorder.dropped, 3)
+        self.bulk_create.side_effect = None
+
+
+class StubProvider(BaseHTTPRequestHandler):
+    """
+    Stands in for the inference API. Each request takes the next scripted
+    (delay, status, body) answer; once the script runs out it answers 200.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    script = []
+    requests = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        type(self).requests.append(self.client_address)
+        delay, status, body = self.script.pop(0) if self.script else OK
+        time.sleep(delay)
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client timed out and hung up
+
+    def log_message(self, *args):
+        pass
+
+
+OK = (0, 200, [{'generated_text': 'ok'}])
+LOADING = (0, 503, {'error': 'Model is loading'})
+FAILING = (0, 500, {'error': 'Internal error'})
+UNAUTHORIZED = (0, 401, {'error': 'Invalid credentials'})
+
+
+@override_settings(AI_HTTP_READ_TIMEOUT=0.5, AI_HTTP_MAX_RETRIES=2)
+@mock.patch('ai.services.huggingface_service.backoff_delay', return_value=0)
+class HuggingFaceServiceTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubProvider)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubProvider.script = []
+        StubProvider.requests = []
+        self.service = HuggingFaceService()
+        self.service.api_url = f"http://127.0.0.1:{self.server.server_port}/"
+        # Private breaker and stats so tests don't touch the process-wide ones
+        self.service.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        self.service.stats = CallStats()
+
+    def ask(self):
+        return self.service.process("How do I save more?", {})
+
+    def test_pooled_session_reuses_the_connection(self, _):
+        for _ in range(3):
+            self.assertEqual(self.ask()['type'], 'ai_chat')
+        self.assertEqual(len(StubProvider.requests), 3)
+        self.assertEqual(len(set(StubProvider.requests)), 1)
+
+    def test_model_loading_is_retried(self, _):
+        StubProvider.script = [LOADING, LOADING]
+        self.assertEqual(self.ask(), {'response': 'ok', 'type': 'ai_chat'})
+        self.assertEqual(len(StubProvider.requests), 3)
+
+    def test_model_still_loading_after_retries(self, _):
+        StubProvider.script = [LOADING] * 3
+        self.assertEqual(self.ask()['type'], 'error')
+        self.assertEqual(len(StubProvider.requests), 3)
+
+    def test_slow_provider_hits_the_read_timeout(self, _):
+        StubProvider.script = [(2, 200, [{'generated_text': 'late'}])]
+        started = time.monotonic()
+        result = self.ask()
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertIn('too long', result['response'])
+        self.assertEqual(self.service.stats.snapshot()['error_rate'], 1.0)
+
+    def test_circuit_opens_then_recovers(self, _):
+        StubProvider.script = [FAILING, FAILING]
+        self.ask()
+        self.ask()
+        self.assertFalse(self.service.is_available())
+
+        # Open: refused without touching the network
+        self.assertIsNone(self.ask())
+        self.assertEqual(len(StubProvider.requests), 2)
+
+        # Half-open after the reset timeout: one trial, success closes it
+        time.sleep(0.25)
+        self.assertEqual(self.ask()['type'], 'ai_chat')
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_unexpected_error_frees_the_half_open_trial(self, _):
+        StubProvider.script = [FAILING, FAILING]
+        self.ask()
+        self.ask()
+        time.sleep(0.25)
+
+        with mock.patch.object(self.service, '_post', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.ask()
+        self.assertEqual(self.ask()['type'], 'ai_chat')
+
+    def test_client_errors_do_not_open_the_circuit(self, _):
+        StubProvider.script = [UNAUTHORIZED] * 3
+        for _ in range(3):
+            self.assertEqual(self.ask()['response'], 'Connection Error: 401')
+
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.service.stats.snapshot()['error_rate'], 1.0)
+
+        StubProvider.script = [UNAUTHORIZED] * 3
+
+        async def run():
+            for _ in range(3):
+                await self.service.aprocess("How do I save more?", {})
+
+        asyncio.run(run())
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_client_error_frees_the_half_open_trial(self, _):
+        StubProvider.script = [FAILING, FAILING, UNAUTHORIZED]
+        self.ask()
+        self.ask()
+        time.sleep(0.25)
+
+        self.assertEqual(self.ask()['response'], 'Connection Error: 401')
+        self.assertEqual(self.ask()['type'], 'ai_chat')
+
+    def test_outcome_is_recorded_before_the_trial_is_released(self, _):
+        StubProvider.script = [OK, FAILING]
+        self.service.breaker = mock.Mock(wraps=self.service.breaker)
+
+        self.ask()
+        self.ask()
+
+        self.assertEqual(
+            [name for name, *_ in self.service.breaker.method_calls],
+            ['allow_request', 'record_success', 'release', 'allow_request', 'record_failure', 'release'],
+        )
+
+    def test_async_path_against_the_stub(self, _):
+        StubProvider.script = [LOADING, OK, FAILING, FAILING]
+
+        async def run():
+            recovered = await self.service.aprocess("How do I save more?", {})
+            failed = await self.service.aprocess("How do I save more?", {})
+            await self.service.aprocess("How do I save more?", {})
+            refused = await self.service.aprocess("How do I save more?", {})
+            return recovered, failed, refused
+
+        recovered, failed, refused = asyncio.run(run())
+        self.assertEqual(recovered['type'], 'ai_chat')
+        self.assertEqual(failed['response'], 'Connection Error: 500')
+        self.assertIsNone(refused)
+        self.assertEqual(len(StubProvider.requests), 4)
+
+
+class AIAssistStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='stream@example.com', username='stream', password='x')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def stream(self, events, error=None):
+        """POST to the stream view with get_ai_manager().astream() yielding `events`, then raising `error`."""
+        async def astream(message, context, user=None, history=None):
+            for event in events:
+                yield event
+            if error is not None:
+                raise error
+
+        manager = mock.Mock(astream=astream)
+        with mock.patch('ai.views.get_ai_manager', return_value=manager):
+            response = await self.async_client.post(
+                reverse('ai-assist-stream'), {'message': 'How do I save more?'},
+                content_type='application/json', headers=self.headers,
+            )
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        return response, body
+
+    def parse(self, body):
+        """[(event, data)] from an SSE body; every event must be complete."""
+        self.assertTrue(body.endswith('\n\n'))
+        events = []
+        for block in body[:-2].split('\n\n'):
+            event, data = block.split('\n')
+            self.assertTrue(event.startswith('event: ') and data.startswith('data: '), block)
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        return events
+
+    async def test_tokens_then_done(self):
+        response, body = await self.stream([
+            ('token', {'text': 'Spend '}),
+            ('token', {'text': 'less.'}),
+            ('done', {'response': 'Spend less.', 'type': 'ai_chat', '_service': 'huggingface'}),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        events = self.parse(body)
+        self.assertEqual(events[:2], [('token', {'text': 'Spend '}), ('token', {'text': 'less.'})])
+        event, data = events[2]
+        self.assertEqual(event, 'done')
+        self.assertEqual(data['response'], 'Spend less.')
+        self.assertIn('conversation_id', data)
+
+    async def test_error_mid_stream_ends_with_an_error_event(self):
+        response, body = await self.stream([('token', {'text': 'Spend '})], error=RuntimeError("provider went away"))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(
+            [event for event, _ in self.parse(body)],
+            ['token', 'error'],
+        )
+        self.assertEqual(self.parse(body)[-1][1]['type'], 'informational')
+
+    async def test_error_before_the_first_event(self):
+        response, body = await self.stream([], error=RuntimeError("provider went away"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event for event, _ in self.parse(body)], ['error'])
 
-# Create your tests here.
@@ -3,9 +3,11 @@
 # ai/urls.py
 
 from django.urls import path
-from .views import AIAssistView, AIStatusView
+from .views import AIAssistView, AIStatusView, ai_assist_async, ai_assist_stream
 
 urlpatterns = [
     path('assist/', AIAssistView.as_view(), name='ai-assist'),
+    path('assist/stream/', ai_assist_stream, name='ai-assist-stream'),
+    path('assist/async/', ai_assist_async, name='ai-assist-async'),
     path('status/', AIStatusView.as_view(), name='ai-status'),
 ]
\ No newline at end of file
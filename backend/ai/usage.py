@@ -0,0 +1,124 @@
+# ai/usage.py
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,
+    # Upper bound on buffered entries while the database is unreachable
+    'MAX_BUFFER': 10000,
+}
+
+
+class UsageRecorder:
+    """
+    Buffers AIUsageLog rows in memory and writes them with bulk_create from a
+    background thread, so the chat path never waits on an INSERT.
+
+    A flush happens when BATCH_SIZE entries are waiting or FLUSH_INTERVAL
+    seconds have passed, and once more at interpreter shutdown (atexit), so
+    buffered entries survive a graceful worker restart.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_buffer=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.dropped = 0
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULT_SETTINGS, **getattr(settings, 'AI_USAGE_LOG', {})}
+        return cls(
+            batch_size=config['BATCH_SIZE'],
+            flush_interval=config['FLUSH_INTERVAL'],
+            max_buffer=config['MAX_BUFFER'],
+        )
+
+    def record(self, user_id, service, request_message, response='', response_time_ms=0,
+               success=True, error_message=None):
+        from .models import AIUsageLog
+
+        entry = AIUsageLog(
+            user_id=user_id,
+            service=service,
+            request_message=request_message,
+            response_preview=(response or '')[:200],
+            response_time_ms=response_time_ms,
+            success=success,
+            error_message=error_message,
+            created_at=timezone.now(),
+        )
+        with self._lock:
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            if not entries:
+                return 0
+
+            close_old_connections()
+            try:
+                from .models import AIUsageLog
+                AIUsageLog.objects.bulk_create(entries, batch_size=self.batch_size)
+            except Exception:
+                logger.exception("Failed to write %d AI usage entries; keeping them for the next flush", len(entries))
+                with self._lock:
+                    self._buffer[:0] = entries
+                    overflow = len(self._buffer) - self.max_buffer
+                    if overflow > 0:
+                        del self._buffer[:overflow]
+                        self.dropped += overflow
+                return 0
+            return len(entries)
+
+    def shutdown(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='ai-usage-recorder', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+usage_recorder = UsageRecorder.from_settings()
+atexit.register(usage_recorder.shutdown)
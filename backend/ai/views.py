@@ -1,11 +1,44 @@
 # ai/views.py
 
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
-from .services import AIManager
+from expense_tracker.async_auth import jwt_required
+from .conversations import ConversationMemory
+from .models import AIConversation
+from .ratelimit import RateLimited
+from .services import ContextBuilder, get_ai_manager
+
+
+CONVERSATION_NOT_FOUND = {'error': 'Conversation not found'}
+
+
+def load_conversation(user, data):
+    """ConversationMemory for the request, or None for an unknown conversation_id."""
+    try:
+        return ConversationMemory.load(
+            user,
+            conversation_id=data.get('conversation_id'),
+            new=data.get('new_conversation') is True,
+        )
+    except (AIConversation.DoesNotExist, ValueError, TypeError):
+        return None
+
+
+def rate_limited_body(e):
+    return {
+        'error': "Too many AI requests. Please wait a moment and try again.",
+        'service': e.service,
+        'retry_after': e.retry_after,
+    }
 
 
 class AIAssistView(APIView):
@@ -17,11 +50,11 @@ class AIAssistView(APIView):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.ai_manager = AIManager()
+        self.ai_manager = get_ai_manager()
+        self.context_builder = ContextBuilder()
 
     def post(self, request):
         message = request.data.get('message', '').strip()
-        context = request.data.get('context', {})
 
         if not message:
             return Response(
@@ -29,12 +62,27 @@ class AIAssistView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Add user info
-        context['user_name'] = request.user.first_name or request.user.username
+        # Previous turns of the conversation (bounded window + rolling summary)
+        memory = load_conversation(request.user, request.data)
+        if memory is None:
+            return Response(CONVERSATION_NOT_FOUND, status=status.HTTP_404_NOT_FOUND)
+
+        # Financial context is built server-side (cached per data version);
+        # any 'context' sent by the client is ignored
+        context = self.context_builder.get(request.user)
 
         try:
-            result = self.ai_manager.process(message, context)
-            return Response(result)
+            result = self.ai_manager.process(
+                message, context, user=request.user, history=memory.history()
+            )
+            memory.record_turn(message, result, result['_service'])
+            return Response(dict(result, conversation_id=memory.conversation.id))
+        except RateLimited as e:
+            return Response(
+                rate_limited_body(e),
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(e.retry_after)},
+            )
         except Exception as e:
             print(f"❌ AI Error: {e}")
             return Response({
@@ -44,10 +92,128 @@ class AIAssistView(APIView):
             })
 
 
+def read_body(request):
+    """JSON body of an async view as (body dict, stripped message)."""
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    return body, str(body.get('message', '')).strip()
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def ai_assist_async(request):
+    """
+    Async variant of AIAssistView for ASGI deployments: the worker keeps
+    serving other requests while the Hugging Face call is in flight.
+    """
+    body, message = read_body(request)
+
+    if not message:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+
+    memory = await sync_to_async(load_conversation)(request.user, body)
+    if memory is None:
+        return JsonResponse(CONVERSATION_NOT_FOUND, status=404)
+
+    context = await sync_to_async(ContextBuilder().get)(request.user)
+
+    try:
+        result = await get_ai_manager().aprocess(
+            message, context, user=request.user, history=memory.history()
+        )
+        await sync_to_async(memory.record_turn)(message, result, result['_service'])
+        return JsonResponse(dict(result, conversation_id=memory.conversation.id))
+    except RateLimited as e:
+        response = JsonResponse(rate_limited_body(e), status=429)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        print(f"❌ AI Error: {e}")
+        return JsonResponse({
+            'response': "Sorry, something went wrong. Please try again!",
+            'type': 'informational',
+            '_service': 'error'
+        })
+
+
+STREAM_ERROR_EVENT = ('error', {
+    'response': "Sorry, something went wrong. Please try again!",
+    'type': 'informational',
+})
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def ai_assist_stream(request):
+    """
+    Streaming variant of AIAssistView (Server-Sent Events).
+    Hugging Face tokens are forwarded as they are generated; local answers
+    are sent at once as a single 'message' event. Async, so under ASGI an
+    open stream doesn't hold a worker thread.
+    """
+    body, message = read_body(request)
+
+    if not message:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+
+    memory = await sync_to_async(load_conversation)(request.user, body)
+    if memory is None:
+        return JsonResponse(CONVERSATION_NOT_FOUND, status=404)
+
+    context = await sync_to_async(ContextBuilder().get)(request.user)
+    stream = get_ai_manager().astream(message, context, user=request.user, history=memory.history())
+
+    # Rate limits are checked before the first event, so they can still be a 429
+    try:
+        first = await anext(stream)
+    except RateLimited as e:
+        response = JsonResponse(rate_limited_body(e), status=429)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        print(f"❌ AI Stream Error: {e}")
+        first, stream = STREAM_ERROR_EVENT, None
+
+    async def finish(event, data):
+        # The final event carries the full answer: persist the turn, tag the conversation
+        if event in ('message', 'done', 'error') and '_service' in data:
+            await sync_to_async(memory.record_turn)(message, data, data['_service'])
+            data = dict(data, conversation_id=memory.conversation.id)
+        return sse_event(event, data)
+
+    async def events():
+        try:
+            if first is not None:
+                yield await finish(*first)
+            if first is not None and stream is not None:
+                async for event, data in stream:
+                    yield await finish(event, data)
+        except Exception as e:
+            print(f"❌ AI Stream Error: {e}")
+            yield sse_event(*STREAM_ERROR_EVENT)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep nginx from buffering the stream
+    return response
+
+
 class AIStatusView(APIView):
     """Check AI services status"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        ai_manager = AIManager()
+        ai_manager = get_ai_manager()
         return Response(ai_manager.get_status())
\ No newline at end of file
@@ -0,0 +1,81 @@
+# categories/cache.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category
+
+VERSION_KEY = 'user-categories-version:{user_id}'
+MAP_KEY = 'user-categories:{user_id}:{version}'
+
+# Superseded maps are never read again and simply expire
+MAP_TIMEOUT = 60 * 60 * 24
+
+
+def _category_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Time-based start so a version lost to cache eviction never repeats
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_category_map(user_id):
+    """
+    {id: Category} for all of a user's categories.
+
+    Read from the cache; on a miss one query rebuilds it. The key carries a
+    per-user version that invalidate_categories() bumps on every Category
+    save/delete (categories/signals.py), so a stale map is never served.
+    Without a shared cache (settings.SHARED_CACHE) another process's bump
+    would go unseen, so the map is always queried.
+    """
+    if not getattr(settings, 'SHARED_CACHE', False):
+        return Category.objects.filter(user_id=user_id).in_bulk()
+
+    key = MAP_KEY.format(user_id=user_id, version=_category_version(user_id))
+    categories = cache.get(key)
+    if categories is None:
+        categories = Category.objects.filter(user_id=user_id).in_bulk()
+        cache.set(key, categories, timeout=MAP_TIMEOUT)
+    return categories
+
+
+def get_category(user_id, category_id, categories=None):
+    """
+    The user's Category with this ID, or None if they have no such category.
+
+    Looked up in `categories` (default: the cached map). An ID missing from
+    the map is checked with one query, in case the map was built before the
+    category was committed; if it exists, the map is invalidated.
+    """
+    if categories is None:
+        categories = get_category_map(user_id)
+    category = categories.get(category_id)
+    if category is None:
+        category = Category.objects.filter(user_id=user_id, pk=category_id).first()
+        if category is not None:
+            invalidate_categories(user_id)
+    return category
+
+
+def invalidate_categories(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def category_name_taken(user_id, name, exclude_pk=None):
+    """Case-insensitive: "Food" and "food" are the same category name."""
+    name = name.casefold()
+    return any(
+        category.name.casefold() == name
+        for pk, category in get_category_map(user_id).items()
+        if pk != exclude_pk
+    )
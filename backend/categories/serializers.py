@@ -1,6 +1,7 @@
 # categories/serializers.py
 
 from rest_framework import serializers
+from .cache import category_name_taken
 from .models import Category
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -26,9 +27,11 @@ class CategorySerializer(serializers.ModelSerializer):
         """
         👉 Custom validation: Ensure category name is unique per user.
         Case-insensitive to avoid "Food" vs "food".
+        Checked against the cached category map (categories/cache.py), no query.
         """
         user = self.context['request'].user  # 👉 Get current user from request context
-        if Category.objects.filter(user=user, name__iexact=value).exists():
+        exclude_pk = self.instance.pk if self.instance else None  # 👉 Renaming to itself is fine
+        if category_name_taken(user.pk, value, exclude_pk=exclude_pk):
             raise serializers.ValidationError("You already have a category with this name.")
         return value
 
@@ -0,0 +1,16 @@
+# categories/signals.py
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_categories
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    user_id = instance.user_id
+    # Now, so the rest of this transaction sees the change, and again after
+    # commit, in case another request cached the map before it committed
+    invalidate_categories(user_id)
+    db_transaction.on_commit(lambda: invalidate_categories(user_id))
@@ -1,3 +1,85 @@
-from django.test import TestCase
+import datetime
+import decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from transactions.models import Transaction
+from .cache import get_category_map
+from .models import Category
+
+User = get_user_model()
+
+
+class CategoryMapTests(TestCase):
+
+    def setUp(self):
+        cache.clear()  # IDs are reused across tests; so would cached maps be
+        self.user = User.objects.create_user(email='map@example.com', username='map', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_transaction(self, category):
+        return self.client.post(reverse('transaction-list'), {
+            'amount': '9.99', 'type': category.type, 'date': '2025-01-01',
+            'description': 'Coffee', 'category_id': category.pk,
+        }, format='json')
+
+    def test_category_missing_from_the_cached_map_is_found(self):
+        Category.objects.create(user=self.user, name='Food', type='expense')
+        get_category_map(self.user.pk)
+        # bulk_create sends no signal: the cached map doesn't know about it,
+        # like a map cached before the category was committed
+        fresh, = Category.objects.bulk_create([Category(user=self.user, name='Travel', type='expense')])
+
+        self.assertEqual(self.create_transaction(fresh).status_code, 201)
+        self.assertIn(fresh.pk, get_category_map(self.user.pk))
+
+    def test_other_users_category_is_rejected(self):
+        other = User.objects.create_user(email='map-other@example.com', username='map-other', password='x')
+        category = Category.objects.create(user=other, name='Food', type='expense')
+
+        response = self.create_transaction(category)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category_id', response.data)
+
+    def test_model_save_checks_category_ownership(self):
+        other = User.objects.create_user(email='map-owner@example.com', username='map-owner', password='x')
+        category = Category.objects.create(user=other, name='Food', type='expense')
+
+        for related in ({'category': category}, {'category_id': category.pk}):
+            with self.subTest(**{key: str(value) for key, value in related.items()}):
+                transaction = Transaction(
+                    user=self.user, type='expense', amount=decimal.Decimal('5.00'),
+                    date=datetime.date(2025, 1, 1), **related,
+                )
+                with self.assertRaises(ValidationError) as raised:
+                    transaction.save()
+                self.assertIn('category', raised.exception.message_dict)
+
+        self.assertFalse(Transaction.objects.exists())
+
+    @override_settings(SHARED_CACHE=True)
+    def test_write_does_not_query_categories(self):
+        category = Category.objects.create(user=self.user, name='Food', type='expense')
+        get_category_map(self.user.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.create_transaction(category).status_code, 201)
+
+        self.assertFalse([q['sql'] for q in queries if 'categories_category' in q['sql']])
+        self.assertEqual(sum(q['sql'].startswith('INSERT INTO "transactions_transaction"') for q in queries), 1)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_map_is_not_cached_without_a_shared_cache(self):
+        Category.objects.create(user=self.user, name='Food', type='expense')
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                get_category_map(self.user.pk)
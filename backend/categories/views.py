@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from .models import Category
 from .serializers import CategorySerializer
+from transactions.versioning import conditional_on_data_version
 
 # drf_yasg imports
 from drf_yasg.utils import swagger_auto_schema
@@ -33,6 +34,7 @@ class CategoryPagination(PageNumberPagination):
 )
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_on_data_version
 def category_list(request, version=None):
     """
     GET: List all categories for current user (with optional type filter & pagination)
@@ -0,0 +1,41 @@
+# expense_tracker/async_auth.py
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+_authenticator = JWTAuthentication()
+
+
+async def aauthenticate(request):
+    """
+    Resolve the user from the JWT bearer token, for plain async Django views
+    (DRF's authentication classes only run inside sync APIViews).
+    Returns None when the header is missing or the token is invalid.
+    """
+    try:
+        result = await sync_to_async(_authenticator.authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+def jwt_required(view):
+    """Async view decorator: sets request.user or answers 401 like DRF would."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided or are invalid.'},
+                status=401,
+            )
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
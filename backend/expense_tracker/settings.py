@@ -25,6 +25,64 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
 HUGGINGFACE_MODEL = 'mistralai/Mistral-7B-Instruct-v0.3'  # Excellent free model
 
+# Backend for questions the local intent rules don't handle (dotted path to an
+# ai.services.generators.TextGenerator). Use
+# 'ai.services.generators.TemplateGenerator' to run fully offline on CPU.
+AI_GENERATOR_BACKEND = os.getenv('AI_GENERATOR_BACKEND', 'ai.services.huggingface_service.HuggingFaceService')
+
+# Outbound AI HTTP calls: pooled session, (connect, read) timeouts in seconds,
+# retries for "model loading" answers and circuit breaker thresholds
+AI_HTTP_POOL_SIZE = int(os.getenv('AI_HTTP_POOL_SIZE', 20))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv('AI_HTTP_CONNECT_TIMEOUT', 3.05))
+AI_HTTP_READ_TIMEOUT = float(os.getenv('AI_HTTP_READ_TIMEOUT', 30))
+AI_HTTP_MAX_RETRIES = int(os.getenv('AI_HTTP_MAX_RETRIES', 2))
+AI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('AI_CIRCUIT_FAILURE_THRESHOLD', 5))
+AI_CIRCUIT_RESET_SECONDS = int(os.getenv('AI_CIRCUIT_RESET_SECONDS', 30))
+
+# In-process cache of assistant answers, keyed on user, data version and the
+# normalized message (plus the conversation history for follow-up questions).
+# Enable/disable per service; MAX_ENTRIES = 0 (or SHARED_CACHE = False) turns
+# it off.
+AI_RESPONSE_CACHE = {
+    'MAX_ENTRIES': int(os.getenv('AI_RESPONSE_CACHE_MAX_ENTRIES', 1000)),
+    'TTL': int(os.getenv('AI_RESPONSE_CACHE_TTL', 300)),
+    'SERVICES': {
+        'local': False,
+        'huggingface': True,
+    },
+}
+
+# Per-user AI request limits by service (sliding window, kept in CACHES),
+# in DRF throttle notation. Over the limit, /api/ai/assist/ answers 429.
+AI_RATE_LIMITS = {
+    'local': ['60/min'],
+    'huggingface': ['10/min', '200/day'],
+}
+
+# Assistant conversation memory: recent turns are sent verbatim up to the
+# token budget, older ones are folded into a capped rolling summary
+AI_CONVERSATION = {
+    'HISTORY_TOKEN_BUDGET': 1000,
+    'SUMMARY_MAX_CHARS': 1500,
+    'SUMMARY_LINE_CHARS': 160,
+}
+
+# Delta sync (sync/views.py). Timestamps are taken before commit, so cursors
+# stay SAFETY_LAG seconds behind now: a write whose transaction commits
+# within that long is never skipped. Tombstones older than the retention
+# window are deleted by prune_tombstones; older cursors must resync in full.
+SYNC = {
+    'SAFETY_LAG': 120,
+    'TOMBSTONE_RETENTION_DAYS': 90,
+}
+
+# AIUsageLog rows are buffered and bulk-inserted by a background thread
+AI_USAGE_LOG = {
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_BUFFER': 10000,
+}
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -57,6 +115,7 @@ INSTALLED_APPS = [
     'reports',
     'settings_app',
     'ai',
+    'sync',
     'corsheaders',
 ]
 
@@ -163,6 +222,38 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-user data versions, cached summaries and cached AI context live here.
+# They are only correct when every worker process shares the cache, so
+# production needs REDIS_URL (redis is in requirements.txt); `manage.py check
+# --deploy` fails without it. The local-memory default is for runserver, a
+# single process.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Whether the caches that depend on seeing every process's writes (category
+# maps, summary responses, conditional GETs, assistant context and answers)
+# may be used; they are bypassed otherwise. DEBUG counts as shared: runserver
+# is a single process.
+SHARED_CACHE = bool(os.getenv('REDIS_URL')) or DEBUG
+
+# Seconds a cached summary/report response is kept (reports/cache.py). Entries
+# are keyed on the user's data version, so this only bounds memory; 0 disables
+# (as does SHARED_CACHE = False).
+SUMMARY_CACHE_TIMEOUT = int(os.getenv('SUMMARY_CACHE_TIMEOUT', 600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -76,6 +76,7 @@ urlpatterns = [
     path('password/change/', views.change_password, name='change-password'),
 
     path('api/ai/', include('ai.urls')),
+    path('api/sync/', include('sync.urls')),
 ]
 
 # ✅ Serve media files in development
@@ -1,3 +1,11 @@
+# reports/admin.py
 from django.contrib import admin
+from .models import MonthlyRollup
 
-# Register your models here.
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'year', 'month', 'type', 'category', 'currency', 'total', 'count']
+    list_filter = ['type', 'currency', 'year']
+    search_fields = ['user__email', 'category__name']
+    list_select_related = ['user', 'category__user']
+    raw_id_fields = ['user', 'category']
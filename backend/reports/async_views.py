@@ -0,0 +1,41 @@
+# reports/async_views.py
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from expense_tracker.async_auth import jwt_required
+from transactions.filters import TransactionFilter
+from transactions.versioning import conditional_on_data_version
+from .cache import summary_cache
+from .summary import category_breakdown, report_payload, report_rows, totals_aggregates
+
+
+@require_GET
+@jwt_required
+@conditional_on_data_version
+async def report_summary_async(request):
+    """
+    Async variant of report_summary for ASGI deployments, read with the
+    async ORM. Same query parameters and response body.
+    """
+    try:
+        filters = TransactionFilter.from_params(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    # Same cache entries as the sync view
+    key = await summary_cache.akey('report-summary', request.user, filters)
+    payload = await summary_cache.aget('report-summary', key)
+    hit = payload is not None
+    if not hit:
+        rows, amount_field, count_aggregate = report_rows(request.user, filters)
+        totals = await rows.aaggregate(**totals_aggregates(amount_field))
+        breakdown = [item async for item in category_breakdown(rows, amount_field, count_aggregate)]
+        payload = report_payload(totals, breakdown)
+        await summary_cache.aset(key, payload)
+
+    response = JsonResponse(payload, encoder=JSONEncoder)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
@@ -0,0 +1,126 @@
+# reports/cache.py
+
+from django.conf import settings
+from django.core.cache import cache
+
+from transactions.versioning import aget_data_version, get_data_version
+
+# Endpoints served through the cache, reported by stats()
+CACHED_ENDPOINTS = ['transaction-summary', 'report-summary']
+
+
+class SummaryCache:
+    """
+    Response cache for the summary and report endpoints, in the Django cache.
+
+    Entries are keyed on (endpoint, user, data version, canonical filters).
+    Every Transaction, Category, RecurringTransaction or UserSetting write
+    bumps the user's data version (transactions/signals.py), which moves
+    that user's reads to new keys, so a stale summary is never served.
+    Superseded entries are never read again and expire after `timeout`.
+
+    Hits and misses are counted per endpoint in the cache as well, so the
+    hit ratio covers every worker process.
+
+    Off without a shared cache (settings.SHARED_CACHE): a worker would
+    never see another worker's version bump and keep serving its entries.
+
+    akey(), aget() and aset() are the same operations for async views,
+    through the async cache API.
+    """
+
+    KEY = 'summary-cache:{name}:{user_id}:{version}:{filters}'
+    STATS_KEY = 'summary-cache-stats:{name}:{outcome}'
+
+    def __init__(self, timeout=600):
+        self.timeout = timeout
+
+    @classmethod
+    def from_settings(cls):
+        return cls(timeout=getattr(settings, 'SUMMARY_CACHE_TIMEOUT', 600))
+
+    @property
+    def enabled(self):
+        return self.timeout > 0 and getattr(settings, 'SHARED_CACHE', False)
+
+    def key(self, name, user, filters, version=None):
+        return self.KEY.format(
+            name=name,
+            user_id=user.pk,
+            version=version if version is not None else get_data_version(user.pk),
+            filters=filters.cache_key(),
+        )
+
+    async def akey(self, name, user, filters):
+        return self.key(name, user, filters, version=await aget_data_version(user.pk))
+
+    def get(self, name, key):
+        if not self.enabled:
+            return None
+        payload = cache.get(key)
+        self._count(name, 'hits' if payload is not None else 'misses')
+        return payload
+
+    async def aget(self, name, key):
+        if not self.enabled:
+            return None
+        payload = await cache.aget(key)
+        await self._acount(name, 'hits' if payload is not None else 'misses')
+        return payload
+
+    def set(self, key, payload):
+        if self.enabled:
+            cache.set(key, payload, timeout=self.timeout)
+
+    async def aset(self, key, payload):
+        if self.enabled:
+            await cache.aset(key, payload, timeout=self.timeout)
+
+    def get_or_compute(self, name, user, filters, compute):
+        """Returns (payload, hit)."""
+        key = self.key(name, user, filters)
+        payload = self.get(name, key)
+        if payload is not None:
+            return payload, True
+        payload = compute()
+        self.set(key, payload)
+        return payload, False
+
+    def stats(self):
+        keys = {
+            (name, outcome): self.STATS_KEY.format(name=name, outcome=outcome)
+            for name in CACHED_ENDPOINTS
+            for outcome in ('hits', 'misses')
+        }
+        counts = cache.get_many(list(keys.values()))
+
+        stats = {}
+        for name in CACHED_ENDPOINTS:
+            hits = counts.get(keys[(name, 'hits')], 0)
+            misses = counts.get(keys[(name, 'misses')], 0)
+            lookups = hits + misses
+            stats[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return {'enabled': self.enabled, 'timeout': self.timeout, 'endpoints': stats}
+
+    def _count(self, name, outcome):
+        key = self.STATS_KEY.format(name=name, outcome=outcome)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+    async def _acount(self, name, outcome):
+        key = self.STATS_KEY.format(name=name, outcome=outcome)
+        await cache.aadd(key, 0, timeout=None)
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, timeout=None)
+
+
+summary_cache = SummaryCache.from_settings()
@@ -0,0 +1,175 @@
+# reports/exports.py
+
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+
+from transactions.pagination import KEYSET_ORDERING, keyset_after
+
+EXPORT_COLUMNS = ['Date', 'Type', 'Category', 'Amount', 'Currency', 'Description']
+EXPORT_FIELDS = ['date', 'type', 'category__name', 'amount', 'currency', 'description']
+CHUNK_SIZE = 2000
+
+# Characters Excel would evaluate as a formula at the start of a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def export_rows(transactions):
+    """
+    Flat rows for export, read in keyset pages of CHUNK_SIZE rows along the
+    list order. Each page is its own bounded range query on the
+    (user, date, created_at) index, so memory stays constant however many
+    transactions the user has, including on mysqlclient, which buffers a
+    whole result set even behind .iterator(). Rows written while the export
+    runs may or may not be included.
+    """
+    transactions = transactions.order_by(*KEYSET_ORDERING)
+    page = transactions
+    while True:
+        rows = list(page.values_list(*EXPORT_FIELDS, 'created_at', 'id')[:CHUNK_SIZE])
+        for row in rows:
+            yield row[:-2]
+        if len(rows) < CHUNK_SIZE:
+            return
+        last = rows[-1]
+        page = transactions.filter(keyset_after(last[0], last[-2], last[-1]))
+
+
+async def aiter_chunks(chunks):
+    """
+    Serve a sync chunk generator under ASGI. Django reads a sync iterator
+    into memory before streaming it there; this pulls one chunk at a time
+    on the sync thread, where the database connection lives.
+    """
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def _safe_text(value):
+    text = value or ''
+    return f"'{text}" if text.startswith(FORMULA_PREFIXES) else text
+
+
+def stream_csv(rows):
+    """Yield the CSV file in chunks of CHUNK_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for index, (day, kind, category, amount, currency, description) in enumerate(rows, start=1):
+        writer.writerow([day.isoformat(), kind, _safe_text(category), amount, currency, _safe_text(description)])
+        if index % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+class _StreamBuffer:
+    """Write-only file object; zipfile streams into it without seeking."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_STATIC_PARTS = [
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Transactions" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+]
+
+SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+def _text_cell(value):
+    return f'<c t="inlineStr"><is><t>{escape(XML_ILLEGAL.sub("", value or ""))}</t></is></c>'
+
+
+def _xlsx_row(values, numeric_column=3):
+    cells = ''.join(
+        f'<c><v>{value}</v></c>' if index == numeric_column else _text_cell(value)
+        for index, value in enumerate(values)
+    )
+    return f'<row>{cells}</row>'
+
+
+def stream_xlsx(rows):
+    """
+    Yield an .xlsx workbook as it is written. The zip is produced in
+    streaming mode (data descriptors, no seeking) and the sheet uses inline
+    strings, so nothing but the current chunk is held in memory.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS:
+            archive.writestr(name, content)
+        yield buffer.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((SHEET_HEADER + _xlsx_row(EXPORT_COLUMNS, numeric_column=None)).encode())
+            parts = []
+            for day, kind, category, amount, currency, description in rows:
+                parts.append(_xlsx_row([day.isoformat(), kind, category, amount, currency, description]))
+                if len(parts) == CHUNK_SIZE:
+                    sheet.write(''.join(parts).encode())
+                    parts = []
+                    chunk = buffer.pop()
+                    if chunk:
+                        yield chunk
+            sheet.write((''.join(parts) + SHEET_FOOTER).encode())
+
+    yield buffer.pop()
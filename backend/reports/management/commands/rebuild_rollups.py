@@ -0,0 +1,84 @@
+# reports/management/commands/rebuild_rollups.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+
+from reports.models import MonthlyRollup
+from reports.rollups import BUCKET_FIELDS, grouped_from_transactions
+from transactions.models import Transaction
+from transactions.versioning import bump_data_version
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlyRollup rows from raw transactions, or verify them with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only process the user with this email")
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Compare rollups with raw transactions without writing; fails on mismatch",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.all()
+        rollups = MonthlyRollup.objects.all()
+
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+            transactions = transactions.filter(user=user)
+            rollups = rollups.filter(user=user)
+
+        if options['check']:
+            self.check_rollups(transactions, rollups)
+        else:
+            self.rebuild(transactions, rollups, options['batch_size'])
+
+    def rebuild(self, transactions, rollups, batch_size):
+        with db_transaction.atomic():
+            user_ids = set(rollups.values_list('user_id', flat=True).distinct())
+            deleted, _ = rollups.delete()
+            created = MonthlyRollup.objects.bulk_create(
+                (MonthlyRollup(total=row['total'], count=row['count'],
+                               **{field: row[field] for field in BUCKET_FIELDS})
+                 for row in grouped_from_transactions(transactions).iterator()),
+                batch_size=batch_size,
+            )
+            user_ids.update(rollup.user_id for rollup in created)
+
+        # Summaries cached from the old rollups must not be served again
+        for user_id in user_ids:
+            bump_data_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups: removed {deleted}, created {len(created)}"
+        ))
+
+    def check_rollups(self, transactions, rollups):
+        expected = {
+            tuple(row[field] for field in BUCKET_FIELDS): (row['total'], row['count'])
+            for row in grouped_from_transactions(transactions).iterator()
+        }
+        actual = {
+            tuple(row[field] for field in BUCKET_FIELDS): (row['total'], row['count'])
+            for row in rollups.filter(count__gt=0).values(*BUCKET_FIELDS, 'total', 'count').iterator()
+        }
+
+        mismatches = 0
+        for key in expected.keys() | actual.keys():
+            if expected.get(key) != actual.get(key):
+                mismatches += 1
+                self.stdout.write(
+                    f"  {dict(zip(BUCKET_FIELDS, key))}: expected {expected.get(key)}, found {actual.get(key)}"
+                )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} rollup bucket(s) out of sync; run rebuild_rollups to repair")
+        self.stdout.write(self.style.SUCCESS(f"All {len(expected)} rollup buckets match"))
@@ -1,3 +1,48 @@
+# reports/models.py
+
 from django.db import models
+from django.conf import settings
+from categories.models import Category
+
+
+class MonthlyRollup(models.Model):
+    """
+    Pre-aggregated transaction totals per user, month, currency, type and
+    category. Kept in sync incrementally by the Transaction signals in
+    reports/signals.py so dashboards don't scan the full history.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups'
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    currency = models.CharField(max_length=3)
+    type = models.CharField(max_length=10)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups'
+    )
+
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Monthly Rollup'
+        verbose_name_plural = 'Monthly Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'currency', 'type', 'category'],
+                name='unique_monthly_rollup_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='rollup_user_year_month_idx'),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.user_id} | {self.year}-{self.month:02d} | {self.type} {self.total} {self.currency}"
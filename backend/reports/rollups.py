@@ -0,0 +1,127 @@
+# reports/rollups.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import MonthlyRollup
+
+BUCKET_FIELDS = ('user_id', 'year', 'month', 'currency', 'type', 'category_id')
+
+
+def bucket_key(transaction):
+    """Rollup bucket a transaction belongs to."""
+    return (
+        transaction.user_id,
+        transaction.date.year,
+        transaction.date.month,
+        transaction.currency,
+        transaction.type,
+        transaction.category_id,
+    )
+
+
+def apply_deltas(deltas):
+    """
+    Apply {bucket_key: (amount, count)} deltas with atomic F() updates,
+    creating buckets that don't exist yet.
+    """
+    for key, (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+
+        lookup = dict(zip(BUCKET_FIELDS, key))
+        bucket = MonthlyRollup.objects.filter(**lookup)
+        updated = bucket.update(total=F('total') + amount, count=F('count') + count)
+        if updated or count <= 0:
+            # A missing bucket on removal means the rollup already drifted;
+            # rebuild_rollups repairs that, don't create a negative bucket.
+            continue
+
+        try:
+            with db_transaction.atomic():
+                MonthlyRollup.objects.create(total=amount, count=count, **lookup)
+        except IntegrityError:
+            # Another writer created the bucket first
+            bucket.update(total=F('total') + amount, count=F('count') + count)
+
+
+def collect_deltas(transactions, sign=1, deltas=None):
+    """Accumulate bucket deltas for rows, optionally into an existing dict."""
+    if deltas is None:
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for transaction in transactions:
+        delta = deltas[bucket_key(transaction)]
+        delta[0] += sign * transaction.amount
+        delta[1] += sign
+    return deltas
+
+
+def add_transactions(transactions):
+    """Count new rows. Use after bulk_create, which bypasses signals."""
+    apply_deltas(collect_deltas(transactions, 1))
+
+
+def remove_transactions(transactions):
+    """Uncount rows. Use before bulk deletes that bypass signals."""
+    apply_deltas(collect_deltas(transactions, -1))
+
+
+def move_transactions(changes):
+    """
+    Shift updated rows from their previous buckets to their current ones.
+    `changes` is an iterable of (old_key, old_amount, transaction).
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for old_key, old_amount, transaction in changes:
+        old_delta = deltas[old_key]
+        old_delta[0] -= old_amount
+        old_delta[1] -= 1
+        new_delta = deltas[bucket_key(transaction)]
+        new_delta[0] += transaction.amount
+        new_delta[1] += 1
+    apply_deltas(deltas)
+
+
+def move_transaction(old_key, old_amount, transaction):
+    move_transactions([(old_key, old_amount, transaction)])
+
+
+def rollups_for(user, year=None, month=None, transaction_type=None, category_id=None, currency=None):
+    """Non-empty rollup buckets for a user, narrowed like the raw endpoints."""
+    rollups = MonthlyRollup.objects.filter(user=user, count__gt=0)
+    if year:
+        rollups = rollups.filter(year=year)
+    if month:
+        rollups = rollups.filter(month=month)
+    if transaction_type:
+        rollups = rollups.filter(type=transaction_type)
+    if category_id:
+        rollups = rollups.filter(category_id=category_id)
+    if currency:
+        rollups = rollups.filter(currency=currency)
+    return rollups
+
+
+def totals_by_currency_and_type(rollups):
+    """Same rows as the raw summary query, read from the rollup table."""
+    return rollups.order_by().values('currency', 'type').annotate(
+        total=Sum('total'),
+        count=Sum('count'),
+    )
+
+
+def grouped_from_transactions(transactions):
+    """Rollup-shaped aggregates computed straight from Transaction rows."""
+    return transactions.order_by().annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).values(
+        'user_id', 'year', 'month', 'currency', 'type', 'category_id'
+    ).annotate(
+        total=Sum('amount'),
+        count=Count('id'),
+    )
@@ -0,0 +1,51 @@
+# reports/signals.py
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from transactions.models import Transaction
+from . import rollups
+
+SNAPSHOT_FIELDS = {'user_id', 'date', 'currency', 'type', 'category_id', 'amount'}
+
+
+def _snapshot(instance):
+    """Remember which bucket a stored row currently counts towards."""
+    instance._rollup_snapshot = (rollups.bucket_key(instance), instance.amount)
+
+
+@receiver(post_init, sender=Transaction)
+def remember_rollup_bucket(sender, instance, **kwargs):
+    # Skip unsaved rows and partial loads (.only()/.defer()) to avoid extra queries
+    if instance.pk is None or SNAPSHOT_FIELDS & instance.get_deferred_fields():
+        instance._rollup_snapshot = None
+        return
+    _snapshot(instance)
+
+
+@receiver(pre_save, sender=Transaction)
+def load_rollup_bucket(sender, instance, **kwargs):
+    if instance.pk is None or getattr(instance, '_rollup_snapshot', None) is not None:
+        return
+    stored = Transaction.objects.filter(pk=instance.pk).first()
+    instance._rollup_snapshot = (rollups.bucket_key(stored), stored.amount) if stored else None
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_snapshot', None)
+    if created or previous is None:
+        rollups.add_transactions([instance])
+    else:
+        rollups.move_transaction(previous[0], previous[1], instance)
+    _snapshot(instance)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_snapshot', None)
+    if previous is None:
+        rollups.remove_transactions([instance])
+    else:
+        rollups.apply_deltas({previous[0]: (-previous[1], -1)})
+    instance._rollup_snapshot = None
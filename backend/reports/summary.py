@@ -0,0 +1,66 @@
+# reports/summary.py
+
+from django.db.models import Count, Q, Sum
+
+from transactions.models import Transaction
+from .rollups import rollups_for
+
+
+def report_rows(user, filters):
+    """
+    Rows behind the report summary for a TransactionFilter, plus how to
+    aggregate them: whole-month scopes read the rollup table, date ranges
+    read raw transactions.
+    Returns (rows, amount_field, count_aggregate).
+    """
+    if not filters.has_date_range:
+        # 👉 Whole-month scopes are answered from the pre-aggregated rollups
+        return rollups_for(user, **filters.rollup_filters()), 'total', Sum('count')
+
+    return filters.apply(Transaction.objects.for_user(user)), 'amount', Count('id')
+
+
+def totals_aggregates(amount_field):
+    """Income and expense totals in a single aggregate query."""
+    return {
+        'income': Sum(amount_field, filter=Q(type='income')),
+        'expense': Sum(amount_field, filter=Q(type='expense')),
+    }
+
+
+def category_breakdown(rows, amount_field, count_aggregate):
+    return rows.values(
+        'category__id',
+        'category__name',
+        'category__type',
+        'category__color'
+    ).annotate(
+        total=Sum(amount_field),
+        count=count_aggregate
+    ).order_by('-total')
+
+
+def report_payload(totals, breakdown):
+    total_income = totals['income'] or 0
+    total_expense = totals['expense'] or 0
+    net_balance = total_income - total_expense
+
+    return {
+        'summary': {
+            'total_income': round(total_income, 2),
+            'total_expense': round(total_expense, 2),
+            'net_balance': round(net_balance, 2),
+            'net_status': 'positive' if net_balance > 0 else 'negative' if net_balance < 0 else 'neutral'
+        },
+        'category_breakdown': [
+            {
+                'category_id': item['category__id'],
+                'category_name': item['category__name'] or 'Uncategorized',
+                'type': item['category__type'] or 'expense',
+                'color': item['category__color'] or '#9E9E9E',
+                'total': round(item['total'], 2),
+                'count': item['count']
+            }
+            for item in breakdown
+        ]
+    }
@@ -1,3 +1,253 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import csv
+import datetime
+import decimal
+import io
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from categories.models import Category
+from transactions.models import Transaction
+from .models import MonthlyRollup
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='export@example.com', username='export', password='x')
+        category = Category.objects.create(user=cls.user, name='Food', type='expense')
+        for i in range(7):
+            Transaction.objects.create(
+                user=cls.user,
+                category=category,
+                type='expense',
+                amount=decimal.Decimal('10.00') + i,
+                description=f"Row {i}",
+                # Two rows per day, so pages split inside a date
+                date=datetime.date(2025, 1, 1 + i // 2),
+                currency='USD',
+            )
+        cls.expected = [
+            description for description in
+            Transaction.objects.order_by('-date', '-created_at', '-id').values_list('description', flat=True)
+        ]
+
+    def descriptions(self, content):
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        return [row[5] for row in rows[1:]]
+
+    @mock.patch('reports.exports.CHUNK_SIZE', 2)
+    def test_export_reads_keyset_pages(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('report-export'), {'file_format': 'csv'})
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(self.descriptions(content), self.expected)
+        pages = [query for query in queries if 'transactions_transaction' in query['sql']]
+        self.assertEqual(len(pages), 4)
+        self.assertTrue(all('LIMIT 2' in query['sql'] for query in pages))
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+
+        response = await self.async_client.get(
+            reverse('report-export'), {'file_format': 'csv'}, headers={'Authorization': f'Bearer {token}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(self.descriptions(content), self.expected)
+
+
+@contextlib.contextmanager
+def sync_cache_calls_on_event_loop():
+    """
+    Records sync cache calls made from a thread running an event loop. The
+    async API of the local-memory backend runs the sync methods through
+    sync_to_async, so those calls (from a worker thread) are not recorded.
+    """
+    backend, calls = caches['default'], []
+
+    def guard(name, method):
+        def call(*args, **kwargs):
+            if asyncio._get_running_loop() is not None:
+                calls.append(name)
+            return method(*args, **kwargs)
+        return call
+
+    with contextlib.ExitStack() as stack:
+        for name in ('get', 'get_many', 'set', 'add', 'incr'):
+            stack.enter_context(mock.patch.object(backend, name, guard(name, getattr(backend, name))))
+        yield calls
+
+
+class AsyncSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='async-summary@example.com', username='async-summary', password='x')
+        category = Category.objects.create(user=cls.user, name='Food', type='expense')
+        Transaction.objects.create(
+            user=cls.user,
+            category=category,
+            type='expense',
+            amount=decimal.Decimal('12.50'),
+            description='Lunch',
+            date=datetime.date(2025, 1, 1),
+            currency='USD',
+        )
+
+    async def test_async_views_use_the_async_cache_api(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for name in ('transaction-summary-async', 'report-summary-async'):
+            with self.subTest(name=name), sync_cache_calls_on_event_loop() as calls:
+                first = await self.async_client.get(reverse(name), headers=headers)
+                second = await self.async_client.get(reverse(name), headers=headers)
+                unchanged = await self.async_client.get(
+                    reverse(name), headers={**headers, 'If-None-Match': first['ETag']}
+                )
+
+                self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+                self.assertEqual((second.status_code, second['X-Cache']), (200, 'HIT'))
+                self.assertEqual(unchanged.status_code, 304)
+                self.assertEqual(calls, [])
+
+
+class SummaryCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()  # Summaries cached by earlier tests under a reused user ID
+        self.user = User.objects.create_user(email='summary-cache@example.com', username='summary-cache', password='x')
+        category = Category.objects.create(user=self.user, name='Salary', type='income')
+        Transaction.objects.create(
+            user=self.user,
+            category=category,
+            type='income',
+            amount=decimal.Decimal('100.00'),
+            date=datetime.date(2025, 1, 1),
+            currency='USD',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self):
+        response = self.client.get(reverse('transaction-summary'))
+        return response['X-Cache'], response.data['USD']['total_income']
+
+    def test_rebuilt_rollups_are_not_served_from_the_cache(self):
+        self.assertEqual(self.summary(), ('MISS', decimal.Decimal('100.00')))
+        # Drifted rollups, written without signals; the cached summary agrees with them
+        MonthlyRollup.objects.filter(user=self.user).update(total=decimal.Decimal('1.00'))
+        cache.clear()
+        self.assertEqual(self.summary(), ('MISS', decimal.Decimal('1.00')))
+
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        self.assertEqual(self.summary(), ('MISS', decimal.Decimal('100.00')))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_off_without_a_shared_cache(self):
+        self.assertEqual(self.summary()[0], 'MISS')
+        self.assertEqual(self.summary()[0], 'MISS')
+
+
+class RollupMaintenanceTests(TestCase):
+    """Incremental rollup updates must leave the table equal to a rebuild from raw rows."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='rollups@example.com', username='rollups', password='x')
+        self.food = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.rent = Category.objects.create(user=self.user, name='Rent', type='expense')
+        self.salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user,
+                category=self.food,
+                type='expense',
+                amount=decimal.Decimal('10.00') + i,
+                date=datetime.date(2025, 1, 10 + i),
+                currency='USD',
+            )
+            for i in range(3)
+        ]
+
+    def assertInSync(self):
+        try:
+            call_command('rebuild_rollups', '--check', stdout=io.StringIO())
+        except CommandError as e:
+            self.fail(str(e))
+
+    def edit(self, **fields):
+        transaction = Transaction.objects.get(pk=self.transactions[0].pk)
+        for name, value in fields.items():
+            setattr(transaction, name, value)
+        transaction.save()
+        return transaction
+
+    def test_edits_move_rows_between_buckets(self):
+        edits = [
+            {'amount': decimal.Decimal('99.99')},
+            {'date': datetime.date(2025, 1, 31)},
+            {'date': datetime.date(2024, 12, 31)},
+            {'category': self.rent},
+            {'type': 'income', 'category': self.salary},
+            {'currency': 'EUR'},
+            {'amount': decimal.Decimal('0.01'), 'date': datetime.date(2025, 6, 1), 'category': self.food,
+             'type': 'expense', 'currency': 'USD'},
+        ]
+        for fields in edits:
+            with self.subTest(fields=fields):
+                self.edit(**fields)
+                self.assertInSync()
+
+    def test_repeated_saves_of_one_instance(self):
+        transaction = Transaction.objects.get(pk=self.transactions[0].pk)
+        for amount in ('1.00', '2.00', '3.00'):
+            transaction.amount = decimal.Decimal(amount)
+            transaction.date = transaction.date.replace(month=int(amount[0]))
+            transaction.save()
+            self.assertInSync()
+
+    def test_partially_loaded_instance(self):
+        transaction = Transaction.objects.only('id', 'amount').get(pk=self.transactions[0].pk)
+        transaction.amount = decimal.Decimal('55.00')
+        transaction.save()
+        self.assertInSync()
+
+    def test_deletes(self):
+        Transaction.objects.get(pk=self.transactions[0].pk).delete()
+        self.assertInSync()
+        Transaction.objects.filter(user=self.user).delete()
+        self.assertInSync()
+        self.assertFalse(MonthlyRollup.objects.filter(user=self.user, count__gt=0).exists())
+
+    def test_api_update(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.put(
+            reverse('transaction-detail', args=[self.transactions[1].pk]),
+            {'amount': '42.00', 'date': '2025-03-03', 'category_id': self.rent.pk},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertInSync()
@@ -1,8 +1,11 @@
 # reports/urls.py
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('summary/', views.report_summary, name='report-summary'),
+    path('summary/async/', async_views.report_summary_async, name='report-summary-async'),
+    path('export/', views.export_transactions, name='report-export'),
+    path('cache-stats/', views.summary_cache_stats, name='report-cache-stats'),
 
 ]
\ No newline at end of file
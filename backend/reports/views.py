@@ -2,9 +2,18 @@
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework import status
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from transactions.filters import TransactionFilter
 from transactions.models import Transaction
+from transactions.versioning import conditional_on_data_version
+from settings_app.models import UserSetting
+from .cache import summary_cache
+from .exports import aiter_chunks, export_rows, stream_csv, stream_xlsx
+from .summary import category_breakdown, report_payload, report_rows, totals_aggregates
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -34,6 +43,31 @@ from drf_yasg import openapi
             description="Filter by category ID",
             type=openapi.TYPE_INTEGER
         ),
+        openapi.Parameter(
+            'month',
+            openapi.IN_QUERY,
+            description="Filter by month (1-12)",
+            type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter(
+            'year',
+            openapi.IN_QUERY,
+            description="Filter by year (YYYY)",
+            type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter(
+            'type',
+            openapi.IN_QUERY,
+            description="Filter by type: 'income' or 'expense'",
+            type=openapi.TYPE_STRING,
+            enum=['income', 'expense']
+        ),
+        openapi.Parameter(
+            'currency',
+            openapi.IN_QUERY,
+            description="Filter by currency code",
+            type=openapi.TYPE_STRING
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -59,11 +93,13 @@ from drf_yasg import openapi
                 }
             }
         ),
+        400: "Invalid filter",
         401: "Unauthorized"
     }
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_data_version
 def report_summary(request):
     """
     👉 GET: Get financial summary with optional date range.
@@ -71,53 +107,93 @@ def report_summary(request):
       - start_date (YYYY-MM-DD)
       - end_date (YYYY-MM-DD)
       - category_id (int)
+      - month (1-12)
+      - year (YYYY)
+      - type (income/expense)
+      - currency
     """
-    user = request.user
-    transactions = Transaction.objects.filter(user=user)
+    filters = TransactionFilter.from_params(request.query_params)
 
-    # Apply filters
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    category_id = request.query_params.get('category_id')
+    def build_report():
+        rows, amount_field, count_aggregate = report_rows(request.user, filters)
+        totals = rows.aggregate(**totals_aggregates(amount_field))
+        breakdown = category_breakdown(rows, amount_field, count_aggregate)
+        return report_payload(totals, breakdown)
 
-    if start_date:
-        transactions = transactions.filter(date__gte=start_date)
-    if end_date:
-        transactions = transactions.filter(date__lte=end_date)
-    if category_id:
-        transactions = transactions.filter(category_id=category_id)
+    # 👉 Served from the per-user versioned cache while the data is unchanged
+    payload, hit = summary_cache.get_or_compute('report-summary', request.user, filters, build_report)
+    return Response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
 
-    total_income = transactions.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-    total_expense = transactions.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-    net_balance = total_income - total_expense
+EXPORT_FORMATS = {
+    'csv': ('text/csv', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
 
-    # Category breakdown
-    category_breakdown = transactions.values(
-        'category__id',
-        'category__name',
-        'category__type',
-        'category__color'
-    ).annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
+# 👉 UserSetting.report_format → export file format
+REPORT_FORMAT_EXPORTS = {'CSV': 'csv', 'Excel': 'xlsx'}
 
-    return Response({
-        'summary': {
-            'total_income': round(total_income, 2),
-            'total_expense': round(total_expense, 2),
-            'net_balance': round(net_balance, 2),
-            'net_status': 'positive' if net_balance > 0 else 'negative' if net_balance < 0 else 'neutral'
-        },
-        'category_breakdown': [
-            {
-                'category_id': item['category__id'],
-                'category_name': item['category__name'] or 'Uncategorized',
-                'type': item['category__type'] or 'expense',
-                'color': item['category__color'] or '#9E9E9E',
-                'total': round(item['total'], 2),
-                'count': item['count']
-            }
-            for item in category_breakdown
-        ]
-    })
\ No newline at end of file
+
+@swagger_auto_schema(
+    method='get',
+    tags=['reports'],
+    operation_summary="Export Transactions",
+    operation_description="Stream the user's transactions as CSV or Excel (.xlsx). Defaults to the report format in the user's settings (CSV when that is PDF).",
+    manual_parameters=[
+        openapi.Parameter('file_format', openapi.IN_QUERY, description="csv or xlsx", type=openapi.TYPE_STRING, enum=['csv', 'xlsx']),
+        openapi.Parameter('start_date', openapi.IN_QUERY, description="Start date in YYYY-MM-DD format", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('end_date', openapi.IN_QUERY, description="End date in YYYY-MM-DD format", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('category_id', openapi.IN_QUERY, description="Filter by category ID", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('type', openapi.IN_QUERY, description="Filter by type: 'income' or 'expense'", type=openapi.TYPE_STRING, enum=['income', 'expense']),
+        openapi.Parameter('month', openapi.IN_QUERY, description="Filter by month (1-12)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year (YYYY)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('currency', openapi.IN_QUERY, description="Filter by currency code", type=openapi.TYPE_STRING),
+    ],
+    responses={200: "File download", 400: "Unsupported format or invalid filter", 401: "Unauthorized"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request):
+    """
+    👉 GET: Download transactions as CSV/XLSX.
+    The file is streamed from keyset-paged queries, so even very large
+    histories start downloading immediately and use constant memory.
+    """
+    file_format = request.query_params.get('file_format')
+    if not file_format:
+        setting = UserSetting.objects.filter(user=request.user).only('report_format').first()
+        file_format = REPORT_FORMAT_EXPORTS.get(setting.report_format if setting else None, 'csv')
+
+    if file_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"Unsupported format '{file_format}'. Use one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    filters = TransactionFilter.from_params(request.query_params)
+    transactions = filters.apply(Transaction.objects.for_user(request.user))
+
+    content_type, stream = EXPORT_FORMATS[file_format]
+    content = stream(export_rows(transactions))
+    if isinstance(request._request, ASGIRequest):
+        # 👉 ASGI buffers sync iterators whole; hand it chunks one at a time
+        content = aiter_chunks(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    filename = f"transactions-{timezone.localdate().isoformat()}.{file_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@swagger_auto_schema(
+    method='get',
+    tags=['reports'],
+    operation_summary="Summary Cache Statistics",
+    operation_description="Hit/miss counts and hit ratio of the summary and report response cache (staff only).",
+    responses={200: "Cache statistics", 401: "Unauthorized", 403: "Forbidden"}
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def summary_cache_stats(request):
+    """
+    👉 GET: Hit ratio of the summary/report cache, shared by all workers.
+    """
+    return Response(summary_cache.stats())
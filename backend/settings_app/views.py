@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import UserSetting
 from .serializers import UserSettingSerializer
+from transactions.versioning import conditional_on_data_version
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -19,6 +20,7 @@ from drf_yasg import openapi
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_data_version
 def user_settings(request):
     setting, created = UserSetting.objects.get_or_create(user=request.user)
     serializer = UserSettingSerializer(setting)
@@ -0,0 +1,10 @@
+# sync/admin.py
+from django.contrib import admin
+from .models import Tombstone
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['user', 'model', 'object_id', 'deleted_at']
+    list_filter = ['model']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
@@ -0,0 +1,47 @@
+# sync/management/commands/prune_tombstones.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tombstones older than the sync retention window. Cursors older than "
+        "the window get 410 from delta sync and resync in full. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC['TOMBSTONE_RETENTION_DAYS'],
+                            help="Keep tombstones this many days (default: SYNC['TOMBSTONE_RETENTION_DAYS'])")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+
+    def handle(self, *args, **options):
+        if options['days'] < settings.SYNC['TOMBSTONE_RETENTION_DAYS']:
+            # Cursors younger than the setting are still accepted and would miss these deletes
+            self.stdout.write(self.style.WARNING(
+                f"--days is shorter than SYNC['TOMBSTONE_RETENTION_DAYS'] "
+                f"({settings.SYNC['TOMBSTONE_RETENTION_DAYS']}); clients may miss deletes"
+            ))
+
+        expired = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=options['days']))
+
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {expired.count()} tombstone(s)")
+            return
+
+        total = 0
+        while True:
+            # Primary-key batches so no single statement locks a large range
+            ids = list(expired.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            Tombstone.objects.filter(pk__in=ids).delete()
+            total += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} tombstone(s)"))
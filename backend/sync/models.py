@@ -0,0 +1,35 @@
+# sync/models.py
+
+from django.db import models
+from django.conf import settings
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted row so delta sync can tell clients to drop it.
+    """
+    MODEL_CHOICES = [
+        ('transaction', 'Transaction'),
+        ('category', 'Category'),
+        ('recurring_transaction', 'Recurring Transaction'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tombstones'
+    )
+    model = models.CharField(max_length=30, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        verbose_name = 'Tombstone'
+        verbose_name_plural = 'Tombstones'
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
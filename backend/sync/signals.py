@@ -0,0 +1,39 @@
+# sync/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from categories.models import Category
+from transactions.models import Transaction, RecurringTransaction
+from .models import Tombstone
+
+User = get_user_model()
+
+
+def record_tombstone(model_name, instance, origin):
+    # Deleting the whole account cascades here; nobody is left to sync
+    if isinstance(origin, User):
+        return
+    Tombstone.objects.create(user_id=instance.user_id, model=model_name, object_id=instance.pk)
+
+
+def record_tombstones(model_name, user_id, object_ids):
+    """One INSERT for rows removed by a bulk delete that sends no post_delete."""
+    Tombstone.objects.bulk_create(
+        Tombstone(user_id=user_id, model=model_name, object_id=object_id)
+        for object_id in object_ids
+    )
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, origin=None, **kwargs):
+    record_tombstone('transaction', instance, origin)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, origin=None, **kwargs):
+    record_tombstone('category', instance, origin)
+
+
+@receiver(post_delete, sender=RecurringTransaction)
+def recurring_transaction_deleted(sender, instance, origin=None, **kwargs):
+    record_tombstone('recurring_transaction', instance, origin)
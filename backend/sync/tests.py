@@ -0,0 +1,83 @@
+import datetime
+import decimal
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from categories.models import Category
+from transactions.models import Transaction
+from .models import Tombstone
+from .views import decode_cursor, encode_cursor
+
+User = get_user_model()
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='sync@example.com', username='sync', password='x')
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_transaction(self, description):
+        return Transaction.objects.create(
+            user=self.user,
+            category=self.category,
+            type='expense',
+            amount=decimal.Decimal('10.00'),
+            description=description,
+            date=datetime.date(2025, 1, 1),
+            currency='USD',
+        )
+
+    def sync(self, cursor=None):
+        return self.client.get(reverse('delta-sync'), {'since': cursor} if cursor else {})
+
+    def test_late_commit_is_not_skipped(self):
+        first = self.create_transaction('first')
+        cursor = self.sync().data['cursor']
+
+        # Stamped before `first` but committed after the cursor was issued,
+        # like a row from a long import transaction
+        late = self.create_transaction('late')
+        Transaction.objects.filter(pk=late.pk).update(updated_at=first.updated_at - timedelta(seconds=1))
+
+        ids = [row['id'] for row in self.sync(cursor).data['transactions']]
+        self.assertIn(late.pk, ids)
+
+    def test_cursor_settles_behind_recent_writes(self):
+        self.create_transaction('recent')
+        Transaction.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        cursor = self.sync().data['cursor']
+
+        self.assertEqual(self.sync(cursor).data['transactions'], [])
+
+    def test_expired_cursor_requires_full_resync(self):
+        self.create_transaction('old')
+        marks = decode_cursor(self.sync().data['cursor'])
+        marks['synced_at'] = (timezone.now() - timedelta(days=365)).isoformat()
+
+        response = self.sync(encode_cursor(marks))
+
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['full_resync'])
+
+
+class PruneTombstonesTests(TestCase):
+
+    def test_prunes_only_expired_tombstones(self):
+        user = User.objects.create_user(email='prune@example.com', username='prune', password='x')
+        old = Tombstone.objects.create(user=user, model='transaction', object_id=1)
+        fresh = Tombstone.objects.create(user=user, model='transaction', object_id=2)
+        Tombstone.objects.filter(pk=old.pk).update(deleted_at=timezone.now() - timedelta(days=365))
+
+        call_command('prune_tombstones', stdout=io.StringIO())
+
+        self.assertEqual(list(Tombstone.objects.values_list('pk', flat=True)), [fresh.pk])
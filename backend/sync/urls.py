@@ -0,0 +1,7 @@
+# sync/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.delta_sync, name='delta-sync'),
+]
@@ -0,0 +1,189 @@
+# sync/views.py
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from categories.models import Category
+from categories.serializers import CategorySerializer
+from settings_app.models import UserSetting
+from settings_app.serializers import UserSettingSerializer
+from transactions.models import Transaction, RecurringTransaction
+from transactions.serializers import TransactionSerializer, RecurringTransactionSerializer
+from .models import Tombstone
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+
+# Collections returned by delta sync: name -> (queryset factory, serializer)
+COLLECTIONS = {
+    'transactions': (
+        lambda user: Transaction.objects.for_user(user).with_category(),
+        TransactionSerializer,
+    ),
+    'categories': (
+        lambda user: Category.objects.filter(user=user),
+        CategorySerializer,
+    ),
+    'recurring_transactions': (
+        lambda user: RecurringTransaction.objects.filter(user=user).select_related('category'),
+        RecurringTransactionSerializer,
+    ),
+}
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(marks):
+    return base64.urlsafe_b64encode(json.dumps(marks).encode()).decode()
+
+
+def decode_cursor(encoded):
+    """
+    The cursor holds a (timestamp, id) high-water mark per collection, plus
+    the time it was issued.
+    """
+    if not encoded:
+        return {}
+    try:
+        marks = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        for name, mark in marks.items():
+            if name in ('settings', 'synced_at'):
+                if parse_datetime(mark) is None:
+                    raise InvalidCursor()
+            elif parse_datetime(mark[0]) is None or not isinstance(mark[1], int):
+                raise InvalidCursor()
+    except (AttributeError, TypeError, ValueError, IndexError):
+        raise InvalidCursor()
+    return marks
+
+
+def changed_since(queryset, field, mark, limit):
+    """
+    Rows after the (timestamp, id) mark in keyset order, plus whether more remain.
+    """
+    if mark:
+        timestamp, last_id = parse_datetime(mark[0]), mark[1]
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': last_id})
+        )
+    rows = list(queryset.order_by(field, 'id')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def settle(mark, horizon):
+    """
+    Hold a (timestamp, id) mark back at the horizon. Timestamps are taken
+    before commit, so a row stamped just before the newest one sent may not
+    be visible yet; rows newer than the horizon are sent again next time.
+    """
+    if mark and parse_datetime(mark[0]) > horizon:
+        return [horizon.isoformat(), 0]
+    return mark
+
+
+def cursor_time(marks):
+    """When the cursor was issued; the newest mark for cursors that predate synced_at."""
+    if 'synced_at' in marks:
+        return parse_datetime(marks['synced_at'])
+    stamps = [parse_datetime(mark if name == 'settings' else mark[0]) for name, mark in marks.items()]
+    return max(stamps, default=None)
+
+
+@swagger_auto_schema(
+    method='get',
+    tags=['sync'],
+    operation_summary="Delta Sync",
+    operation_description=(
+        "Return transactions, categories, recurring rules and settings changed since the cursor, "
+        "plus the IDs of rows deleted since then. Pass the returned cursor on the next call; "
+        "keep calling while has_more is true. Omit 'since' for a full initial sync. "
+        "Rows changed in the last few minutes are sent again on the next call, so apply them "
+        "as upserts by ID. A cursor older than the tombstone retention window gets 410: "
+        "discard local data and sync again without 'since'."
+    ),
+    manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, description="Cursor returned by the previous sync", type=openapi.TYPE_STRING),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Max rows per collection (default {DEFAULT_LIMIT}, max {MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+    ],
+    responses={
+        200: 'Changes since the cursor',
+        400: 'Invalid cursor',
+        401: 'Unauthorized',
+        410: 'Cursor expired, full resync required',
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delta_sync(request):
+    """
+    GET: Changes since the given cursor, in bounded pages
+    """
+    try:
+        marks = decode_cursor(request.query_params.get('since'))
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    now = timezone.now()
+    # Deletes older than the retention window are gone (prune_tombstones)
+    issued = cursor_time(marks)
+    if issued and issued < now - timedelta(days=settings.SYNC['TOMBSTONE_RETENTION_DAYS']):
+        return Response(
+            {'error': 'Cursor expired, full resync required', 'full_resync': True},
+            status=status.HTTP_410_GONE
+        )
+    horizon = now - timedelta(seconds=settings.SYNC['SAFETY_LAG'])
+
+    user = request.user
+    payload = {}
+    has_more = False
+
+    for name, (queryset, serializer_class) in COLLECTIONS.items():
+        rows, more = changed_since(queryset(user), 'updated_at', marks.get(name), limit)
+        has_more = has_more or more
+        payload[name] = serializer_class(rows, many=True).data
+        if rows:
+            marks[name] = [rows[-1].updated_at.isoformat(), rows[-1].pk]
+        if not more and name in marks:
+            marks[name] = settle(marks[name], horizon)
+
+    # Settings are a single row per user
+    payload['settings'] = None
+    setting = UserSetting.objects.filter(user=user).select_related('default_category').first()
+    if setting and (not marks.get('settings') or setting.updated_at > parse_datetime(marks['settings'])):
+        payload['settings'] = UserSettingSerializer(setting).data
+        marks['settings'] = min(setting.updated_at, horizon).isoformat()
+
+    tombstones, more = changed_since(Tombstone.objects.filter(user=user), 'deleted_at', marks.get('deleted'), limit)
+    has_more = has_more or more
+    deleted = {model: [] for model, _ in Tombstone.MODEL_CHOICES}
+    for tombstone in tombstones:
+        deleted[tombstone.model].append(tombstone.object_id)
+    payload['deleted'] = deleted
+    if tombstones:
+        marks['deleted'] = [tombstones[-1].deleted_at.isoformat(), tombstones[-1].pk]
+    if not more and 'deleted' in marks:
+        marks['deleted'] = settle(marks['deleted'], horizon)
+
+    marks['synced_at'] = now.isoformat()
+    payload['cursor'] = encode_cursor(marks)
+    payload['has_more'] = has_more
+    return Response(payload)
@@ -2,10 +2,22 @@
 from django.contrib import admin
 from .models import Transaction
 
+
+class CategoryListFilter(admin.RelatedFieldListFilter):
+    """Category filter whose choices load each category's owner in the same query."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        categories = field.related_model.objects.select_related('user').order_by(*ordering)
+        return [(category.pk, str(category)) for category in categories]
+
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ['user', 'type', 'category', 'amount', 'date', 'description']
-    list_filter = ['type', 'category', 'date', 'user']
+    list_filter = ['type', ('category', CategoryListFilter), 'date', 'user']
+    # One JOIN for the user and category columns (Category.__str__ shows its owner's email)
+    list_select_related = ['user', 'category__user']
     search_fields = ['description', 'user__email', 'category__name']
     date_hierarchy = 'date'  # 👉 Nice date drilldown
-    ordering = ['-date']
\ No newline at end of file
+    ordering = ['-date']
@@ -0,0 +1,39 @@
+# transactions/async_views.py
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from expense_tracker.async_auth import jwt_required
+from reports.cache import summary_cache
+from .filters import TransactionFilter
+from .summary import summarize_rows, summary_rows
+from .versioning import conditional_on_data_version
+
+
+@require_GET
+@jwt_required
+@conditional_on_data_version
+async def transaction_summary_async(request):
+    """
+    Async variant of transaction_summary for ASGI deployments, read with the
+    async ORM. Same query parameters and response body.
+    """
+    try:
+        filters = TransactionFilter.from_params(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    # Same cache entries as the sync view
+    key = await summary_cache.akey('transaction-summary', request.user, filters)
+    payload = await summary_cache.aget('transaction-summary', key)
+    hit = payload is not None
+    if not hit:
+        rows = summary_rows(request.user, filters)
+        payload = summarize_rows([row async for row in rows])
+        await summary_cache.aset(key, payload)
+
+    response = JsonResponse(payload, encoder=JSONEncoder)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
@@ -0,0 +1,22 @@
+# transactions/checks.py
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Data versions (transactions/versioning.py) and the caches keyed on them
+    must be shared by every worker process, or one worker keeps serving what
+    another has already invalidated.
+    """
+    if isinstance(caches['default'], (LocMemCache, DummyCache)):
+        return [Error(
+            "The default cache is not shared by the worker processes.",
+            hint="Set REDIS_URL so every worker process shares data versions and cached responses.",
+            id='transactions.E001',
+        )]
+    return []
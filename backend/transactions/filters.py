@@ -0,0 +1,135 @@
+# transactions/filters.py
+
+import calendar
+import datetime
+
+from rest_framework import serializers
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Query parameters shared by the list, summary, report and export endpoints.
+    Lists use ?category=, reports ?category_id=; both mean the same thing.
+    """
+
+    category = serializers.IntegerField(required=False, min_value=1)
+    category_id = serializers.IntegerField(required=False, min_value=1)
+    type = serializers.ChoiceField(choices=['income', 'expense'], required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    month = serializers.IntegerField(required=False, min_value=1, max_value=12)
+    year = serializers.IntegerField(required=False, min_value=1, max_value=9999)
+    currency = serializers.CharField(required=False, min_length=3, max_length=3)
+
+    def validate(self, attrs):
+        category = attrs.pop('category', None)
+        if category and attrs.get('category_id', category) != category:
+            raise serializers.ValidationError("category and category_id disagree.")
+        if category:
+            attrs['category_id'] = category
+
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({"end_date": "Must not be before start_date."})
+
+        if 'currency' in attrs:
+            attrs['currency'] = attrs['currency'].upper()
+        return attrs
+
+
+class TransactionFilter:
+    """
+    Validated transaction filters, compiled into index-friendly predicates.
+
+    month/year become a date range instead of date__month/date__year
+    lookups (which wrap the column in a function and can't use the
+    (user, ..., date) indexes). cache_key() is the same for equivalent
+    query strings, so results can be cached per filter.
+    """
+
+    def __init__(self, category_id=None, transaction_type=None, currency=None,
+                 start_date=None, end_date=None, month=None, year=None):
+        self.category_id = category_id
+        self.transaction_type = transaction_type
+        self.currency = currency
+        self.start_date = start_date
+        self.end_date = end_date
+        self.month = month
+        self.year = year
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Build from request query parameters. Unknown and empty parameters are
+        ignored; invalid ones raise serializers.ValidationError (a 400 in DRF views).
+        """
+        data = {
+            name: params.get(name)
+            for name in TransactionFilterSerializer._declared_fields
+            if params.get(name) not in (None, '')
+        }
+        serializer = TransactionFilterSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        values['transaction_type'] = values.pop('type', None)
+        return cls(**values)
+
+    @property
+    def has_date_range(self):
+        """An explicit start/end date; whole-month scopes can be read from rollups instead."""
+        return bool(self.start_date or self.end_date)
+
+    def date_range(self):
+        """(start, end) of start_date/end_date intersected with the month/year scope."""
+        start, end = self.start_date, self.end_date
+        if self.year:
+            if self.month:
+                scope_start = datetime.date(self.year, self.month, 1)
+                scope_end = datetime.date(self.year, self.month, calendar.monthrange(self.year, self.month)[1])
+            else:
+                scope_start, scope_end = datetime.date(self.year, 1, 1), datetime.date(self.year, 12, 31)
+            start = max(start, scope_start) if start else scope_start
+            end = min(end, scope_end) if end else scope_end
+        return start, end
+
+    def apply(self, transactions):
+        """Narrow a Transaction queryset."""
+        start, end = self.date_range()
+        transactions = transactions.filter_by(
+            category_id=self.category_id,
+            transaction_type=self.transaction_type,
+            currency=self.currency,
+            start_date=start,
+            end_date=end,
+        )
+        if self.month and not self.year:
+            # Same month across every year: not expressible as one range
+            transactions = transactions.filter(date__month=self.month)
+        return transactions
+
+    def rollup_filters(self):
+        """Keyword arguments for reports.rollups.rollups_for()."""
+        return {
+            'year': self.year,
+            'month': self.month,
+            'transaction_type': self.transaction_type,
+            'category_id': self.category_id,
+            'currency': self.currency,
+        }
+
+    def cache_key(self):
+        """
+        Canonical form of the filter: ?month=3&year=2025 and
+        ?start_date=2025-03-01&end_date=2025-03-31 select the same rows and
+        share a key.
+        """
+        start, end = self.date_range()
+        parts = {
+            'category_id': self.category_id,
+            'type': self.transaction_type,
+            'currency': self.currency,
+            'start': start,
+            'end': end,
+            'month': self.month if not self.year else None,
+        }
+        return '&'.join(f"{name}={value}" for name, value in parts.items() if value is not None)
@@ -0,0 +1,387 @@
+# transactions/importers.py
+
+import csv
+import hashlib
+import re
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from categories.models import Category
+from reports import rollups
+from .models import Transaction
+from .serializers import SUPPORTED_CURRENCIES
+from .versioning import bump_data_version
+
+ImportedRow = namedtuple('ImportedRow', 'line date amount description category currency type')
+
+# A Transaction as written by TransactionImporter; also all rollups.bucket_key() reads
+ImportedTransaction = namedtuple(
+    'ImportedTransaction',
+    'category_id type amount description date currency import_fingerprint user_id',
+)
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d.%m.%Y', '%Y%m%d', '%m/%d/%y', '%d/%m/%y']
+
+# Accepted CSV header names for each field (lower-case)
+CSV_COLUMNS = {
+    'date': ['date', 'transaction date', 'posted date', 'booking date'],
+    'amount': ['amount', 'value', 'sum'],
+    'description': ['description', 'memo', 'payee', 'details', 'narrative'],
+    'category': ['category'],
+    'currency': ['currency'],
+    'type': ['type'],
+}
+
+DEFAULT_CATEGORY_NAMES = {'expense': 'Imported', 'income': 'Imported Income'}
+MAX_REPORTED_ERRORS = 20
+
+# Rejects NaN/Infinity and amounts that don't fit Transaction.amount
+_amount_field = Transaction._meta.get_field('amount')
+AMOUNT_VALIDATOR = DecimalValidator(_amount_field.max_digits, _amount_field.decimal_places)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def parse_date(value, date_format=None):
+    value = value.strip()
+    formats = [date_format] if date_format else DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def parse_amount(value):
+    cleaned = value.strip().replace(',', '').replace(' ', '')
+    if cleaned.startswith('(') and cleaned.endswith(')'):
+        cleaned = '-' + cleaned[1:-1]
+    try:
+        amount = Decimal(cleaned)
+        AMOUNT_VALIDATOR(amount)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount '{value}'")
+    except ValidationError as e:
+        raise ValueError(f"Invalid amount '{value}': {e.messages[0]}")
+    return amount
+
+
+def parse_currency(value):
+    """Upper-cased currency code, '' when the row has none."""
+    currency = (value or '').strip().upper()
+    if currency and currency not in SUPPORTED_CURRENCIES:
+        raise ValueError(f"Unsupported currency '{currency}'")
+    return currency
+
+
+def fingerprint(date, amount, transaction_type, description):
+    """Stable identity of a statement line, used to skip re-imported rows."""
+    signed = amount if transaction_type == 'income' else -amount
+    key = f"{date.isoformat()}|{signed:.2f}|{' '.join(description.lower().split())}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _row(line, date, amount, description, category='', currency='', transaction_type=''):
+    if amount == 0:
+        raise ValueError("Amount must not be zero")
+    transaction_type = (transaction_type or '').strip().lower()
+    if transaction_type not in ('income', 'expense'):
+        transaction_type = 'income' if amount > 0 else 'expense'
+    return ImportedRow(
+        line=line,
+        date=date,
+        amount=abs(amount),
+        description=(description or '').strip(),
+        category=(category or '').strip(),
+        currency=parse_currency(currency),
+        type=transaction_type,
+    )
+
+
+def parse_csv(stream, date_format=None):
+    """Yield ImportedRow (or ValueError) for each CSV line, read lazily."""
+    reader = csv.reader(stream)
+    try:
+        header = [column.strip().lower() for column in next(reader)]
+    except StopIteration:
+        return
+
+    positions = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in header:
+                positions[field] = header.index(name)
+                break
+    if 'date' not in positions or 'amount' not in positions:
+        raise ImportFormatError("CSV needs at least 'date' and 'amount' columns")
+
+    def cell(values, field):
+        index = positions.get(field)
+        return values[index] if index is not None and index < len(values) else ''
+
+    for line, values in enumerate(reader, start=2):
+        if not any(values):
+            continue
+        try:
+            yield _row(
+                line,
+                parse_date(cell(values, 'date'), date_format),
+                parse_amount(cell(values, 'amount')),
+                cell(values, 'description'),
+                cell(values, 'category'),
+                cell(values, 'currency'),
+                cell(values, 'type'),
+            )
+        except ValueError as e:
+            yield ValueError(f"Line {line}: {e}")
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_tags(stream, chunk_size=65536):
+    """Yield (closing, tag, text) from SGML or XML OFX without loading the whole file."""
+    pending = ''
+    for chunk in iter(lambda: stream.read(chunk_size), ''):
+        pending += chunk
+        cut = pending.rfind('<')
+        for match in OFX_TAG.finditer(pending, 0, cut):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        pending = pending[cut:]
+    for match in OFX_TAG.finditer(pending):
+        yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+
+
+def parse_ofx(stream, date_format=None):
+    currency = ''
+    current = None
+    count = 0
+    for closing, tag, text in _ofx_tags(stream):
+        if tag == 'CURDEF' and not closing:
+            currency = text
+        elif tag == 'STMTTRN':
+            if not closing:
+                current = {}
+                continue
+            if current is None:
+                continue
+            count += 1
+            try:
+                yield _row(
+                    count,
+                    parse_date(current.get('DTPOSTED', '')[:8], date_format or '%Y%m%d'),
+                    parse_amount(current.get('TRNAMT', '')),
+                    current.get('NAME') or current.get('MEMO', ''),
+                    currency=currency,
+                )
+            except ValueError as e:
+                yield ValueError(f"Transaction {count}: {e}")
+            current = None
+        elif current is not None and not closing and text:
+            current[tag] = text
+
+
+def parse_qif(stream, date_format=None):
+    record = {}
+    for line, raw in enumerate(stream, start=1):
+        raw = raw.rstrip('\r\n')
+        if not raw or raw.startswith('!'):
+            continue
+        if raw.startswith('^'):
+            if record:
+                try:
+                    yield _row(
+                        line,
+                        parse_date(record.get('D', '').replace("'", '/'), date_format),
+                        parse_amount(record.get('T', record.get('U', ''))),
+                        record.get('P') or record.get('M', ''),
+                        record.get('L', ''),
+                    )
+                except ValueError as e:
+                    yield ValueError(f"Line {line}: {e}")
+            record = {}
+            continue
+        record[raw[0]] = raw[1:].strip()
+
+
+PARSERS = {'csv': parse_csv, 'ofx': parse_ofx, 'qfx': parse_ofx, 'qif': parse_qif}
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in PARSERS else 'csv'
+
+
+class TransactionImporter:
+    """
+    Bulk-load parsed statement rows for one user.
+
+    Categories are resolved from an in-memory name map, rows are written in
+    batches with one executemany() INSERT each, and rows whose fingerprint
+    already exists (or repeats within the file) are skipped. The whole file
+    is imported in one database transaction, so a failed import leaves
+    nothing behind and the rollup totals are applied once at the end.
+    """
+
+    def __init__(self, user, currency='USD', batch_size=2000, progress=None):
+        self.user = user
+        try:
+            self.currency = parse_currency(currency) or 'USD'
+        except ValueError as e:
+            raise ImportFormatError(str(e))
+        self.batch_size = batch_size
+        self.progress = progress
+        self.categories = {
+            name.lower(): (category_id, category_type)
+            for category_id, name, category_type in Category.objects.filter(user=user).values_list(
+                'id', 'name', 'type'
+            )
+        }
+        self.seen = set()
+        self.rollup_deltas = rollups.collect_deltas([])
+        self.stats = {'processed': 0, 'created': 0, 'duplicates': 0, 'errors': 0, 'error_details': []}
+
+    def category_for(self, name, transaction_type):
+        name = (name or DEFAULT_CATEGORY_NAMES[transaction_type])[:100]
+        category = self.categories.get(name.lower())
+        if category is not None and category[1] != transaction_type:
+            # Names are unique per user whatever the type: file an income row
+            # named like an expense category under "<name> (Income)"
+            name = f"{name[:90]} ({transaction_type.title()})"
+            category = self.categories.get(name.lower())
+        if category is None:
+            created, _ = Category.objects.get_or_create(
+                user=self.user,
+                name=name,
+                defaults={'type': transaction_type},
+            )
+            category = self.categories[name.lower()] = (created.id, created.type)
+        if category[1] != transaction_type:
+            raise ImportFormatError(f"Category '{name}' is not an {transaction_type} category")
+        return category[0]
+
+    def run(self, rows):
+        with db_transaction.atomic():
+            self._run(rows)
+            rollups.apply_deltas(self.rollup_deltas)
+        if self.stats['created']:
+            bump_data_version(self.user.pk)
+        return self.stats
+
+    def _run(self, rows):
+        batch = []
+        for row in rows:
+            if isinstance(row, ValueError):
+                self.stats['processed'] += 1
+                self.stats['errors'] += 1
+                if len(self.stats['error_details']) < MAX_REPORTED_ERRORS:
+                    self.stats['error_details'].append(str(row))
+                continue
+
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+
+        if batch:
+            self.write_batch(batch)
+
+    def write_batch(self, rows):
+        candidates = {}
+        for row in rows:
+            key = fingerprint(row.date, row.amount, row.type, row.description)
+            if key in self.seen or key in candidates:
+                self.stats['duplicates'] += 1
+                continue
+            candidates[key] = row
+
+        # Served by the (import_fingerprint, user) unique index
+        existing = set(
+            Transaction.objects.filter(
+                user_id=self.user.pk,
+                import_fingerprint__in=list(candidates),
+            ).values_list('import_fingerprint', flat=True)
+        )
+        self.stats['duplicates'] += len(existing)
+
+        new_transactions = [
+            ImportedTransaction(
+                self.category_for(row.category, row.type),
+                row.type,
+                row.amount,
+                row.description,
+                row.date,
+                row.currency or self.currency,
+                key,
+                self.user.pk,
+            )
+            for key, row in candidates.items()
+            if key not in existing
+        ]
+
+        self.insert(new_transactions)
+        rollups.collect_deltas(new_transactions, deltas=self.rollup_deltas)
+
+        self.seen.update(candidates)
+        self.stats['processed'] += len(rows)
+        self.stats['created'] += len(new_transactions)
+        if self.progress:
+            self.progress(self.stats)
+
+    def insert(self, transactions):
+        """
+        INSERT rows with one executemany(). bulk_create() spends most of an
+        import building model instances and preparing values field by field;
+        here only amount and date need adapting for the database, and every
+        other column is prepared once per batch.
+        """
+        if not transactions:
+            return
+
+        now = timezone.now()
+        template = Transaction(user_id=self.user.pk, created_at=now, updated_at=now)
+        # user_id is the same on every row, so it goes with the constants
+        varying = ImportedTransaction._fields[:-1]
+        constant = [
+            field for field in Transaction._meta.concrete_fields
+            if field.attname not in varying and not field.primary_key
+        ]
+        columns = [Transaction._meta.get_field(name).column for name in varying]
+        columns += [field.column for field in constant]
+        tail = tuple(field.get_db_prep_save(getattr(template, field.attname), connection) for field in constant)
+
+        operations = connection.ops
+        amount_field = Transaction._meta.get_field('amount')
+        params = [
+            (
+                transaction.category_id,
+                transaction.type,
+                operations.adapt_decimalfield_value(
+                    transaction.amount, amount_field.max_digits, amount_field.decimal_places
+                ),
+                transaction.description,
+                operations.adapt_datefield_value(transaction.date),
+                transaction.currency,
+                transaction.import_fingerprint,
+            ) + tail
+            for transaction in transactions
+        ]
+
+        quote = operations.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Transaction._meta.db_table),
+            ', '.join(quote(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(params), self.batch_size):
+                cursor.executemany(sql, params[start:start + self.batch_size])
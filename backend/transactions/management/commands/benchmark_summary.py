@@ -0,0 +1,141 @@
+# transactions/management/commands/benchmark_summary.py
+
+import datetime
+import decimal
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction as db_transaction
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category
+from reports import rollups
+from transactions.filters import TransactionFilter
+from transactions.models import Transaction
+from transactions.summary import summarize_by_currency, summarize_rows, summary_rows
+
+User = get_user_model()
+
+INSERT_CHUNK = 10000
+
+
+def python_loop_summary(transactions):
+    """The summary as it was computed before: every row loaded and summed as float."""
+    summary_by_currency = {}
+    for transaction in transactions.iterator(chunk_size=INSERT_CHUNK):
+        data = summary_by_currency.setdefault(
+            transaction.currency,
+            {'total_income': 0, 'total_expense': 0, 'balance': 0, 'total_transactions': 0},
+        )
+        if transaction.type == 'income':
+            data['total_income'] += float(transaction.amount)
+        else:
+            data['total_expense'] += float(transaction.amount)
+        data['balance'] = data['total_income'] - data['total_expense']
+        data['total_transactions'] += 1
+    return summary_by_currency
+
+
+def cents(summary):
+    """
+    Totals rounded to cents for comparison: SQLite sums DECIMAL columns as
+    floating point, so the grouped query can be off in the last digits there.
+    """
+    return {
+        currency: {
+            name: value.quantize(decimal.Decimal('0.01')) if isinstance(value, decimal.Decimal) else value
+            for name, value in data.items()
+        }
+        for currency, data in summary.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the transaction summary: Python loop vs one grouped query vs the "
+        "monthly rollup table. Runs against throwaway data in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000',
+                            help="Comma-separated transaction counts to measure at")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per strategy and size")
+        parser.add_argument('--skip-loop-above', type=int, default=100000,
+                            help="Don't time the Python loop above this many rows (it is slow)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        with db_transaction.atomic():
+            user = User.objects.create_user(
+                email='summary-benchmark@example.invalid',
+                username='summary-benchmark',
+                password=None,
+            )
+            categories = Category.objects.bulk_create(
+                Category(user=user, name=f"Benchmark {i}", type='expense' if i % 2 else 'income')
+                for i in range(20)
+            )
+            filters = TransactionFilter()
+            strategies = [
+                ('python loop', lambda: python_loop_summary(Transaction.objects.for_user(user))),
+                ('grouped query', lambda: summarize_by_currency(Transaction.objects.for_user(user))),
+                ('rollup table', lambda: summarize_rows(summary_rows(user, filters))),
+            ]
+
+            rows = 0
+            for size in sizes:
+                self._grow(user, categories, rows, size - rows)
+                rows = size
+                self.stdout.write(f"📊 {size:,} transactions")
+
+                expected = None
+                for name, run in strategies:
+                    if name == 'python loop' and size > options['skip_loop_above']:
+                        self.stdout.write(f"   ⏭️ {name}: skipped (--skip-loop-above)")
+                        continue
+                    queries, timings, result = self._measure(run, options['repeat'])
+                    self.stdout.write(
+                        f"   ⏱️ {name}: median {statistics.median(timings) * 1000:,.2f} ms, "
+                        f"max {max(timings) * 1000:,.2f} ms, {queries} queries"
+                    )
+                    if name != 'python loop':
+                        expected = expected or cents(result)
+                        if cents(result) != expected:
+                            raise CommandError(f"{name} disagrees with the grouped query at {size:,} rows")
+
+            db_transaction.set_rollback(True)
+
+    def _grow(self, user, categories, offset, count):
+        """Insert `count` transactions in chunks, keeping the rollups in step."""
+        for start in range(offset, offset + count, INSERT_CHUNK):
+            created = Transaction.objects.bulk_create(
+                Transaction(
+                    user=user,
+                    category=categories[i % len(categories)],
+                    type=categories[i % len(categories)].type,
+                    amount=decimal.Decimal(i % 5000) + decimal.Decimal('0.01') * (i % 100),
+                    date=datetime.date(2015 + i % 10, 1 + i % 12, 1 + i % 28),
+                    currency=('USD', 'EUR', 'GBP')[i % 3],
+                    description=f"Benchmark {i}",
+                )
+                for i in range(start, min(start + INSERT_CHUNK, offset + count))
+            )
+            rollups.add_transactions(created)
+
+    def _measure(self, run, repeat):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            # The inserts fill the query log; a full log can't be counted
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = run()
+                timings.append(time.perf_counter() - started)
+        return len(queries), timings, result
@@ -0,0 +1,60 @@
+# transactions/management/commands/import_transactions.py
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.importers import PARSERS, ImportFormatError, TransactionImporter, detect_format
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Bulk-import a bank statement (CSV, OFX/QFX or QIF) for a user, skipping rows already imported."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Email of the user to import for")
+        parser.add_argument('path', help="Statement file")
+        parser.add_argument('--format', choices=sorted(PARSERS), help="File format (default: from extension)")
+        parser.add_argument('--currency', default='USD', help="Currency for rows that don't specify one")
+        parser.add_argument('--date-format', help="strptime format of the date column, e.g. %%d/%%m/%%Y")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['email']}' does not exist")
+
+        file_format = options['format'] or detect_format(options['path'])
+        started = time.monotonic()
+
+        def progress(stats):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {stats['processed']} rows processed, {stats['created']} created, "
+                f"{stats['duplicates']} duplicates ({stats['processed'] / max(elapsed, 1e-6):,.0f} rows/s)"
+            )
+
+        try:
+            importer = TransactionImporter(
+                user,
+                currency=options['currency'],
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+            with open(options['path'], encoding=options['encoding'], newline='') as stream:
+                stats = importer.run(PARSERS[file_format](stream, options['date_format']))
+        except OSError as e:
+            raise CommandError(str(e))
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        for detail in stats['error_details']:
+            self.stderr.write(f"  {detail}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']} transaction(s); skipped {stats['duplicates']} duplicate(s) "
+            f"and {stats['errors']} invalid row(s) in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,45 @@
+# transactions/management/commands/run_recurring_transactions.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.recurring import run_due_recurring_transactions
+
+
+class Command(BaseCommand):
+    help = "Create transactions for every due recurring rule. Safe to run from cron every minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Run as of this date (YYYY-MM-DD) instead of today")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--max-catch-up',
+            type=int,
+            default=366,
+            help="Maximum missed occurrences generated per rule per batch",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format")
+
+        if options['batch_size'] < 1 or options['max_catch_up'] < 1:
+            raise CommandError("--batch-size and --max-catch-up must be at least 1")
+
+        result = run_due_recurring_transactions(
+            today=today,
+            batch_size=options['batch_size'],
+            max_catch_up=options['max_catch_up'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {result['rules']} recurring rule(s), created {result['transactions']} transaction(s)"
+        ))
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(
+                f"{result['failed']} recurring rule(s) failed and were skipped; see the log"
+            ))
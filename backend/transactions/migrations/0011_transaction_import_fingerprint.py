@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('transactions', '0010_transaction_txn_user_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of (date, amount, description) for imported rows', max_length=40, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('import_fingerprint', 'user'), name='unique_import_fingerprint'),
+        ),
+    ]
@@ -5,6 +5,65 @@ from categories.models import Category
 
 User = get_user_model()
 
+
+class TransactionQuerySet(models.QuerySet):
+    """
+    Query helpers shared by views, summaries, sync and the admin, so every
+    read is scoped the same way and nested categories come from one JOIN.
+    """
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def with_category(self):
+        # TransactionSerializer nests the category and __str__ shows its name
+        return self.select_related('category')
+
+    def bulk_create_with_ids(self, transactions):
+        """
+        bulk_create() that always sets primary keys on `transactions` (all
+        of one user). Backends that can't return rows from a bulk insert
+        (MySQL) get them from one follow-up query: every row was given its
+        own created_at in memory, so rows are matched on (user, created_at),
+        ties in insertion (id) order.
+        """
+        transactions = self.bulk_create(transactions)
+        if not transactions or transactions[0].pk is not None:
+            return transactions
+
+        pending = {}
+        for transaction in transactions:
+            pending.setdefault(transaction.created_at, []).append(transaction)
+        stored = self.filter(
+            user_id=transactions[0].user_id,
+            created_at__range=(min(pending), max(pending)),
+        ).order_by('created_at', 'id').values_list('created_at', 'id')
+        for created_at, pk in stored:
+            if pending.get(created_at):
+                pending[created_at].pop(0).pk = pk
+        return transactions
+
+    def between(self, start_date=None, end_date=None):
+        qs = self
+        if start_date:
+            qs = qs.filter(date__gte=start_date)
+        if end_date:
+            qs = qs.filter(date__lte=end_date)
+        return qs
+
+    def filter_by(self, category_id=None, transaction_type=None, currency=None,
+                  start_date=None, end_date=None):
+        """Apply the standard list/report filters; empty values are ignored."""
+        qs = self.between(start_date, end_date)
+        if category_id:
+            qs = qs.filter(category_id=category_id)
+        if transaction_type:
+            qs = qs.filter(type=transaction_type)
+        if currency:
+            qs = qs.filter(currency=currency)
+        return qs
+
+
 class Transaction(models.Model):
 
     """
@@ -78,14 +137,60 @@ class Transaction(models.Model):
         help_text="Currency code (e.g., USD, EUR, GBP)"
     )
 
+    # Rule that generated this row (see transactions/recurring.py)
+    recurring_source = models.ForeignKey(
+        'RecurringTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='generated_transactions',
+        help_text="Recurring rule that generated this transaction"
+    )
+
+    # Set by statement imports to skip rows that were already loaded
+    import_fingerprint = models.CharField(
+        max_length=40,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Hash of (date, amount, description) for imported rows"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
 
+        # Every read is scoped to one user and a date range
+        indexes = [
+            # Default ordering: list endpoint and keyset pagination
+            models.Index(fields=['user', 'date', 'created_at'], name='txn_user_date_created_idx'),
+            # Summaries and reports split by type
+            models.Index(fields=['user', 'type', 'date'], name='txn_user_type_date_idx'),
+            # Category / currency filters
+            models.Index(fields=['user', 'category', 'date'], name='txn_user_category_date_idx'),
+            models.Index(fields=['user', 'currency', 'date'], name='txn_user_currency_date_idx'),
+            # Delta sync walks changes in (updated_at, id) order
+            models.Index(fields=['user', 'updated_at'], name='txn_user_updated_idx'),
+        ]
+        constraints = [
+            # A rule never produces two rows for the same occurrence
+            models.UniqueConstraint(
+                fields=['recurring_source', 'date'],
+                name='unique_recurring_occurrence',
+            ),
+            # The same statement line is only imported once per user
+            models.UniqueConstraint(
+                fields=['import_fingerprint', 'user'],
+                name='unique_import_fingerprint',
+            ),
+        ]
+
     def __str__(self):
         category_name = self.category.name if self.category else "Uncategorized"
         return f"{self.type.title()} | {category_name} | {self.amount} {self.currency} | {self.date}"
@@ -100,14 +205,22 @@ class Transaction(models.Model):
 
     def clean(self):
         """
-        Custom validation: Amount must be positive
+        Custom validation: Amount must be positive, and the category must
+        belong to the transaction's user
         """
         from django.core.exceptions import ValidationError
         if self.amount <= 0:
             raise ValidationError("Amount must be greater than zero.")
+        # Reads the category the serializers attached from the cached map;
+        # only a bare category_id costs a query
+        if self.category_id is not None and self.category.user_id != self.user_id:
+            raise ValidationError({'category': "You can only use your own categories."})
 
     def save(self, *args, **kwargs):
-        self.full_clean()  # Run validations before saving
+        # Run validations before saving. Field validation of the foreign keys
+        # is skipped: the database enforces them and would cost two SELECTs
+        # per write. Ownership of the category is checked in clean().
+        self.full_clean(exclude=['user', 'category'])
         super().save(*args, **kwargs)
 
 
@@ -137,5 +250,11 @@ class RecurringTransaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Scheduler scans for due rules
+            models.Index(fields=['next_run_date'], name='recurring_next_run_idx'),
+        ]
+
     def __str__(self):
         return f"{self.description} ({self.frequency})"
\ No newline at end of file
@@ -0,0 +1,116 @@
+# transactions/pagination.py
+
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Transaction list order; also the keyset the export pages along
+KEYSET_ORDERING = ('-date', '-created_at', '-id')
+
+
+def keyset_after(last_date, last_created_at, last_id):
+    """Rows strictly after the given position in descending key order."""
+    return (
+        Q(date__lt=last_date)
+        | Q(date=last_date, created_at__lt=last_created_at)
+        | Q(date=last_date, created_at=last_created_at, id__lt=last_id)
+    )
+
+
+class TransactionKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the transaction list.
+
+    Rows are ordered by (-date, -created_at, -id) and the cursor stores the
+    last row seen, so every page is a single indexed range query no matter
+    how deep the client has scrolled.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = KEYSET_ORDERING
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        """Only clients that opt in get pages; others keep the full list."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(*position))
+
+        # Fetch one extra row to know whether another page exists
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def after(self, last_date, last_created_at, last_id):
+        return keyset_after(last_date, last_created_at, last_id)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(last))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def encode_cursor(self, transaction):
+        payload = [transaction.date.isoformat(), transaction.created_at.isoformat(), transaction.pk]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            last_date, last_created_at, last_id = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = (date.fromisoformat(last_date), parse_datetime(last_created_at), int(last_id))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[1] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
@@ -0,0 +1,199 @@
+# transactions/recurring.py
+
+import calendar
+import logging
+from datetime import timedelta
+
+from django.db import DatabaseError, transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from reports import rollups
+from .models import RecurringTransaction, Transaction
+from .versioning import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(day, months):
+    """Shift a date by whole months, clamping to the last day of the month."""
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(day, frequency):
+    if frequency == 'daily':
+        return day + timedelta(days=1)
+    if frequency == 'weekly':
+        return day + timedelta(weeks=1)
+    if frequency == 'monthly':
+        return add_months(day, 1)
+    if frequency == 'yearly':
+        return add_months(day, 12)
+    raise ValueError(f"Unknown frequency: {frequency}")
+
+
+def due_rules(today):
+    """Rules with at least one occurrence on or before `today` left to run."""
+    return RecurringTransaction.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gte=F('next_run_date')),
+        Q(total_executions__isnull=True) | Q(execution_count__lt=F('total_executions')),
+        next_run_date__lte=today,
+        category__isnull=False,
+    )
+
+
+def build_occurrences(rule, today, limit):
+    """
+    Generate the Transaction rows a rule owes up to `today` (catching up on
+    missed periods) and advance the rule in memory.
+    """
+    occurrences = []
+    run_date = rule.next_run_date
+    count = rule.execution_count
+
+    while (
+        run_date <= today
+        and len(occurrences) < limit
+        and (rule.end_date is None or run_date <= rule.end_date)
+        and (rule.total_executions is None or count < rule.total_executions)
+    ):
+        occurrences.append(Transaction(
+            user_id=rule.user_id,
+            category_id=rule.category_id,
+            type=rule.type,
+            amount=rule.amount,
+            description=rule.description,
+            date=run_date,
+            currency=rule.currency,
+            is_recurring=True,
+            recurrence=rule.frequency,
+            recurring_source=rule,
+        ))
+        count += 1
+        run_date = next_occurrence(run_date, rule.frequency)
+
+    rule.next_run_date = run_date
+    rule.execution_count = count
+    return occurrences
+
+
+def drop_existing_occurrences(occurrences):
+    """
+    Leave out occurrences that were already generated, e.g. because a client
+    moved a rule's next_run_date back over dates it had already run for. One
+    query per batch. The rule still advances past those dates, but they don't
+    count as new executions.
+    """
+    if not occurrences:
+        return occurrences
+
+    dates = [occurrence.date for occurrence in occurrences]
+    existing = set(
+        Transaction.objects.filter(
+            recurring_source__in={occurrence.recurring_source_id for occurrence in occurrences},
+            date__range=(min(dates), max(dates)),
+        ).values_list('recurring_source_id', 'date')
+    )
+
+    fresh = []
+    for occurrence in occurrences:
+        if (occurrence.recurring_source_id, occurrence.date) in existing:
+            occurrence.recurring_source.execution_count -= 1
+            logger.info("Recurring rule %s already ran on %s, skipped",
+                        occurrence.recurring_source_id, occurrence.date)
+        else:
+            fresh.append(occurrence)
+    return fresh
+
+
+def execute_rules(rules, today, max_catch_up, batch_size):
+    """
+    Generate, insert and count the occurrences `rules` owe, and advance the
+    rules. One query for existing occurrences, one bulk insert and one bulk
+    update. Returns the created transactions.
+    """
+    now = timezone.now()
+    created = []
+    for rule in rules:
+        created.extend(build_occurrences(rule, today, max_catch_up))
+        rule.updated_at = now
+    created = drop_existing_occurrences(created)
+
+    Transaction.objects.bulk_create(created, batch_size=batch_size)
+    rollups.add_transactions(created)
+    RecurringTransaction.objects.bulk_update(
+        rules,
+        ['next_run_date', 'execution_count', 'updated_at'],
+        batch_size=batch_size,
+    )
+    return created
+
+
+def run_due_recurring_transactions(today=None, batch_size=500, max_catch_up=366):
+    """
+    Execute every due recurring rule.
+
+    Rules are claimed in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+    overlapping cron runs split the work instead of duplicating it. Each batch
+    costs one select for the rules, one for occurrences that already exist,
+    one bulk insert and one bulk update. Existing occurrences are skipped per
+    rule, so one rule rewound onto dates it already ran for can't hold up
+    the rest of the batch; the unique (recurring_source, date) constraint
+    still backs that up.
+
+    If a batch fails anyway, its rules are retried one by one, each in its
+    own savepoint: a rule that still fails is logged and left for the next
+    run, and the others go ahead.
+
+    Returns a dict with the number of rules processed, rules that failed and
+    transactions created.
+    """
+    if batch_size < 1 or max_catch_up < 1:
+        # A rule that can't advance stays due and would be claimed forever
+        raise ValueError("batch_size and max_catch_up must be at least 1")
+
+    today = today or timezone.localdate()
+    result = {'rules': 0, 'failed': 0, 'transactions': 0}
+    failed = set()
+
+    while True:
+        with db_transaction.atomic():
+            rules = list(
+                due_rules(today)
+                .exclude(pk__in=failed)
+                .select_for_update(skip_locked=True)
+                .order_by('next_run_date', 'id')[:batch_size]
+            )
+            if not rules:
+                break
+
+            try:
+                with db_transaction.atomic():
+                    created = execute_rules(rules, today, max_catch_up, batch_size)
+                done = rules
+            except (DatabaseError, ValueError):
+                logger.warning("Recurring batch failed, retrying its rules one by one", exc_info=True)
+                # Fresh copies: the failed attempt advanced the rules in memory
+                rules = list(RecurringTransaction.objects.filter(pk__in=[rule.pk for rule in rules]).order_by('id'))
+                created, done = [], []
+                for rule in rules:
+                    try:
+                        with db_transaction.atomic():
+                            created += execute_rules([rule], today, max_catch_up, batch_size)
+                        done.append(rule)
+                    except (DatabaseError, ValueError):
+                        logger.exception("Recurring rule %s failed, skipped until the next run", rule.pk)
+                        failed.add(rule.pk)
+
+        # bulk_create/bulk_update skip the signals that version user data
+        for user_id in {rule.user_id for rule in done}:
+            bump_data_version(user_id)
+
+        result['rules'] += len(done)
+        result['transactions'] += len(created)
+
+    result['failed'] = len(failed)
+    return result
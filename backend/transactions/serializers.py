@@ -1,8 +1,26 @@
+from collections import Counter
+
 from rest_framework import serializers
 from .models import Transaction
-from categories.models import Category
+from categories.cache import get_category
 from categories.serializers import CategorySerializer
 from .models import Transaction, RecurringTransaction # Import the new model
+
+# Common currencies for validation (statement imports check them too)
+SUPPORTED_CURRENCIES = ['USD', 'EUR', 'CFA', 'JPY', 'CAD', 'AUD', 'CHF', 'CNY', 'INR', 'MXN']
+
+
+def resolve_category(context, category_id):
+    """
+    The user's Category with this ID, from context['categories'] when the
+    caller preloaded a map (batch requests), else from the category cache.
+    """
+    category = get_category(context['request'].user.pk, category_id, context.get('categories'))
+    if category is None:
+        raise serializers.ValidationError("You can only use your own categories.")
+    return category
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for Transaction model.
@@ -13,8 +31,8 @@ class TransactionSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
 
     # Write-only field for POST/PUT — accepts category ID
-    category_id = serializers.PrimaryKeyRelatedField(
-        queryset=Category.objects.all(),
+    # (resolved from the user's cached category map, no query)
+    category_id = serializers.IntegerField(
         source='category',
         write_only=True,
         required=True,
@@ -47,6 +65,9 @@ class TransactionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate_category_id(self, value):
+        return resolve_category(self.context, value)
+
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than zero.")
@@ -58,11 +79,14 @@ class TransactionSerializer(serializers.ModelSerializer):
         """
         user = self.context['request'].user
         category = attrs.get('category')
+        if category is None and self.partial and self.instance is not None:
+            # Partial updates keep the stored category unless they send one
+            category = self.instance.category
 
         if not category:
             raise serializers.ValidationError("Category is required.")
 
-        if category.user != user:
+        if category.user_id != user.id:
             raise serializers.ValidationError("You can only use your own categories.")
 
         # Validate currency
@@ -82,9 +106,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         """
         Validate currency code against ISO 4217 standard
         """
-        # Common currencies for validation
-        common_currencies = ['USD', 'EUR', 'CFA', 'JPY', 'CAD', 'AUD', 'CHF', 'CNY', 'INR', 'MXN']
-        return currency_code in common_currencies
+        return currency_code in SUPPORTED_CURRENCIES
 
     def create(self, validated_data):
         """
@@ -95,10 +117,44 @@ class TransactionSerializer(serializers.ModelSerializer):
 
 
 
+class TransactionBatchOperationSerializer(serializers.Serializer):
+    """
+    Envelope of a single batch operation.
+    """
+    OPERATION_CHOICES = ['create', 'update', 'delete']
+
+    client_id = serializers.CharField(max_length=64)
+    op = serializers.ChoiceField(choices=OPERATION_CHOICES)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] in ('update', 'delete') and 'id' not in attrs:
+            raise serializers.ValidationError({"id": "This field is required for update and delete."})
+        return attrs
+
+
+class TransactionBatchSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 500
+
+    operations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_OPERATIONS
+    )
+
+    def validate_operations(self, operations):
+        # Results are keyed by client_id, so two operations can't share one
+        counts = Counter(str(op['client_id']) for op in operations if op.get('client_id') is not None)
+        duplicates = sorted(client_id for client_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate client_id: {', '.join(duplicates)}")
+        return operations
+
+
 class RecurringTransactionSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
-        queryset=Category.objects.all(),
+    category_id = serializers.IntegerField(
         source='category',
         write_only=True
     )
@@ -112,6 +168,9 @@ class RecurringTransactionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'execution_count']
 
+    def validate_category_id(self, value):
+        return resolve_category(self.context, value)
+
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
@@ -0,0 +1,23 @@
+# transactions/signals.py
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from categories.models import Category
+from settings_app.models import UserSetting
+from .models import Transaction, RecurringTransaction
+from .versioning import bump_data_version
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+@receiver(post_save, sender=UserSetting)
+def bump_user_data_version(sender, instance, **kwargs):
+    user_id = instance.user_id
+    # Now, so the rest of this transaction sees the change, and again after
+    # commit, in case another request cached results before it committed
+    bump_data_version(user_id)
+    db_transaction.on_commit(lambda: bump_data_version(user_id))
@@ -0,0 +1,72 @@
+# transactions/summary.py
+
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from reports.rollups import rollups_for, totals_by_currency_and_type
+from .models import Transaction
+
+
+def empty_summary():
+    return {
+        'total_income': Decimal('0'),
+        'total_expense': Decimal('0'),
+        'balance': Decimal('0'),
+        'total_transactions': 0,
+    }
+
+
+def net_flow(balance):
+    return 'positive' if balance > 0 else 'negative' if balance < 0 else 'zero'
+
+
+def summarize_rows(rows):
+    """
+    Fold grouped (currency, type, total, count) rows into the per-currency
+    summary returned by the summary endpoint.
+    """
+    summary_by_currency = {}
+    for row in rows:
+        data = summary_by_currency.setdefault(row['currency'], empty_summary())
+        total = row['total'] or Decimal('0')
+
+        if row['type'] == 'income':
+            data['total_income'] += total
+        else:
+            data['total_expense'] += total
+        data['total_transactions'] += row['count']
+
+    for data in summary_by_currency.values():
+        data['balance'] = data['total_income'] - data['total_expense']
+        data['net_flow'] = net_flow(data['balance'])
+
+    return summary_by_currency
+
+
+def grouped_by_currency(transactions):
+    """(currency, type, total, count) rows computed in a single grouped query."""
+    return transactions.order_by().values('currency', 'type').annotate(
+        total=Sum('amount'),
+        count=Count('id'),
+    )
+
+
+def summarize_by_currency(transactions):
+    """
+    Income/expense totals per currency computed in a single grouped query.
+    Totals stay Decimal so no precision is lost on large histories.
+    """
+    return summarize_rows(grouped_by_currency(transactions))
+
+
+def summary_rows(user, filters):
+    """
+    Grouped rows behind the transaction summary endpoint for a
+    TransactionFilter: whole-month scopes (month/year or full history) come
+    from the rollup table, date ranges from raw transactions.
+    """
+    if not filters.has_date_range:
+        return totals_by_currency_and_type(rollups_for(user, **filters.rollup_filters()))
+
+    return grouped_by_currency(filters.apply(Transaction.objects.for_user(user)))
@@ -1,3 +1,836 @@
-from django.test import TestCase
+import base64
+import datetime
+import decimal
+import json
+import io
+import re
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from categories.models import Category
+from reports import rollups
+from reports.models import MonthlyRollup
+from sync.models import Tombstone
+from .checks import check_shared_cache
+from .filters import TransactionFilter
+from .importers import ImportedRow, TransactionImporter
+from .models import RecurringTransaction, Transaction
+from .recurring import run_due_recurring_transactions
+
+User = get_user_model()
+
+
+def access_paths(sql, tables):
+    """
+    {table: index} for each table from `tables` that the database plans to
+    read for `sql`; the index is None for a full scan.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            paths = {}
+            for *_, detail in cursor.fetchall():
+                # "SEARCH t USING INDEX i (...)" reads a range of i; "SCAN t"
+                # (even "USING [COVERING] INDEX") reads every row
+                match = re.match(r'(SCAN|SEARCH) (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', detail)
+                if match and match.group(2) in tables:
+                    paths[match.group(2)] = match.group(3) if match.group(1) == 'SEARCH' else None
+            return paths
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}')
+            columns = [column[0] for column in cursor.description]
+            plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return {
+                row['table']: None if row['type'] in ('ALL', 'index') else row['key']
+                for row in plan
+                if row['table'] in tables
+            }
+    raise NotImplementedError(connection.vendor)
+
+
+def index_names(model):
+    """Indexes and unique constraints declared in the model's Meta."""
+    return {index.name for index in model._meta.indexes} | {
+        constraint.name for constraint in model._meta.constraints
+    }
+
+
+class TransactionSummaryTests(TestCase):
+
+    # (type, amount, currency, date)
+    ROWS = [
+        ('income', '0.10', 'USD', datetime.date(2025, 1, 5)),
+        ('income', '0.20', 'USD', datetime.date(2025, 2, 5)),
+        ('expense', '1000000.01', 'USD', datetime.date(2025, 2, 20)),
+        ('income', '2500.00', 'EUR', datetime.date(2025, 3, 1)),
+        ('expense', '2500.00', 'EUR', datetime.date(2025, 3, 2)),
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='summary@example.com', username='summary', password='x')
+        self.categories = {
+            kind: Category.objects.create(user=self.user, name=kind.title(), type=kind)
+            for kind in ('income', 'expense')
+        }
+        for kind, amount, currency, date in self.ROWS:
+            self.add(kind, amount, currency, date)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, kind, amount, currency, date):
+        Transaction.objects.create(
+            user=self.user,
+            category=self.categories[kind],
+            type=kind,
+            amount=decimal.Decimal(amount),
+            date=date,
+            currency=currency,
+        )
+
+    def expected(self, rows):
+        """The summary computed row by row in Python, with Decimal arithmetic."""
+        summary = {}
+        for kind, amount, currency, _ in rows:
+            data = summary.setdefault(currency, {'total_income': 0, 'total_expense': 0, 'total_transactions': 0})
+            data['total_income' if kind == 'income' else 'total_expense'] += decimal.Decimal(amount)
+            data['total_transactions'] += 1
+        for data in summary.values():
+            data['balance'] = data['total_income'] - data['total_expense']
+            data['net_flow'] = 'positive' if data['balance'] > 0 else 'negative' if data['balance'] < 0 else 'zero'
+        return summary
+
+    def test_totals_are_exact_per_currency(self):
+        # Full history comes from the rollups, a date range from raw transactions
+        for query, rows in [
+            ({}, self.ROWS),
+            ({'start_date': '2025-02-01', 'end_date': '2025-03-01'}, self.ROWS[1:4]),
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(reverse('transaction-summary'), query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, self.expected(rows))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_one_query_whatever_the_row_count(self):
+        def summary_queries(path):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(path).status_code, 200)
+            return [query['sql'] for query in queries]
+
+        ranged = reverse('transaction-summary') + '?start_date=2024-01-01'
+        before = {path: summary_queries(path) for path in (reverse('transaction-summary'), ranged)}
+        for i in range(40):
+            self.add('expense', '1.00', 'USD', datetime.date(2024, 1 + i % 12, 1))
+
+        for path, queries in before.items():
+            with self.subTest(path=path):
+                self.assertEqual(len(queries), 1)
+                self.assertEqual(len(summary_queries(path)), 1)
+
+
+class TransactionKeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='pages@example.com', username='pages', password='x')
+        category = Category.objects.create(user=self.user, name='Food', type='expense')
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user,
+                category=category,
+                type='expense',
+                amount=decimal.Decimal('1.00') + i,
+                description=f"Row {i}",
+                date=datetime.date(2025, 1, 1 + i // 4),
+                currency='USD',
+            )
+            for i in range(11)
+        )
+        # Rows created in one statement can share a timestamp: only the id tells them apart
+        Transaction.objects.filter(user=self.user).update(
+            created_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, page_size):
+        """IDs from following `next` links until the last page."""
+        ids, url, pages = [], f"{reverse('transaction-list')}?page_size={page_size}", 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids += [row['id'] for row in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_pages_match_the_unpaginated_list(self):
+        full = [row['id'] for row in self.client.get(reverse('transaction-list')).data]
+
+        for page_size in (1, 2, 3, 4, 11, 50):
+            with self.subTest(page_size=page_size):
+                ids, pages = self.walk(page_size)
+                # Equal (date, created_at) across page boundaries: no row skipped or repeated
+                self.assertEqual(ids, full)
+                self.assertEqual(pages, max(1, -(-len(full) // page_size)))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('transaction-list'), {'page_size': 10000})
+        self.assertEqual(response.data['page_size'], 200)
+
+    def test_invalid_cursor_is_a_404(self):
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in [
+            'not base64!',
+            base64.urlsafe_b64encode(b'{not json').decode(),
+            encode(None),
+            encode(['2025-01-01', '2025-01-01T00:00:00+00:00']),
+            encode(['2025-13-01', '2025-01-01T00:00:00+00:00', 1]),
+            encode(['2025-01-01', 'yesterday', 1]),
+            encode(['2025-01-01', '2025-01-01T00:00:00+00:00', 'one']),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(reverse('transaction-list'), {'cursor': cursor}).status_code, 404)
+
+
+class TransactionFilterTests(TestCase):
+
+    def test_month_and_year_become_a_date_range(self):
+        for params, expected in [
+            ({'month': '2', 'year': '2024'}, (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))),
+            ({'month': '2', 'year': '2025'}, (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28))),
+            ({'month': '12', 'year': '2025'}, (datetime.date(2025, 12, 1), datetime.date(2025, 12, 31))),
+            ({'year': '2025'}, (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))),
+            # Explicit dates are intersected with the month/year scope
+            ({'year': '2025', 'start_date': '2025-06-15'}, (datetime.date(2025, 6, 15), datetime.date(2025, 12, 31))),
+            ({'month': '3', 'year': '2025', 'start_date': '2024-01-01', 'end_date': '2025-03-10'},
+             (datetime.date(2025, 3, 1), datetime.date(2025, 3, 10))),
+            ({'start_date': '2025-01-01'}, (datetime.date(2025, 1, 1), None)),
+            # Month alone spans every year: no range
+            ({'month': '3'}, (None, None)),
+            ({}, (None, None)),
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(TransactionFilter.from_params(params).date_range(), expected)
+
+    def test_month_only_matches_that_month_in_every_year(self):
+        user = User.objects.create_user(email='filter@example.com', username='filter', password='x')
+        category = Category.objects.create(user=user, name='Food', type='expense')
+        for date in [datetime.date(2024, 3, 31), datetime.date(2025, 3, 1), datetime.date(2025, 4, 1)]:
+            Transaction.objects.create(
+                user=user, category=category, type='expense', amount=decimal.Decimal('1.00'), date=date,
+            )
+
+        def dates(params):
+            transactions = TransactionFilter.from_params(params).apply(Transaction.objects.for_user(user))
+            return sorted(transactions.values_list('date', flat=True))
+
+        self.assertEqual(dates({'month': '3'}), [datetime.date(2024, 3, 31), datetime.date(2025, 3, 1)])
+        self.assertEqual(dates({'month': '3', 'year': '2025'}), [datetime.date(2025, 3, 1)])
+        self.assertEqual(dates({'year': '2024'}), [datetime.date(2024, 3, 31)])
+
+    def test_cache_key_is_the_same_for_equivalent_filters(self):
+        def key(params):
+            return TransactionFilter.from_params(params).cache_key()
+
+        for first, second in [
+            ({'month': '3', 'year': '2025'}, {'start_date': '2025-03-01', 'end_date': '2025-03-31'}),
+            ({'category': '7'}, {'category_id': '7'}),
+            ({'currency': 'eur'}, {'currency': 'EUR'}),
+            ({'type': 'income', 'currency': ''}, {'type': 'income', 'unknown': 'x'}),
+        ]:
+            with self.subTest(first=first, second=second):
+                self.assertEqual(key(first), key(second))
+
+        self.assertEqual(key({}), '')
+        self.assertNotEqual(key({'month': '3'}), key({'month': '3', 'year': '2025'}))
+        self.assertNotEqual(key({'type': 'income'}), key({'type': 'expense'}))
+        self.assertEqual(
+            key({'month': '3', 'year': '2025', 'type': 'income', 'category_id': '7', 'currency': 'usd'}),
+            'category_id=7&type=income&currency=USD&start=2025-03-01&end=2025-03-31',
+        )
+
+    def test_rollup_filters(self):
+        filters = TransactionFilter.from_params({
+            'month': '3', 'year': '2025', 'type': 'income', 'category': '7', 'currency': 'usd',
+            'start_date': '2025-03-02',
+        })
+
+        self.assertEqual(filters.rollup_filters(), {
+            'year': 2025, 'month': 3, 'transaction_type': 'income', 'category_id': 7, 'currency': 'USD',
+        })
+        # Rollups only know whole months: a start date must go to raw rows
+        self.assertTrue(filters.has_date_range)
+        self.assertFalse(TransactionFilter.from_params({'month': '3', 'year': '2025'}).has_date_range)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in [
+            {'month': '13'},
+            {'year': 'last'},
+            {'type': 'transfer'},
+            {'start_date': '2025-03-02', 'end_date': '2025-03-01'},
+            {'category': '1', 'category_id': '2'},
+            {'currency': 'EURO'},
+        ]:
+            with self.subTest(params=params), self.assertRaises(ValidationError):
+                TransactionFilter.from_params(params)
+
+
+class TransactionQueryPlanTests(TestCase):
+    """
+    The list, summary, report and sync endpoints must reach transactions and
+    rollups through the (user, ...) indexes, never a full table scan.
+    """
+
+    # (url name, query string)
+    ENDPOINTS = [
+        ('transaction-list', ''),
+        ('transaction-list', 'start_date=2024-03-01&end_date=2024-06-30'),
+        ('transaction-list', 'type=expense'),
+        ('transaction-list', 'currency=EUR'),
+        ('transaction-list', 'month=3&year=2024'),
+        ('transaction-list', 'page_size=50'),
+        ('transaction-summary', ''),
+        ('transaction-summary', 'start_date=2024-03-01&end_date=2024-06-30'),
+        ('transaction-summary', 'type=income&start_date=2024-01-01'),
+        ('report-summary', 'year=2024'),
+        ('report-summary', 'start_date=2024-03-01&end_date=2024-06-30&currency=USD'),
+        ('report-export', 'file_format=csv&start_date=2024-03-01'),
+        ('delta-sync', ''),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='plans@example.com', username='plans', password='x')
+        other = User.objects.create_user(email='other@example.com', username='other', password='x')
+        for owner in (cls.user, other):
+            categories = Category.objects.bulk_create(
+                Category(user=owner, name=f"Category {i}", type='expense' if i % 2 else 'income')
+                for i in range(4)
+            )
+            created = Transaction.objects.bulk_create(
+                Transaction(
+                    user=owner,
+                    category=categories[i % 4],
+                    type=categories[i % 4].type,
+                    amount=decimal.Decimal('12.50') + i,
+                    date=datetime.date(2024, 1 + i % 12, 1 + i % 28),
+                    currency='EUR' if i % 3 else 'USD',
+                    description=f"Row {i}",
+                )
+                for i in range(200)
+            )
+            rollups.add_transactions(created)
+        cls.category = Category.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_endpoints_use_indexes(self):
+        if connection.vendor not in ('sqlite', 'mysql'):
+            self.skipTest(f"No query plan check for {connection.vendor}")
+
+        transactions, rollups_table = Transaction._meta.db_table, MonthlyRollup._meta.db_table
+        composite = index_names(Transaction)
+        endpoints = [*self.ENDPOINTS, ('transaction-list', f'category={self.category.pk}')]
+        for name, query in endpoints:
+            url = reverse(name) + (f'?{query}' if query else '')
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+
+                checked = 0
+                for query in queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or not (transactions in sql or rollups_table in sql):
+                        continue
+                    paths = access_paths(sql, {transactions, rollups_table})
+                    if transactions in paths:
+                        self.assertIn(paths[transactions], composite, f"Transactions read without a composite index: {sql}")
+                    if rollups_table in paths:
+                        self.assertIsNotNone(paths[rollups_table], f"Full scan of the rollup table: {sql}")
+                    checked += len(paths)
+                self.assertTrue(checked, f"{url} read no transactions or rollups")
+
+
+class TransactionIndexTests(TestCase):
+
+    def test_migrations_create_the_composite_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Transaction._meta.db_table)
+        for index in Transaction._meta.indexes:
+            with self.subTest(index=index.name):
+                self.assertIn(index.name, constraints)
+                self.assertEqual(constraints[index.name]['columns'], [
+                    Transaction._meta.get_field(field).column for field in index.fields
+                ])
+
+    def test_filters_leave_the_date_column_bare(self):
+        """Function calls on the date column (month/year lookups) can't use a (user, ..., date) index."""
+        user = User.objects.create_user(email='sargable@example.com', username='sargable', password='x')
+        for params in [{'month': '3', 'year': '2025'}, {'year': '2025'}, {'start_date': '2025-01-01'},
+                       {'type': 'expense', 'year': '2025'}, {'currency': 'eur', 'month': '12', 'year': '2024'}]:
+            with self.subTest(params=params):
+                queryset = TransactionFilter.from_params(params).apply(Transaction.objects.for_user(user))
+                sql = str(queryset.query).lower()
+                self.assertNotIn('extract', sql)
+                self.assertNotIn('strftime', sql)
+                self.assertIn('"date" >=', sql.replace('`', '"'))
+
+
+class RecurringSchedulerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='rules@example.com', username='rules', password='x')
+        self.category = Category.objects.create(user=self.user, name='Rent', type='expense')
+
+    def rule(self, next_run_date, **fields):
+        return RecurringTransaction.objects.create(
+            user=self.user,
+            category=self.category,
+            amount=decimal.Decimal('100.00'),
+            description='Rent',
+            type='expense',
+            frequency='monthly',
+            next_run_date=next_run_date,
+            **fields,
+        )
+
+    def test_rewound_rule_does_not_block_the_batch(self):
+        rewound = self.rule(datetime.date(2025, 1, 1))
+        run_due_recurring_transactions(today=datetime.date(2025, 2, 1))
+        self.assertEqual(Transaction.objects.filter(recurring_source=rewound).count(), 2)
+
+        # A client moves the rule back onto dates it already ran for
+        RecurringTransaction.objects.filter(pk=rewound.pk).update(next_run_date=datetime.date(2025, 1, 1))
+        other = self.rule(datetime.date(2025, 2, 15))
+
+        result = run_due_recurring_transactions(today=datetime.date(2025, 3, 1))
+
+        self.assertEqual(result['rules'], 2)
+        self.assertEqual(
+            list(Transaction.objects.filter(recurring_source=rewound).values_list('date', flat=True).order_by('date')),
+            [datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)],
+        )
+        self.assertEqual(Transaction.objects.filter(recurring_source=other).count(), 1)
+
+        rewound.refresh_from_db()
+        self.assertEqual(rewound.next_run_date, datetime.date(2025, 4, 1))
+        self.assertEqual(rewound.execution_count, 3)
+
+        monthly = MonthlyRollup.objects.filter(user=self.user).order_by('year', 'month')
+        self.assertEqual([(r.month, r.count) for r in monthly], [(1, 1), (2, 2), (3, 1)])
+
+    def test_catch_up_limit_must_be_positive(self):
+        self.rule(datetime.date(2025, 1, 1))
+        for limit in (0, -1):
+            with self.subTest(limit=limit), self.assertRaises(ValueError):
+                run_due_recurring_transactions(today=datetime.date(2025, 3, 1), max_catch_up=limit)
+        with self.assertRaises(CommandError):
+            call_command('run_recurring_transactions', '--max-catch-up=0', stdout=io.StringIO())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_failing_rules_do_not_block_the_others(self):
+        broken = self.rule(datetime.date(2025, 1, 1))
+        RecurringTransaction.objects.filter(pk=broken.pk).update(frequency='hourly')
+        raced = self.rule(datetime.date(2025, 1, 1))
+        healthy = self.rule(datetime.date(2025, 1, 1))
+        # Written outside the scheduler after its existence check
+        Transaction.objects.create(
+            user=self.user, category=self.category, amount=decimal.Decimal('1.00'), type='expense',
+            date=datetime.date(2025, 1, 1), recurring_source=raced,
+        )
+
+        with mock.patch('transactions.recurring.drop_existing_occurrences', side_effect=lambda occurrences: occurrences), \
+                self.assertLogs('transactions.recurring', 'WARNING'):
+            result = run_due_recurring_transactions(today=datetime.date(2025, 2, 1), batch_size=2)
+
+        self.assertEqual((result['rules'], result['failed']), (1, 2))
+        self.assertEqual(Transaction.objects.filter(recurring_source=healthy).count(), 2)
+        healthy.refresh_from_db()
+        self.assertEqual(healthy.next_run_date, datetime.date(2025, 3, 1))
+        raced.refresh_from_db()
+        self.assertEqual((raced.next_run_date, raced.execution_count), (datetime.date(2025, 1, 1), 0))
+
+
+class TransactionBatchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='batch@example.com', username='batch', password='x')
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_transactions(self, count):
+        return [
+            Transaction.objects.create(
+                user=self.user,
+                category=self.category,
+                type='expense',
+                amount=decimal.Decimal('10.00'),
+                description=f"Row {i}",
+                date=datetime.date(2025, 1 + i % 3, 1),
+                currency='USD',
+            )
+            for i in range(count)
+        ]
+
+    def batch(self, operations):
+        return self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json')
+
+    def test_partial_update_keeps_category(self):
+        transaction, = self.create_transactions(1)
+        response = self.batch([{'client_id': 'a', 'op': 'update', 'id': transaction.pk, 'data': {'amount': '25.00'}}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results']['a']['status'], 'updated')
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.amount, decimal.Decimal('25.00'))
+        self.assertEqual(transaction.category, self.category)
+
+    def test_duplicate_client_ids_are_rejected(self):
+        transaction, = self.create_transactions(1)
+        response = self.batch([
+            {'client_id': 'a', 'op': 'create', 'data': {'amount': '5', 'type': 'expense', 'date': '2025-01-01',
+                                                       'description': 'x', 'category_id': self.category.pk}},
+            {'client_id': 'a', 'op': 'delete', 'id': transaction.pk},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('operations', response.data)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_delete_cost_does_not_grow_with_batch_size(self):
+        def delete(count):
+            operations = [
+                {'client_id': str(transaction.pk), 'op': 'delete', 'id': transaction.pk}
+                for transaction in self.create_transactions(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.batch(operations)
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        delete(3)  # Warm the category cache
+        self.assertEqual(delete(3), delete(30))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(Tombstone.objects.filter(user=self.user, model='transaction').count(), 36)
+        self.assertFalse(MonthlyRollup.objects.filter(user=self.user, count__gt=0).exists())
+
+    def test_created_ids_without_returning_rows(self):
+        existing, = self.create_transactions(1)
+        operations = [
+            {'client_id': f'c{i}', 'op': 'create', 'data': {
+                'amount': f'{i + 1}.00', 'type': 'expense', 'date': '2025-01-01',
+                'description': f'New {i}', 'category_id': self.category.pk,
+            }}
+            for i in range(5)
+        ]
+
+        # As on MySQL, where bulk_create() can't read the new primary keys back
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.batch(operations)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('INSERT INTO "transactions_transaction"' in q['sql'] for q in queries), 1)
+        for i in range(5):
+            result = response.data['results'][f'c{i}']
+            self.assertEqual(result['status'], 'created')
+            created = Transaction.objects.get(pk=result['id'])
+            self.assertNotEqual(created.pk, existing.pk)
+            self.assertEqual(created.description, f'New {i}')
+
+    def test_nothing_references_transactions(self):
+        # The batch delete skips the deletion collector; a foreign key to
+        # Transaction would need it for its on_delete
+        self.assertEqual(Transaction._meta.related_objects, ())
+
+
+@override_settings(SHARED_CACHE=False)
+class QueryCountTests(TestCase):
+    """Query counts must not grow with the amount of data (no N+1 queries)."""
+
+    ROWS = 25
+
+    # (url name, query string)
+    ENDPOINTS = [
+        ('transaction-list', ''),
+        ('transaction-list', 'page_size=200'),
+        ('transaction-summary', ''),
+        ('transaction-summary', 'start_date=2000-01-01&end_date=2099-12-31'),
+        ('report-summary', ''),
+        ('report-summary', 'start_date=2000-01-01&end_date=2099-12-31'),
+        ('report-export', 'file_format=csv'),
+        ('categories:category-list', ''),
+        ('recurring-transaction-list', ''),
+        ('delta-sync', ''),
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='queries@example.com', username='queries', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def grow(self, count):
+        """Add `count` transactions spread over new categories, months and currencies."""
+        offset = Transaction.objects.filter(user=self.user).count()
+        categories = [
+            Category.objects.create(user=self.user, name=f"Category {offset + i}", type=('income', 'expense')[i % 2])
+            for i in range(max(count // 10, 2))
+        ]
+        for category in categories:
+            RecurringTransaction.objects.create(
+                user=self.user,
+                category=category,
+                amount=decimal.Decimal('5.00'),
+                description=category.name,
+                type=category.type,
+                frequency='monthly',
+                next_run_date=datetime.date(2099, 1, 1),
+            )
+        return [
+            Transaction.objects.create(
+                user=self.user,
+                category=categories[i % len(categories)],
+                type=categories[i % len(categories)].type,
+                amount=decimal.Decimal('10.00') + i,
+                date=datetime.date(2024 + i % 2, 1 + i % 12, 1 + i % 28),
+                currency='EUR' if i % 3 else 'USD',
+                description=f"Row {offset + i}",
+            )
+            for i in range(count)
+        ]
+
+    def queries(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_reads(self):
+        def measure():
+            return {
+                (name, query): self.queries(
+                    lambda: self.client.get(reverse(name) + (f'?{query}' if query else ''))
+                )
+                for name, query in self.ENDPOINTS
+            }
+
+        self.grow(self.ROWS)
+        before = measure()
+        self.grow(self.ROWS * 3)
+        after = measure()
+
+        for endpoint in before:
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(after[endpoint], before[endpoint])
+
+    def test_batch(self):
+        category = Category.objects.create(user=self.user, name='Food', type='expense')
+
+        def batch(count):
+            # Rollups are updated once per (month, currency, type, category)
+            # bucket; keep those fixed so only the row count changes
+            rows = [
+                Transaction.objects.create(
+                    user=self.user, category=category, type='expense', amount=decimal.Decimal('2.00'),
+                    date=datetime.date(2025, 1 + i % 2, 1), currency='USD', description=f"Row {i}",
+                )
+                for i in range(count * 2)
+            ]
+            operations = [
+                {'client_id': f'new-{i}', 'op': 'create', 'data': {
+                    'amount': '3.00', 'type': 'expense', 'date': f'2025-0{1 + i % 2}-01',
+                    'description': 'New', 'category_id': category.pk,
+                }}
+                for i in range(count)
+            ] + [
+                {'client_id': f'edit-{row.pk}', 'op': 'update', 'id': row.pk, 'data': {'amount': '4.00'}}
+                for row in rows[:count]
+            ] + [
+                {'client_id': f'drop-{row.pk}', 'op': 'delete', 'id': row.pk}
+                for row in rows[count:]
+            ]
+            return self.queries(
+                lambda: self.client.post(reverse('transaction-batch'), {'operations': operations}, format='json')
+            )
+
+        batch(2)  # Creates the rollup buckets
+        self.assertEqual(batch(self.ROWS // 5), batch(self.ROWS * 4 // 5))
+
+
+class StatementImportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='import@example.com', username='import', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, **data):
+        upload = SimpleUploadedFile('statement.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('transaction-import'), {'file': upload, **data}, format='multipart')
+
+    def test_invalid_rows_are_reported_not_raised(self):
+        response = self.upload(
+            "date,amount,description,currency\n"
+            "2025-01-01,NaN,not a number,USD\n"
+            "2025-01-02,Infinity,infinite,USD\n"
+            "2025-01-03,-12.50,bad currency,DOLLARS\n"
+            "2025-01-04,100000000000,too wide,USD\n"
+            "2025-01-05,1.005,too precise,USD\n"
+            "2025-01-06,-12.50,fine,eur\n"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], 5)
+        transaction = Transaction.objects.get(user=self.user)
+        self.assertEqual((transaction.description, transaction.currency), ('fine', 'EUR'))
+
+    def test_invalid_default_currency_is_rejected(self):
+        response = self.upload("date,amount\n2025-01-01,5\n", currency='DOLLARS')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_other_users_rows_are_not_duplicates(self):
+        statement = "date,amount,description\n2025-01-01,-9.99,Coffee\n"
+        other = User.objects.create_user(email='other-import@example.com', username='other-import', password='x')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        other_client.post(reverse('transaction-import'), {
+            'file': SimpleUploadedFile('statement.csv', statement.encode(), content_type='text/csv'),
+        }, format='multipart')
+
+        first = self.upload(statement)
+        again = self.upload(statement)
+
+        self.assertEqual((first.data['created'], first.data['duplicates']), (1, 0))
+        self.assertEqual((again.data['created'], again.data['duplicates']), (0, 1))
+
+    def test_rows_only_use_categories_of_their_type(self):
+        food = Category.objects.create(user=self.user, name='Food', type='expense')
+        response = self.upload(
+            "date,amount,description,category\n"
+            "2025-01-01,-20.00,Lunch,Food\n"
+            "2025-01-02,15.00,Refund,food\n"
+            "2025-01-03,5.00,Another refund,Food\n"
+        )
+
+        self.assertEqual(response.data['created'], 3)
+        refund_category = Category.objects.get(user=self.user, name__iexact='food (income)')
+        self.assertEqual(refund_category.type, 'income')
+        self.assertEqual(
+            sorted(Transaction.objects.filter(user=self.user).values_list('type', 'category_id')),
+            [('expense', food.pk), ('income', refund_category.pk), ('income', refund_category.pk)],
+        )
+
+    def test_rows_match_bulk_create(self):
+        self.upload("date,amount,description,currency\n2025-03-04,-12.34,Coffee,eur\n")
+
+        imported = Transaction.objects.get(user=self.user)
+        self.assertEqual(
+            (imported.amount, imported.date, imported.currency, imported.is_recurring, imported.recurrence),
+            (decimal.Decimal('12.34'), datetime.date(2025, 3, 4), 'EUR', False, None),
+        )
+        self.assertIsNotNone(imported.created_at)
+        self.assertEqual(imported.created_at, imported.updated_at)
+        self.assertEqual(MonthlyRollup.objects.get(user=self.user).total, decimal.Decimal('12.34'))
+
+    @skipUnless(connection.vendor == 'sqlite', "The floor is set for SQLite")
+    def test_write_throughput(self):
+        # The INSERT alone runs at ~50k rows/s on the in-memory test database
+        # (ten indexes on the table); parsing, fingerprints and the
+        # duplicate lookup bring a whole import to ~20k. bulk_create() ran at
+        # ~6k, so this floor fails if writes fall back to it.
+        rows = [
+            ImportedRow(i, datetime.date(2024, 1 + i % 12, 1 + i % 28), decimal.Decimal(i % 5000 + 1) / 100,
+                        f"Row {i}", ('Food', 'Rent', '')[i % 3], 'USD', 'expense')
+            for i in range(20000)
+        ]
+        importer = TransactionImporter(self.user, batch_size=5000)
+
+        started = time.perf_counter()
+        stats = importer.run(rows)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(stats['created'], len(rows))
+        self.assertGreaterEqual(len(rows) / elapsed, 12000, f"{len(rows) / elapsed:,.0f} rows/s")
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='etag@example.com', username='etag', password='x')
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, amount):
+        Transaction.objects.create(
+            user=self.user,
+            category=self.category,
+            type='expense',
+            amount=decimal.Decimal(amount),
+            date=datetime.date(2025, 1, 1),
+            currency='USD',
+        )
+
+    def test_write_within_the_same_second_is_not_a_304(self):
+        self.add('1.00')
+        first = self.client.get(reverse('transaction-summary'))
+        self.assertEqual(self.client.get(reverse('transaction-summary'), HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.add('2.00')
+        changed = self.client.get(reverse('transaction-summary'), HTTP_IF_NONE_MATCH=first['ETag'])
+        # Whole seconds: "modified since" this second can't see the second write
+        this_second = self.client.get(
+            reverse('transaction-summary'),
+            HTTP_IF_MODIFIED_SINCE=datetime.datetime.now(datetime.timezone.utc).strftime('%a, %d %b %Y %H:%M:%S GMT'),
+        )
+
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(this_second.status_code, 200)
+        self.assertNotIn('Last-Modified', this_second)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_etag_without_a_shared_cache(self):
+        response = self.client.get(reverse('transaction-summary'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    def test_process_local_cache_fails_the_deploy_check(self):
+        for backend in ('locmem.LocMemCache', 'dummy.DummyCache'):
+            with self.subTest(backend=backend), override_settings(
+                CACHES={'default': {'BACKEND': f'django.core.cache.backends.{backend}'}}
+            ):
+                self.assertEqual([error.id for error in check_shared_cache(None)], ['transactions.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/0',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
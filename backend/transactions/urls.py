@@ -1,9 +1,12 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.transaction_list, name='transaction-list'),
     path('<int:pk>/', views.transaction_detail, name='transaction-detail'),
     path('summary/', views.transaction_summary, name='transaction-summary'),
+    path('summary/async/', async_views.transaction_summary_async, name='transaction-summary-async'),
+    path('batch/', views.transaction_batch, name='transaction-batch'),
+    path('import/', views.transaction_import, name='transaction-import'),
     path('recurring/', views.recurring_transaction_create, name='transaction-recurring'),
 ]
@@ -0,0 +1,103 @@
+# transactions/versioning.py
+
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+VERSION_KEY = 'user-data-version:{user_id}'
+
+
+def _fresh_version():
+    # Time-based start so a version lost to cache eviction never repeats
+    return time.time_ns() // 1000
+
+
+def get_data_version(user_id):
+    """
+    Current version of a user's financial data. Changes whenever one of
+    their transactions, categories, recurring rules or settings is written,
+    so it can key caches that must never serve stale data.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_data_version(user_id):
+    """get_data_version() for async views, through the async cache API."""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _fresh_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_data_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def data_etag(request, *args, **kwargs):
+    """
+    ETag for a response built only from the requesting user's data: the data
+    version plus everything else the body depends on (URL with query string,
+    negotiated format). Costs a cache read, no query.
+
+    None (no ETag, never a 304) without a shared cache (settings.SHARED_CACHE):
+    another process's version bump would go unseen.
+    """
+    if not getattr(settings, 'SHARED_CACHE', False):
+        return None
+    renderer = getattr(request, 'accepted_renderer', None)
+    version = getattr(request, 'data_version', None)
+    parts = [
+        request.user.pk,
+        version if version is not None else get_data_version(request.user.pk),
+        request.get_full_path(),
+        renderer.format if renderer else 'json',
+    ]
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+_conditional = condition(etag_func=data_etag)
+
+
+def conditional_on_data_version(view):
+    """
+    Conditional GET (ETag, 304 Not Modified) for views whose response
+    depends only on the user's data. Goes below @api_view / @jwt_required
+    so request.user is authenticated when it runs.
+
+    No Last-Modified: it has a one-second resolution, so a second write in
+    the same second would answer If-Modified-Since with a stale 304.
+
+    condition() calls its functions synchronously, so for async views the
+    version is read first with the async cache API and handed over on the
+    request.
+    """
+    if not iscoroutinefunction(view):
+        return _conditional(view)
+
+    conditional_view = _conditional(view)
+
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        if getattr(settings, 'SHARED_CACHE', False):
+            request.data_version = await aget_data_version(request.user.pk)
+        return await conditional_view(request, *args, **kwargs)
+
+    return inner
@@ -1,18 +1,53 @@
 # transactions/views.py
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Transaction
 from .serializers import TransactionSerializer
-from django.db.models import Sum
+from .filters import TransactionFilter
+from .summary import summarize_rows, summary_rows
+from .pagination import TransactionKeysetPagination
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+import io
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from categories.cache import get_category_map
+from reports import rollups
+from reports.cache import summary_cache
+from sync.signals import record_tombstones
+from .versioning import bump_data_version, conditional_on_data_version
+from .importers import PARSERS, ImportFormatError, TransactionImporter, detect_format
+from .serializers import (
+    TransactionBatchOperationSerializer,
+    TransactionBatchSerializer,
+)
+
 from rest_framework import viewsets # Add this import
 from .models import Transaction, RecurringTransaction # Add RecurringTransaction
 from .serializers import TransactionSerializer, RecurringTransactionSerializer # Add Serializer
 
+# Fields a batch update may change
+UPDATABLE_FIELDS = [
+    'type', 'amount', 'description', 'date', 'category', 'currency',
+    'is_recurring', 'recurrence', 'updated_at',
+]
+
+
+def default_currency(user):
+    """
+    Currency applied when the client doesn't send one
+    """
+    # Get user's preferred currency if available
+    if hasattr(user, 'profile') and hasattr(user.profile, 'currency'):
+        return user.profile.currency
+    return 'CFA'  # Default to CFA
+
+
 @swagger_auto_schema(
     method='get',
     operation_description="Get list of user's transactions with optional filters.",
@@ -21,10 +56,15 @@ from .serializers import TransactionSerializer, RecurringTransactionSerializer #
         openapi.Parameter('type', openapi.IN_QUERY, description="Filter by type: 'income' or 'expense'", type=openapi.TYPE_STRING, enum=['income', 'expense']),
         openapi.Parameter('start_date', openapi.IN_QUERY, description="Filter transactions from this date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
         openapi.Parameter('end_date', openapi.IN_QUERY, description="Filter transactions up to this date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('month', openapi.IN_QUERY, description="Filter by month (1-12)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('year', openapi.IN_QUERY, description="Filter by year (YYYY)", type=openapi.TYPE_INTEGER),
         openapi.Parameter('currency', openapi.IN_QUERY, description="Filter by currency code", type=openapi.TYPE_STRING),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from the previous page's 'next' link (enables paginated mode)", type=openapi.TYPE_STRING),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description="Page size for paginated mode (max 200, enables paginated mode)", type=openapi.TYPE_INTEGER),
     ],
     responses={
         200: TransactionSerializer(many=True),
+        400: 'Invalid filter',
         401: 'Unauthorized',
     }
 )
@@ -42,31 +82,23 @@ from .serializers import TransactionSerializer, RecurringTransactionSerializer #
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_on_data_version
 def transaction_list(request):
     """
     GET: List user's transactions (with optional filters)
     POST: Create new transaction
     """
     if request.method == 'GET':
-        transactions = Transaction.objects.filter(user=request.user)
-
-        # Optional filtering
-        category_id = request.query_params.get('category')
-        transaction_type = request.query_params.get('type')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        currency = request.query_params.get('currency')
-
-        if category_id:
-            transactions = transactions.filter(category_id=category_id)
-        if transaction_type:
-            transactions = transactions.filter(type=transaction_type)
-        if start_date:
-            transactions = transactions.filter(date__gte=start_date)
-        if end_date:
-            transactions = transactions.filter(date__lte=end_date)
-        if currency:
-            transactions = transactions.filter(currency=currency)
+        # Optional filtering (invalid values are a 400)
+        filters = TransactionFilter.from_params(request.query_params)
+        transactions = filters.apply(Transaction.objects.for_user(request.user).with_category())
+
+        # Keyset pagination when the client asks for pages (cursor/page_size)
+        paginator = TransactionKeysetPagination()
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(transactions, request)
+            serializer = TransactionSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = TransactionSerializer(transactions, many=True)
         return Response(serializer.data)
@@ -84,11 +116,7 @@ def transaction_list(request):
 
         # Set default currency if not provided
         if 'currency' not in data:
-            # Get user's preferred currency if available
-            if hasattr(request.user, 'profile') and hasattr(request.user.profile, 'currency'):
-                data['currency'] = request.user.profile.currency
-            else:
-                data['currency'] = 'CFA'  # Default to CFA
+            data['currency'] = default_currency(request.user)
 
         # Pass the request context to the serializer
         serializer = TransactionSerializer(data=data, context={'request': request})
@@ -159,7 +187,7 @@ def transaction_detail(request, pk):
     DELETE: Delete transaction
     """
     try:
-        transaction = Transaction.objects.get(pk=pk, user=request.user)
+        transaction = Transaction.objects.for_user(request.user).with_category().get(pk=pk)
     except Transaction.DoesNotExist:
         return Response({'error': 'Transaction not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -217,63 +245,220 @@ def transaction_detail(request, pk):
                 }
             )
         ),
+        400: 'Invalid filter',
         401: 'Unauthorized',
     }
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_on_data_version
 def transaction_summary(request):
-    transactions = Transaction.objects.filter(user=request.user)
-
-    # Apply filters
-    category_id = request.query_params.get('category')
-    transaction_type = request.query_params.get('type')
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    month = request.query_params.get('month')
-    year = request.query_params.get('year')
-    currency = request.query_params.get('currency')
-
-    if category_id:
-        transactions = transactions.filter(category_id=category_id)
-    if transaction_type:
-        transactions = transactions.filter(type=transaction_type)
-    if start_date:
-        transactions = transactions.filter(date__gte=start_date)
-    if end_date:
-        transactions = transactions.filter(date__lte=end_date)
-    if month:
-        transactions = transactions.filter(date__month=int(month))
-    if year:
-        transactions = transactions.filter(date__year=int(year))
-    if currency:
-        transactions = transactions.filter(currency=currency)
-
-    # Group by currency for multi-currency support
-    summary_by_currency = {}
-    for transaction in transactions:
-        curr = transaction.currency
-        if curr not in summary_by_currency:
-            summary_by_currency[curr] = {
-                'total_income': 0,
-                'total_expense': 0,
-                'balance': 0,
-                'total_transactions': 0
-            }
-
-        if transaction.type == 'income':
-            summary_by_currency[curr]['total_income'] += float(transaction.amount)
+    # Group by currency for multi-currency support (one grouped query)
+    filters = TransactionFilter.from_params(request.query_params)
+    # Served from the per-user versioned cache while the data is unchanged
+    payload, hit = summary_cache.get_or_compute(
+        'transaction-summary',
+        request.user,
+        filters,
+        lambda: summarize_rows(summary_rows(request.user, filters)),
+    )
+    return Response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description=(
+        "Apply many create/update/delete operations in one request (offline sync). "
+        "Each operation carries a client_id; results are returned per client_id. "
+        "Valid operations are written in a single database transaction."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['operations'],
+        properties={
+            'operations': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    required=['client_id', 'op'],
+                    properties={
+                        'client_id': openapi.Schema(type=openapi.TYPE_STRING),
+                        'op': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete']),
+                        'id': openapi.Schema(type=openapi.TYPE_INTEGER, description="Server ID (update/delete)"),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT, description="Transaction fields (create/update)"),
+                    }
+                )
+            ),
+        }
+    ),
+    responses={
+        200: 'Per-operation results keyed by client_id',
+        400: 'Bad Request',
+        401: 'Unauthorized',
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def transaction_batch(request):
+    """
+    POST: Replay queued offline operations in one request
+    """
+    envelope = TransactionBatchSerializer(data=request.data)
+    if not envelope.is_valid():
+        return Response(envelope.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    operations = []
+    results = {}
+    for index, raw in enumerate(envelope.validated_data['operations']):
+        operation = TransactionBatchOperationSerializer(data=raw)
+        if operation.is_valid():
+            operations.append(operation.validated_data)
         else:
-            summary_by_currency[curr]['total_expense'] += float(transaction.amount)
+            client_id = str(raw.get('client_id') or index)
+            results[client_id] = {'status': 'error', 'errors': operation.errors}
+
+    # Categories come from the user's cached map; one query for every existing transaction referenced
+    categories = get_category_map(request.user.pk)
+    targets = Transaction.objects.for_user(request.user).with_category().filter(
+        id__in=[op['id'] for op in operations if 'id' in op]
+    ).in_bulk()
+
+    context = {'request': request, 'categories': categories}
+    to_create, to_update, to_delete = [], [], []
+    previous = {}
+    touched = set()
+
+    for op in operations:
+        client_id = op['client_id']
+
+        if op['op'] != 'create':
+            instance = targets.get(op['id'])
+            if instance is None or op['id'] in touched:
+                error = "Transaction not found" if instance is None else "Transaction already changed in this batch"
+                results[client_id] = {'status': 'error', 'errors': {'id': [error]}}
+                continue
+            touched.add(op['id'])
+
+        if op['op'] == 'delete':
+            to_delete.append((client_id, instance))
+            continue
+
+        data = dict(op['data'])
+        if op['op'] == 'create':
+            data.setdefault('currency', default_currency(request.user))
+            serializer = TransactionSerializer(data=data, context=context)
+        else:
+            serializer = TransactionSerializer(instance, data=data, context=context, partial=True)
+
+        if not serializer.is_valid():
+            results[client_id] = {'status': 'error', 'errors': serializer.errors}
+            continue
 
-        summary_by_currency[curr]['balance'] = summary_by_currency[curr]['total_income'] - summary_by_currency[curr]['total_expense']
-        summary_by_currency[curr]['total_transactions'] += 1
+        validated = dict(serializer.validated_data)
+        validated.pop('next_run_date', None)  # Mapped onto date by the serializer
+
+        if op['op'] == 'create':
+            to_create.append((client_id, Transaction(user=request.user, **validated)))
+        else:
+            previous[instance.pk] = (rollups.bucket_key(instance), instance.amount)
+            for attr, value in validated.items():
+                setattr(instance, attr, value)
+            to_update.append((client_id, instance))
+
+    with db_transaction.atomic():
+        created = [instance for _, instance in to_create]
+        # One INSERT; the client needs the new IDs to map its own
+        Transaction.objects.bulk_create_with_ids(created)
+        rollups.add_transactions(created)
+
+        if to_update:
+            now = timezone.now()
+            updated = [instance for _, instance in to_update]
+            for instance in updated:
+                instance.updated_at = now
+            Transaction.objects.bulk_update(updated, UPDATABLE_FIELDS)
+            rollups.move_transactions(
+                (*previous[instance.pk], instance) for instance in updated
+            )
+
+        if to_delete:
+            deleted = [instance for _, instance in to_delete]
+            # Queryset.delete() would send post_delete per row: a rollup
+            # UPDATE, a tombstone INSERT and two version bumps each. Apply
+            # the rollup deltas and tombstones in bulk instead and issue one
+            # DELETE with _raw_delete(), which skips the collector. That is
+            # only safe while no model has a foreign key to Transaction (no
+            # cascade or SET_NULL to run) and the post_delete receivers do no
+            # more than the work done here (reports/signals.py,
+            # sync/signals.py, transactions/signals.py); TransactionBatchTests
+            # asserts the first.
+            rollups.remove_transactions(deleted)
+            record_tombstones('transaction', request.user.pk, [instance.pk for instance in deleted])
+            Transaction.objects.filter(pk__in=[instance.pk for instance in deleted])._raw_delete(
+                Transaction.objects.db
+            )
 
-    # Add net_flow for each currency
-    for curr, data in summary_by_currency.items():
-        data['net_flow'] = 'positive' if data['balance'] > 0 else 'negative' if data['balance'] < 0 else 'zero'
+    if to_create or to_update or to_delete:
+        bump_data_version(request.user.pk)
+
+    for client_id, instance in to_create:
+        results[client_id] = {'status': 'created', 'id': instance.pk, 'data': TransactionSerializer(instance).data}
+    for client_id, instance in to_update:
+        results[client_id] = {'status': 'updated', 'id': instance.pk, 'data': TransactionSerializer(instance).data}
+    for client_id, instance in to_delete:
+        results[client_id] = {'status': 'deleted', 'id': instance.pk}
+
+    return Response({'results': results})
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_description=(
+        "Import a bank statement (CSV, OFX/QFX or QIF). Categories are matched by name "
+        "(missing ones are created); rows already imported are skipped."
+    ),
+    manual_parameters=[
+        openapi.Parameter('file', openapi.IN_FORM, description="Statement file", type=openapi.TYPE_FILE, required=True),
+        openapi.Parameter('file_format', openapi.IN_FORM, description="csv, ofx, qfx or qif (default: from file name)", type=openapi.TYPE_STRING),
+        openapi.Parameter('currency', openapi.IN_FORM, description="Currency for rows without one", type=openapi.TYPE_STRING),
+        openapi.Parameter('date_format', openapi.IN_FORM, description="strptime date format, e.g. %d/%m/%Y", type=openapi.TYPE_STRING),
+    ],
+    responses={
+        200: 'Import statistics',
+        400: 'Bad Request',
+        401: 'Unauthorized',
+    }
+)
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+@permission_classes([IsAuthenticated])
+def transaction_import(request):
+    """
+    POST: Bulk-import a statement file
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "A statement file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    file_format = request.data.get('file_format') or detect_format(upload.name)
+    if file_format not in PARSERS:
+        return Response(
+            {"error": f"Unsupported format '{file_format}'. Use one of: {', '.join(PARSERS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Decode the upload lazily so large statements are parsed as a stream
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        importer = TransactionImporter(
+            request.user,
+            currency=request.data.get('currency') or default_currency(request.user),
+        )
+        stats = importer.run(PARSERS[file_format](stream, request.data.get('date_format')))
+    except ImportFormatError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    return Response(summary_by_currency)
+    return Response(stats)
 
 
 # ✅ ADD THIS CLASS AT THE BOTTOM
@@ -287,4 +472,4 @@ class RecurringTransactionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Only return recurring transactions for the logged-in user
-        return RecurringTransaction.objects.filter(user=self.request.user)
\ No newline at end of file
+        return RecurringTransaction.objects.filter(user=self.request.user).select_related('category').order_by('id')
\ No newline at end of file